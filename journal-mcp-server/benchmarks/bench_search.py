@@ -0,0 +1,125 @@
+"""Search benchmarks: latency and recall of quantized embeddings.
+
+Builds a synthetic journal with clustered random embeddings (no model is
+needed), or embeds its texts with ``--embedding-backend``, indexes it at each precision and reports per-query latency and
+recall@k against exact float32 scoring, searching one query at a time
+and all queries in one batch.
+
+    uv run python benchmarks/bench_search.py --entries 100000 --queries 50
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from journal_server.backends import create_backend
+from journal_server.index import EntryIndex, to_epoch
+from journal_server.quantized import PRECISIONS
+from journal_server.types import Journal, JournalEntry, JournalSection
+
+
+def build_journal(entries: int, now: datetime) -> Journal:
+    journal = Journal()
+    section = JournalSection(path="bench")
+    for i in range(entries):
+        section.entries.append(JournalEntry(
+            work_context=f"context {i}",
+            content=f"content {i}",
+            timestamp=now - timedelta(hours=i % (24 * 60)),
+        ))
+    journal.sections["bench"] = section
+    return journal
+
+
+def build_vectors(entries: int, dimension: int, seed: int) -> Dict[str, np.ndarray]:
+    """Embeddings scattered around a few hundred topic centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(256, dimension))
+    topics = rng.integers(0, len(centers), size=2 * entries)
+    noise = rng.normal(scale=0.5, size=(2 * entries, dimension))
+    vectors = (centers[topics] + noise).astype(np.float32)
+    texts = [f"context {i}" for i in range(entries)] + [f"content {i}" for i in range(entries)]
+    return dict(zip(texts, vectors))
+
+
+def embed_texts(journal: Journal, backend_kind: str) -> Dict[str, np.ndarray]:
+    """Embeddings of every entry text from an embedding backend."""
+    model = create_backend(backend_kind).load()
+    entries = journal.sections["bench"].entries
+    texts = [e.work_context for e in entries] + [e.content for e in entries]
+    start = time.perf_counter()
+    vectors = model.encode(texts, batch_size=256, convert_to_numpy=True, show_progress_bar=False)
+    elapsed = time.perf_counter() - start
+    print(f"embedded {len(texts)} texts with {backend_kind} in {elapsed:.2f}s")
+    return dict(zip(texts, np.asarray(vectors, dtype=np.float32)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embedding-backend", choices=["sentence-transformers", "small", "hashing"])
+    args = parser.parse_args()
+
+    now = datetime(2025, 1, 1)
+    journal = build_journal(args.entries, now)
+    if args.embedding_backend:
+        vectors = embed_texts(journal, args.embedding_backend)
+        args.dimension = len(next(iter(vectors.values())))
+    else:
+        vectors = build_vectors(args.entries, args.dimension, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    query_rows = rng.integers(0, args.entries, size=args.queries)
+    queries = [
+        (vectors[f"context {i}"] + rng.normal(scale=0.3, size=args.dimension),
+         vectors[f"content {i}"] + rng.normal(scale=0.3, size=args.dimension))
+        for i in query_rows
+    ]
+
+    def embed_many(texts: List[str]) -> List[np.ndarray]:
+        return [vectors[text] for text in texts]
+
+    exact: List[set] = []
+    print(f"{args.entries} entries, dimension {args.dimension}, top {args.top_k}")
+    print(f"{'precision':<10} {'matrix MiB':>10} {'ms/query':>9} {'batched':>8} {'recall':>7}")
+    for precision in ("float32", "float16", "int8"):
+        index = EntryIndex(precision)
+        index.sync(journal, embed_many)
+        itemsize = np.dtype(PRECISIONS[precision]).itemsize
+        matrix_bytes = 2 * len(index) * args.dimension * itemsize
+
+        results = []
+        start = time.perf_counter()
+        for work, content in queries:
+            hits = index.search(work, content, -1.0, args.top_k, to_epoch(now))
+            results.append({(h.section_path, h.entry_index) for h in hits})
+        elapsed = (time.perf_counter() - start) / len(queries)
+
+        # All queries in one pass, as journal_search_batch scores them
+        start = time.perf_counter()
+        index.search_batch(
+            np.stack([work for work, _ in queries]),
+            np.stack([content for _, content in queries]),
+            [-1.0] * len(queries),
+            [args.top_k] * len(queries),
+            to_epoch(now),
+        )
+        batched = (time.perf_counter() - start) / len(queries)
+
+        if precision == "float32":
+            exact = results
+        recall = np.mean([len(r & e) / len(e) for r, e in zip(results, exact)])
+        print(
+            f"{precision:<10} {matrix_bytes / 2**20:>10.1f} "
+            f"{elapsed * 1000:>9.2f} {batched * 1000:>8.2f} {recall:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Per-section aggregate statistics kept current as entries are written."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from .columnar import from_epoch_micros, to_epoch_micros
+from .types import JournalEntry, SectionStats
+
+
+def entry_bytes(entry: JournalEntry) -> int:
+    """UTF-8 size of an entry's texts."""
+    return len(entry.work_context.encode('utf-8')) + len(entry.content.encode('utf-8'))
+
+
+@dataclass
+class SectionAggregate:
+    """Totals for one section: its own entries, and its whole subtree."""
+
+    entry_count: int = 0
+    newest_micros: Optional[int] = None
+    bytes: int = 0
+    recursive_entry_count: int = 0
+    recursive_newest_micros: Optional[int] = None
+    recursive_bytes: int = 0
+
+    def to_stats(self, path: str) -> SectionStats:
+        return SectionStats(
+            path=path,
+            entry_count=self.entry_count,
+            last_modified=_to_datetime(self.newest_micros),
+            recursive_entry_count=self.recursive_entry_count,
+            newest_timestamp=_to_datetime(self.recursive_newest_micros),
+            total_bytes=self.recursive_bytes,
+        )
+
+
+# (path, direct entry count, direct bytes, newest entry in epoch microseconds)
+SectionTotals = Tuple[str, int, int, Optional[int]]
+
+
+class SectionAggregates:
+    """Entry counts, sizes and newest timestamps for every section path.
+
+    Each section keeps totals for its own entries and for its subtree.
+    Adding entries updates the section and its ancestors only, so a write
+    costs O(depth) and the table of contents never looks at entries.
+    """
+
+    def __init__(self) -> None:
+        self._sections: Dict[str, SectionAggregate] = {}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._sections
+
+    def get(self, path: str) -> Optional[SectionAggregate]:
+        return self._sections.get(path)
+
+    def stats(self, path: str) -> SectionStats:
+        """Statistics for a section; an unknown one has none."""
+        aggregate = self._sections.get(path)
+        return SectionStats(path=path) if aggregate is None else aggregate.to_stats(path)
+
+    def rebuild(self, totals: Iterable[SectionTotals]) -> None:
+        """Replace all aggregates with per-section direct totals."""
+        self._sections = {}
+        for path, count, size, newest in totals:
+            self.add_section(path)
+            self.add(path, count, size, newest)
+
+    def add_section(self, path: str) -> None:
+        """Track a section (and its ancestors) that may have no entries yet."""
+        current = ""
+        for part in path.split('/'):
+            current = f"{current}/{part}" if current else part
+            self._sections.setdefault(current, SectionAggregate())
+
+    def add_entry(self, path: str, entry: JournalEntry) -> None:
+        self.add(path, 1, entry_bytes(entry), to_epoch_micros(entry.timestamp))
+
+    def add(self, path: str, count: int, size: int, newest: Optional[int]) -> None:
+        """Count ``count`` more entries of ``size`` bytes directly in ``path``."""
+        self.add_section(path)
+        aggregate = self._sections[path]
+        aggregate.entry_count += count
+        aggregate.bytes += size
+        aggregate.newest_micros = _later(aggregate.newest_micros, newest)
+
+        current = path
+        while True:
+            aggregate = self._sections[current]
+            aggregate.recursive_entry_count += count
+            aggregate.recursive_bytes += size
+            aggregate.recursive_newest_micros = _later(
+                aggregate.recursive_newest_micros, newest
+            )
+            if '/' not in current:
+                break
+            current = current.rsplit('/', 1)[0]
+
+
+def _later(first: Optional[int], second: Optional[int]) -> Optional[int]:
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+def _to_datetime(micros: Optional[int]) -> Optional[datetime]:
+    return None if micros is None else from_epoch_micros(micros)
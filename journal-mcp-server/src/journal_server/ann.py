@@ -0,0 +1,231 @@
+"""Approximate nearest-neighbour candidate selection for large journals."""
+
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .index import EntryIndex, normalize
+
+
+def ann_file_for(data_file: Path) -> Path:
+    """Sidecar IVF index path for a journal data file."""
+    return data_file.with_suffix(".ivf.npz")
+
+
+class IvfIndex:
+    """Inverted-file (IVF) index over an ``EntryIndex``.
+
+    Each entry is represented by its work-context and content embeddings
+    concatenated, so the inner product with a concatenated query is exactly
+    ``work_context_score + content_score``. Entries are clustered with
+    spherical k-means into ``n_lists`` inverted lists; a query scans only the
+    ``n_probe`` lists whose centroids score highest, and the resulting
+    candidates are rescored exactly by the ``EntryIndex``. Raising
+    ``n_probe`` trades latency for recall.
+
+    Entries added after training are assigned to their nearest list without
+    retraining; the index retrains once the journal has grown by
+    ``retrain_factor`` since the last training run. Assignments are keyed by
+    (section path, entry index) so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        index_file: Optional[Path] = None,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        min_entries: int = 10000,
+        retrain_factor: float = 4.0,
+        seed: int = 0,
+    ) -> None:
+        self.model_name = model_name
+        self.index_file = index_file
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_entries = min_entries
+        self.retrain_factor = retrain_factor
+        self.seed = seed
+
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_entries = 0
+        self._assignments: Dict[Tuple[str, int], int] = {}
+        self._lists: List[List[int]] = []
+        self._rows_assigned = 0
+        self._generation = -1
+        self._dirty = False
+
+        if index_file is not None:
+            self.load()
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def sync(self, index: EntryIndex) -> bool:
+        """Train or extend the IVF lists to cover every index row.
+
+        Returns False when the journal is too small for approximate search,
+        in which case callers should fall back to exact scoring.
+        """
+        size = len(index)
+        if size < self.min_entries:
+            return False
+
+        if (
+            self._centroids is None
+            or size > self.retrain_factor * self._trained_entries
+        ):
+            self._train(index)
+        elif index.generation != self._generation:
+            # Row numbers changed; rebuild the lists from persisted assignments
+            self._generation = index.generation
+            self._lists = [[] for _ in range(len(self._centroids))]
+            self._rows_assigned = 0
+            self._assign_from(index, 0)
+        else:
+            self._assign_from(index, self._rows_assigned)
+        return True
+
+    def reset_assignments(self) -> None:
+        """Drop every (section path, entry index) assignment, keeping the centroids.
+
+        For when entries were renumbered, e.g. by archival; rows are
+        reassigned to their nearest list on the next ``sync``.
+        """
+        self._assignments = {}
+        if self._centroids is not None:
+            self._lists = [[] for _ in range(len(self._centroids))]
+        self._rows_assigned = 0
+        self._generation = -1
+        self._dirty = True
+
+    def candidates(
+        self,
+        work_context_embedding: np.ndarray,
+        content_embedding: np.ndarray,
+        n_probe: Optional[int] = None,
+    ) -> np.ndarray:
+        """Rows from the inverted lists closest to the query."""
+        if self._centroids is None:
+            raise RuntimeError("IVF index has not been trained")
+        n_probe = min(n_probe or self.n_probe, len(self._centroids))
+
+        query = np.concatenate([
+            normalize(work_context_embedding), normalize(content_embedding)
+        ])
+        scores = self._centroids @ query
+        probe = np.argpartition(-scores, n_probe - 1)[:n_probe]
+
+        rows = [row for list_id in probe for row in self._lists[list_id]]
+        return np.sort(np.array(rows, dtype=np.int64))
+
+    def _vectors(self, index: EntryIndex, rows: slice) -> np.ndarray:
+        return np.hstack([index.work_vectors(rows), index.content_vectors(rows)])
+
+    def _train(self, index: EntryIndex) -> None:
+        """Cluster the current entries with spherical k-means."""
+        size = len(index)
+        n_lists = self.n_lists or max(1, int(math.sqrt(size)))
+        n_lists = min(n_lists, size)
+        rng = np.random.default_rng(self.seed)
+
+        # Train on a sample; k-means quality saturates well before all rows
+        sample_size = min(size, 32 * n_lists)
+        sample_rows = np.sort(rng.choice(size, sample_size, replace=False))
+        sample = np.hstack(
+            [index.work_vectors(sample_rows), index.content_vectors(sample_rows)]
+        )
+
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(10):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            # Lists that lost all members keep their previous centroid
+            occupied = np.bincount(labels, minlength=n_lists) > 0
+            centroids[occupied] = sums[occupied]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms == 0, 1, norms)
+
+        self._centroids = centroids.astype(np.float32)
+        self._trained_entries = size
+        self._assignments = {}
+        self._lists = [[] for _ in range(n_lists)]
+        self._rows_assigned = 0
+        self._generation = index.generation
+        self._assign_from(index, 0)
+
+    def _assign_from(self, index: EntryIndex, start: int, chunk: int = 65536) -> None:
+        """Place rows ``start:`` of the index into their inverted lists."""
+        assert self._centroids is not None
+        size = len(index)
+        known = len(self._assignments)
+        for chunk_start in range(start, size, chunk):
+            rows = slice(chunk_start, min(size, chunk_start + chunk))
+            nearest = np.argmax(self._vectors(index, rows) @ self._centroids.T, axis=1)
+            for offset, list_id in enumerate(nearest):
+                row = chunk_start + offset
+                key = (index.columns.section_path(row), index.columns.entry_index(row))
+                list_id = self._assignments.setdefault(key, int(list_id))
+                self._lists[list_id].append(row)
+        if len(self._assignments) != known:
+            self._dirty = True
+        self._rows_assigned = size
+
+    def load(self) -> None:
+        """Load centroids and assignments from the sidecar file, if valid."""
+        if self.index_file is None or not self.index_file.exists():
+            return
+        try:
+            with np.load(self.index_file, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    return
+                centroids = data["centroids"]
+                trained_entries = int(data["trained_entries"])
+                paths = data["paths"]
+                entry_indices = data["entry_indices"]
+                list_ids = data["list_ids"]
+        except (OSError, KeyError, ValueError):
+            return
+
+        self._centroids = centroids
+        self._trained_entries = trained_entries
+        self._assignments = {
+            (str(path), int(entry_index)): int(list_id)
+            for path, entry_index, list_id in zip(paths, entry_indices, list_ids)
+        }
+        self._lists = [[] for _ in range(len(centroids))]
+
+    def save(self) -> None:
+        """Write centroids and assignments to the sidecar file if changed."""
+        if self.index_file is None or not self._dirty or self._centroids is None:
+            return
+
+        keys = list(self._assignments.items())
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to temporary file first, then rename for atomicity
+        temp_file = self.index_file.with_suffix(".tmp")
+        try:
+            with open(temp_file, "wb") as f:
+                np.savez(
+                    f,
+                    model=np.array(self.model_name),
+                    centroids=self._centroids,
+                    trained_entries=np.array(self._trained_entries),
+                    paths=np.array([path for (path, _), _ in keys], dtype=str),
+                    entry_indices=np.array(
+                        [entry_index for (_, entry_index), _ in keys], dtype=np.int64
+                    ),
+                    list_ids=np.array([list_id for _, list_id in keys], dtype=np.int32),
+                )
+            temp_file.replace(self.index_file)
+        except Exception:
+            if temp_file.exists():
+                temp_file.unlink()
+            raise
+
+        self._dirty = False
@@ -0,0 +1,396 @@
+"""Compressed cold tier for old journal entries."""
+
+import gzip
+import io
+import json
+import logging
+import lzma
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import quote
+
+import numpy as np
+
+from .aggregates import SectionTotals, entry_bytes
+from .columnar import MICROSECONDS, to_epoch_micros
+from .index import IndexHit, _reachable, normalize, temporal_scores
+from .locking import FileLock, FileStamp, file_stamp, lock_file_for
+from .types import JournalEntry
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+
+SegmentFile = Union[Path, IO[bytes]]
+SegmentMode = Literal["rb", "wb"]
+
+
+def _open_gzip(file: SegmentFile, mode: SegmentMode) -> io.BufferedIOBase:
+    return gzip.open(file, mode)
+
+
+def _open_lzma(file: SegmentFile, mode: SegmentMode) -> io.BufferedIOBase:
+    return lzma.open(file, mode)
+
+
+# Segment compression: file suffix and opener
+ARCHIVE_COMPRESSIONS: Dict[
+    str, Tuple[str, Callable[[SegmentFile, SegmentMode], io.BufferedIOBase]]
+] = {
+    "gzip": (".jsonl.gz", _open_gzip),
+    "lzma": (".jsonl.xz", _open_lzma),
+}
+
+# Embeds entry texts that were archived without a vector
+EmbedTexts = Callable[[List[str]], List[Any]]
+
+
+def archive_dir_for(data_file: Path) -> Path:
+    """Directory holding the archive segments for a journal data file."""
+    return data_file.with_suffix('.archive')
+
+
+class ArchiveStore:
+    """Old entries moved out of the journal, in compressed per-section segments.
+
+    Each archival run appends one segment per section: the entries as
+    compressed JSON lines, plus an ``.npz`` of their float16 embeddings
+    (where the embedding cache had them; the first search that scores the
+    segment embeds the rest and writes them back). The ``.npz`` records the
+    model that produced its vectors; vectors from another model are
+    embedded again with ``model_name``'s. ``manifest.json`` lists
+    every section's segments with entry counts and timestamp ranges, so
+    counts, paging and search pruning need no segment reads. Archived entries are
+    the oldest of their section: a section's logical entry numbers run
+    through its archived entries first, then its live ones.
+
+    Segments are decompressed on demand and the most recently used
+    ``cache_segments`` are kept. The manifest is rewritten under an advisory
+    lock and re-read when another process changed it.
+    """
+
+    def __init__(
+        self,
+        archive_dir: Path,
+        compression: str = "gzip",
+        cache_segments: int = 16,
+        model_name: str = 'all-MiniLM-L6-v2',
+    ) -> None:
+        if compression not in ARCHIVE_COMPRESSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        self.archive_dir = archive_dir
+        self.compression = compression
+        self.cache_segments = cache_segments
+        self.model_name = model_name
+        self.manifest_file = archive_dir / 'manifest.json'
+        self._file_lock = FileLock(lock_file_for(self.manifest_file))
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._stamp: Optional[FileStamp] = None
+        # (path, segment number) -> entries, and -> (work, content) vectors;
+        # searches, paging and archival use them (and the manifest) from
+        # several threads
+        self._cache_lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], List[JournalEntry]]" = OrderedDict()
+        self._vectors: "OrderedDict[Tuple[str, int], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+
+    def entry_count(self, path: str) -> int:
+        """Archived entries of one section."""
+        record = self._load_manifest()["sections"].get(path)
+        return 0 if record is None else record["entry_count"]
+
+    def total_entries(self) -> int:
+        return sum(r["entry_count"] for r in self._load_manifest()["sections"].values())
+
+    def section_totals(self) -> List[SectionTotals]:
+        """Archived entry count, bytes and newest entry of every section."""
+        return [
+            (
+                path,
+                record["entry_count"],
+                sum(segment.get("bytes", 0) for segment in record["segments"]),
+                max(segment["last_epoch_us"] for segment in record["segments"]),
+            )
+            for path, record in self._load_manifest()["sections"].items()
+        ]
+
+    def append(
+        self,
+        path: str,
+        entries: Sequence[JournalEntry],
+        vectors: Sequence[Tuple[Optional[np.ndarray], Optional[np.ndarray]]],
+    ) -> None:
+        """Write a segment of ``entries`` (oldest first) for a section.
+
+        ``vectors`` holds each entry's (work context, content) embeddings
+        from ``model_name``, either of which may be None if it was never
+        computed.
+        """
+        if not entries:
+            return
+        with self._file_lock:
+            # Built as a copy and swapped in, since searches may be reading it
+            manifest = dict(self._load_manifest())
+            manifest["sections"] = dict(manifest["sections"])
+            record = manifest["sections"].get(path, {"entry_count": 0, "segments": []})
+            record = {**record, "segments": list(record["segments"])}
+            manifest["sections"][path] = record
+            number = len(record["segments"])
+            stem = f"{quote(path, safe='')}-{number:06d}"
+            suffix, opener = ARCHIVE_COMPRESSIONS[self.compression]
+
+            self.archive_dir.mkdir(parents=True, exist_ok=True)
+            buffer = io.BytesIO()
+            with opener(buffer, 'wb') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry.model_dump(mode="json")).encode('utf-8') + b"\n")
+            _write_bytes(self.archive_dir / f"{stem}{suffix}", buffer.getvalue())
+
+            work, content, embedded = _stack_vectors(vectors)
+            _write_bytes(
+                self.archive_dir / f"{stem}.npz",
+                _vector_bytes(self.model_name, work, content, embedded),
+            )
+
+            record["segments"].append({
+                "file": f"{stem}{suffix}",
+                "vectors": f"{stem}.npz",
+                "count": len(entries),
+                "bytes": sum(entry_bytes(entry) for entry in entries),
+                "first_epoch_us": to_epoch_micros(entries[0].timestamp),
+                "last_epoch_us": max(to_epoch_micros(e.timestamp) for e in entries),
+            })
+            record["entry_count"] += len(entries)
+            _write_bytes(self.manifest_file, json.dumps(manifest, indent=2).encode('utf-8'))
+            with self._cache_lock:
+                self._manifest = manifest
+                self._stamp = file_stamp(self.manifest_file)
+
+    def list_entries(self, path: str, limit: int, offset: int = 0) -> List[JournalEntry]:
+        """Archived entries of a section, most recent first, skipping ``offset``."""
+        record = self._load_manifest()["sections"].get(path)
+        if record is None or limit <= 0:
+            return []
+        # Logical positions [low, high) among the archived entries
+        high = max(0, record["entry_count"] - offset)
+        low = max(0, high - limit)
+        entries: List[JournalEntry] = []
+        start = 0
+        for number, segment in enumerate(record["segments"]):
+            end = start + segment["count"]
+            if start < high and end > low:
+                segment_entries = self._segment_entries(path, number)
+                entries.extend(segment_entries[max(low - start, 0):high - start])
+            start = end
+        return list(reversed(entries))
+
+    def search(
+        self,
+        work_context_embedding: np.ndarray,
+        content_embedding: np.ndarray,
+        salience_threshold: float,
+        max_results: int,
+        now: float,
+        embed: EmbedTexts,
+        prefix: str = "",
+    ) -> List[IndexHit]:
+        """Score archived entries at or below ``prefix`` like the live index.
+
+        Segments whose newest entry's temporal score cannot reach the
+        threshold are skipped unread.
+        """
+        work_query = normalize(work_context_embedding)
+        content_query = normalize(content_embedding)
+        hits: List[IndexHit] = []
+        for path, record in self._load_manifest()["sections"].items():
+            if prefix and path != prefix and not path.startswith(prefix + "/"):
+                continue
+            start = 0
+            for number, segment in enumerate(record["segments"]):
+                bound = temporal_scores(
+                    np.array([segment["last_epoch_us"] / MICROSECONDS]), now
+                )
+                if _reachable(bound, salience_threshold)[0]:
+                    hits.extend(self._score_segment(
+                        path, number, start, work_query, content_query,
+                        salience_threshold, now, embed,
+                    ))
+                start += segment["count"]
+
+        hits.sort(key=lambda hit: (-hit.combined_score, hit.section_path, hit.entry_index))
+        return hits[:max_results]
+
+    def _score_segment(
+        self,
+        path: str,
+        number: int,
+        start: int,
+        work_query: np.ndarray,
+        content_query: np.ndarray,
+        salience_threshold: float,
+        now: float,
+        embed: EmbedTexts,
+    ) -> List[IndexHit]:
+        entries = self._segment_entries(path, number)
+        work, content = self._segment_vectors(path, number, entries, embed)
+        epochs = np.array([to_epoch_micros(e.timestamp) for e in entries]) / MICROSECONDS
+        temporal = temporal_scores(epochs, now)
+        work_scores = work @ work_query
+        content_scores = content @ content_query
+        combined = (work_scores + content_scores) / 2 * temporal
+        return [
+            IndexHit(
+                section_path=path,
+                entry_index=start + int(i),
+                entry=entries[i],
+                work_context_score=float(work_scores[i]),
+                content_score=float(content_scores[i]),
+                temporal_score=float(temporal[i]),
+                combined_score=float(combined[i]),
+            )
+            for i in np.flatnonzero(combined >= salience_threshold)
+        ]
+
+    def _segment_entries(self, path: str, number: int) -> List[JournalEntry]:
+        key = (path, number)
+        with self._cache_lock:
+            entries = self._entries.get(key)
+            if entries is not None:
+                self._entries.move_to_end(key)
+                return entries
+
+        segment = self._load_manifest()["sections"][path]["segments"][number]
+        opener = next(
+            opener
+            for suffix, opener in ARCHIVE_COMPRESSIONS.values()
+            if segment["file"].endswith(suffix)
+        )
+        with opener(self.archive_dir / segment["file"], 'rb') as f:
+            entries = [JournalEntry.model_validate(json.loads(line)) for line in f]
+        with self._cache_lock:
+            self._entries[key] = entries
+            while len(self._entries) > self.cache_segments:
+                self._entries.popitem(last=False)
+        return entries
+
+    def _segment_vectors(
+        self, path: str, number: int, entries: List[JournalEntry], embed: EmbedTexts
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalized float32 vectors for a segment, embedding any it lacks.
+
+        Vectors stored by a different model (or before the model was
+        recorded) are in another vector space, possibly of another
+        dimension, so the whole segment is embedded again.
+        """
+        key = (path, number)
+        with self._cache_lock:
+            vectors = self._vectors.get(key)
+            if vectors is not None:
+                self._vectors.move_to_end(key)
+                return vectors
+
+        segment = self._load_manifest()["sections"][path]["segments"][number]
+        with np.load(self.archive_dir / segment["vectors"], allow_pickle=False) as data:
+            model = str(data["model"]) if "model" in data else None
+            work = data["work"].astype(np.float32)
+            content = data["content"].astype(np.float32)
+            embedded = data["embedded"]
+        if model != self.model_name:
+            work = np.zeros((len(entries), 0), dtype=np.float32)
+            content = np.zeros((len(entries), 0), dtype=np.float32)
+            embedded = np.zeros(len(entries), dtype=bool)
+        missing = np.flatnonzero(~embedded)
+        if len(missing):
+            texts = [entries[i].work_context for i in missing] + [entries[i].content for i in missing]
+            computed = [normalize(v) for v in embed(texts)]
+            if not work.shape[1]:
+                dimension = len(computed[0])
+                work = np.zeros((len(entries), dimension), dtype=np.float32)
+                content = np.zeros((len(entries), dimension), dtype=np.float32)
+            work[missing] = computed[:len(missing)]
+            content[missing] = computed[len(missing):]
+            # Written back so a restart or eviction does not embed them again
+            data = _vector_bytes(
+                self.model_name,
+                work.astype(np.float16),
+                content.astype(np.float16),
+                np.ones(len(entries), dtype=bool),
+            )
+            with self._file_lock:
+                _write_bytes(self.archive_dir / segment["vectors"], data)
+
+        with self._cache_lock:
+            self._vectors[key] = (work, content)
+            while len(self._vectors) > self.cache_segments:
+                self._vectors.popitem(last=False)
+        return work, content
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """The manifest, re-read if another process rewrote it."""
+        with self._cache_lock:
+            stamp = file_stamp(self.manifest_file)
+            if self._manifest is not None and stamp == self._stamp:
+                return self._manifest
+            manifest: Dict[str, Any]
+            if stamp is None:
+                manifest = {"version": ARCHIVE_VERSION, "sections": {}}
+            else:
+                with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            self._manifest, self._stamp = manifest, stamp
+            return manifest
+
+
+def _stack_vectors(
+    vectors: Sequence[Tuple[Optional[np.ndarray], Optional[np.ndarray]]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(work, content, embedded) arrays; rows lacking either vector are zero."""
+    embedded = np.array([w is not None and c is not None for w, c in vectors], dtype=bool)
+    dimension = next((len(w) for w, c in vectors if w is not None and c is not None), 0)
+    work = np.zeros((len(vectors), dimension), dtype=np.float16)
+    content = np.zeros((len(vectors), dimension), dtype=np.float16)
+    for row, (w, c) in enumerate(vectors):
+        if w is not None and c is not None:
+            work[row] = normalize(w)
+            content[row] = normalize(c)
+    return work, content, embedded
+
+
+def _vector_bytes(
+    model_name: str, work: np.ndarray, content: np.ndarray, embedded: np.ndarray
+) -> bytes:
+    """A segment's ``.npz`` vector file, tagged with the model that made them."""
+    buffer = io.BytesIO()
+    np.savez(
+        buffer, model=np.array(model_name), work=work, content=content, embedded=embedded
+    )
+    return buffer.getvalue()
+
+
+def _write_bytes(target: Path, data: bytes) -> None:
+    """Atomically replace ``target`` with ``data``."""
+    # Write to temporary file first, then rename for atomicity
+    temp_file = target.with_suffix(target.suffix + '.tmp')
+    try:
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        temp_file.replace(target)
+    except Exception:
+        if temp_file.exists():
+            temp_file.unlink()
+        raise
@@ -0,0 +1,110 @@
+"""Embedding backends for journal search."""
+
+import hashlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .lexical import tokenize
+
+
+class EmbeddingBackend(ABC):
+    """Source of text embeddings.
+
+    ``name`` identifies the vector space, so cached embeddings from another
+    backend or model are never mixed in. ``load`` returns the encoder: an
+    object whose ``encode(texts, batch_size=..., convert_to_numpy=True,
+    show_progress_bar=False)`` returns one row per text, as
+    sentence-transformers models do. Callers keep the encoder ``load``
+    returns and encode through it.
+    """
+
+    name: str
+
+    @abstractmethod
+    def load(self) -> Any:
+        """Load and return a new encoder."""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """A sentence-transformers model, by hub name or local path."""
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2') -> None:
+        self.name = model_name
+
+    def load(self) -> Any:
+        # Imported here: importing sentence-transformers (and torch) is slow
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.name)
+
+
+class HashingEmbedder(EmbeddingBackend):
+    """Dependency-free embeddings from hashed word and character n-grams.
+
+    Each word and each character trigram of a word is hashed to one of
+    ``dimension`` coordinates with a pseudo-random sign (a sparse random
+    projection of the n-gram counts), and the result is L2-normalized.
+    Texts sharing words or word fragments get similar vectors. There is no
+    model to download and encoding is deterministic across processes, which
+    suits tests, benchmarks and air-gapped hosts; it captures no synonymy.
+    """
+
+    def __init__(self, dimension: int = 384) -> None:
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def load(self) -> Any:
+        # Stateless: the backend is its own encoder
+        return self
+
+    def encode(self, texts: Sequence[str], **kwargs: Any) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in _features(text):
+                index, sign = _bucket(feature, self.dimension)
+                vectors[row, index] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+def _features(text: str) -> List[str]:
+    features = []
+    for word in tokenize(text):
+        features.append(word)
+        padded = f"<{word}>"
+        features.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature: str, dimension: int) -> Tuple[int, float]:
+    """Stable coordinate and sign for a feature (``hash()`` is salted per process)."""
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return (value >> 1) % dimension, 1.0 if value & 1 else -1.0
+
+
+# Selectable from the command line. "small" is a 3-layer distillation of
+# MiniLM: roughly twice as fast as the default with somewhat lower quality.
+DEFAULT_MODELS: Dict[str, Optional[str]] = {
+    "sentence-transformers": 'all-MiniLM-L6-v2',
+    "small": 'paraphrase-MiniLM-L3-v2',
+    "hashing": None,
+}
+
+
+def create_backend(kind: str, model: Optional[str] = None) -> EmbeddingBackend:
+    """Build a backend by kind, optionally overriding its model name or path.
+
+    Only the sentence-transformers kinds have a model to override.
+    """
+    if kind not in DEFAULT_MODELS:
+        raise ValueError(f"Unknown embedding backend: {kind}")
+    if kind == "hashing":
+        if model is not None:
+            raise ValueError(f"The hashing backend has no model to override (got {model!r})")
+        return HashingEmbedder()
+    return SentenceTransformerBackend(model or DEFAULT_MODELS[kind] or "")
@@ -0,0 +1,110 @@
+"""Per-section subtree centroids for hierarchical journal search."""
+
+from typing import Dict, List
+
+import numpy as np
+
+
+def ancestors(path: str) -> List[str]:
+    """The path and every ancestor path, shallowest first."""
+    parts = path.split('/')
+    return ['/'.join(parts[: i + 1]) for i in range(len(parts))]
+
+
+class SectionTree:
+    """Index rows grouped by section, with running subtree centroids.
+
+    For every section it keeps the rows written directly to it and the sums
+    of the normalized work-context and content embeddings of its whole
+    subtree. Adding an embedded row updates the section and its ancestors,
+    O(depth). Because embeddings are normalized, the dot product of a query
+    with a centroid is the mean cosine similarity over the subtree.
+
+    The root is the empty path; its children are the top-level sections.
+    """
+
+    def __init__(self) -> None:
+        self._children: Dict[str, List[str]] = {"": []}
+        self._rows: Dict[str, List[int]] = {}
+        self._work_sums: Dict[str, np.ndarray] = {}
+        self._content_sums: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._children
+
+    def add_row(self, path: str, row: int) -> None:
+        """Record that ``row`` belongs to the section at ``path``."""
+        if path not in self._children:
+            parent = ""
+            for current in ancestors(path):
+                if current not in self._children:
+                    self._children[current] = []
+                    self._children[parent].append(current)
+                parent = current
+        self._rows.setdefault(path, []).append(row)
+
+    def add_vectors(self, path: str, work: np.ndarray, content: np.ndarray) -> None:
+        """Fold one row's normalized embeddings into its subtree centroids."""
+        for current in ancestors(path):
+            if current in self._counts:
+                self._work_sums[current] += work
+                self._content_sums[current] += content
+                self._counts[current] += 1
+            else:
+                self._work_sums[current] = work.astype(np.float64)
+                self._content_sums[current] = content.astype(np.float64)
+                self._counts[current] = 1
+
+    def centroid_score(self, path: str, work_query: np.ndarray, content_query: np.ndarray) -> float:
+        """Mean similarity of the subtree's embedded rows to a normalized query."""
+        count = self._counts.get(path, 0)
+        if count == 0:
+            return -np.inf
+        return float(
+            (self._work_sums[path] @ work_query + self._content_sums[path] @ content_query)
+            / (2 * count)
+        )
+
+    def subtree_rows(self, path: str) -> np.ndarray:
+        """Rows of the section at ``path`` and all its descendants."""
+        if path not in self._children:
+            return np.zeros(0, dtype=np.int64)
+        rows: List[int] = []
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            rows.extend(self._rows.get(current, []))
+            stack.extend(self._children[current])
+        return np.sort(np.array(rows, dtype=np.int64))
+
+    def beam_rows(
+        self,
+        work_query: np.ndarray,
+        content_query: np.ndarray,
+        beam_width: int,
+        root: str = "",
+    ) -> np.ndarray:
+        """Rows of the sections reached by a centroid-guided beam search.
+
+        Starting below ``root``, each level keeps the ``beam_width`` children
+        whose centroids best match the query and descends only into those.
+        Subtrees with no embedded rows are never entered.
+        """
+        if root not in self._children:
+            return np.zeros(0, dtype=np.int64)
+        rows: List[int] = list(self._rows.get(root, []))
+        level = self._children[root]
+        while level:
+            scored = [
+                (self.centroid_score(path, work_query, content_query), path)
+                for path in level
+            ]
+            beam = [
+                path for score, path in sorted(scored, key=lambda s: -s[0])[:beam_width]
+                if score > -np.inf
+            ]
+            for path in beam:
+                rows.extend(self._rows.get(path, []))
+            level = [child for path in beam for child in self._children[path]]
+        return np.sort(np.array(rows, dtype=np.int64))
@@ -2,6 +2,7 @@
 
 import argparse
 import asyncio
+import logging
 from pathlib import Path
 
 from .server import JournalServer
@@ -18,11 +19,171 @@ def main() -> None:
         default=Path("./journal.json"),
         help="Path to the JSON data file (default: ./journal.json)",
     )
+    parser.add_argument(
+        "--storage",
+        choices=["json", "wal", "sqlite", "sharded"],
+        default="json",
+        help="Storage backend: rewrite the JSON file per write, append to a write-ahead log, use a SQLite database next to the data file, or keep one file per top-level section (default: json)",
+    )
+    parser.add_argument(
+        "--wal-compact-bytes",
+        type=int,
+        default=4 * 1024 * 1024,
+        help="Fold the write-ahead log into the JSON snapshot once it exceeds this size (default: 4 MiB)",
+    )
+    parser.add_argument(
+        "--shard-memory-bytes",
+        type=int,
+        default=64 * 1024 * 1024,
+        help="With sharded storage, how much shard data to keep loaded before evicting the least recently used (default: 64 MiB)",
+    )
+    parser.add_argument(
+        "--fsync",
+        choices=["always", "batch", "os"],
+        default="batch",
+        help="When writes are forced to disk: after every entry, once per group commit, or left to the OS (default: batch)",
+    )
+    parser.add_argument(
+        "--commit-window-ms",
+        type=float,
+        default=2.0,
+        help="How long journal_write waits to group concurrent writes into one commit (default: 2)",
+    )
+    parser.add_argument(
+        "--no-embed-on-write",
+        dest="embed_on_write",
+        action="store_false",
+        help="Embed new entries at the next search instead of in the background after each write",
+    )
+    parser.add_argument(
+        "--embed-window-ms",
+        type=float,
+        default=50.0,
+        help="How long the background embedder waits to batch entries written close together (default: 50)",
+    )
+    parser.add_argument(
+        "--embedding-store",
+        choices=["npz", "mmap"],
+        default="npz",
+        help="Where entry embeddings persist: an .embeddings.npz sidecar, or a memory-mapped .vectors file shared between processes (default: npz)",
+    )
+    parser.add_argument(
+        "--embedding-precision",
+        choices=["float32", "float16", "int8"],
+        default="float32",
+        help="Precision of embeddings in memory and in the mmap store; float16 halves and int8 quarters their size (default: float32)",
+    )
+    parser.add_argument(
+        "--embedding-backend",
+        choices=["sentence-transformers", "small", "hashing"],
+        default="sentence-transformers",
+        help="Embedding model: all-MiniLM-L6-v2, the smaller and faster paraphrase-MiniLM-L3-v2, or a dependency-free hashing embedder that needs no download (default: sentence-transformers)",
+    )
+    parser.add_argument(
+        "--embedding-model",
+        default=None,
+        help="Sentence-transformers model name or local path, overriding the backend's default (not valid with the hashing backend)",
+    )
+    parser.add_argument(
+        "--embedding-daemon",
+        choices=["off", "attach", "start"],
+        default="off",
+        help="Embed through a shared daemon that serves one model to every journal server on the host: attach to a running one, or also start one if none is running; without a daemon, embed in-process (default: off)",
+    )
+    parser.add_argument(
+        "--embedding-daemon-socket",
+        type=Path,
+        default=None,
+        help="Unix socket of the embedding daemon (default: journal-embed-<uid>/embed.sock, in a private directory under $XDG_RUNTIME_DIR or the temp directory)",
+    )
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=64,
+        help="Number of texts per embedding model batch (default: 64)",
+    )
+    parser.add_argument(
+        "--search-index",
+        choices=["exact", "ivf"],
+        default="exact",
+        help="Search strategy: exact brute-force scoring or an approximate IVF index (default: exact)",
+    )
+    parser.add_argument(
+        "--ivf-lists",
+        type=int,
+        default=None,
+        help="Number of IVF clusters (default: square root of the entry count)",
+    )
+    parser.add_argument(
+        "--ivf-probes",
+        type=int,
+        default=8,
+        help="IVF clusters scanned per query; higher improves recall at the cost of latency (default: 8)",
+    )
+    parser.add_argument(
+        "--ivf-min-entries",
+        type=int,
+        default=10000,
+        help="Below this many entries the IVF index falls back to exact search (default: 10000)",
+    )
+    parser.add_argument(
+        "--archive-after-days",
+        type=float,
+        default=None,
+        help="At startup, move entries older than this many days into compressed archive segments, searched only when recent entries give too few results (default: never)",
+    )
+    parser.add_argument(
+        "--archive-compression",
+        choices=["gzip", "lzma"],
+        default="gzip",
+        help="Compression for new archive segments (default: gzip)",
+    )
+    parser.add_argument(
+        "--response-max-tokens",
+        type=int,
+        default=8000,
+        help="Approximate size limit of read, list and search responses when the caller sets none; longer ones end with a continuation cursor (default: 8000)",
+    )
+    parser.add_argument(
+        "--search-workers",
+        type=int,
+        default=2,
+        help="Threads used for embedding and search, off the event loop (default: 2)",
+    )
     
     args = parser.parse_args()
     
+    # stdout carries the MCP protocol; logging goes to stderr
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s"
+    )
+    
     # Create and run the server
-    server = JournalServer(data_file=args.data_file)
+    server = JournalServer(
+        data_file=args.data_file,
+        storage=args.storage,
+        wal_compact_bytes=args.wal_compact_bytes,
+        shard_memory_bytes=args.shard_memory_bytes,
+        fsync=args.fsync,
+        commit_window_ms=args.commit_window_ms,
+        embed_batch_size=args.embed_batch_size,
+        embedding_store=args.embedding_store,
+        embed_on_write=args.embed_on_write,
+        embed_window_ms=args.embed_window_ms,
+        embedding_precision=args.embedding_precision,
+        embedding_backend=args.embedding_backend,
+        embedding_model=args.embedding_model,
+        embedding_daemon=args.embedding_daemon,
+        embedding_daemon_socket=args.embedding_daemon_socket,
+        search_index=args.search_index,
+        ivf_lists=args.ivf_lists,
+        ivf_probes=args.ivf_probes,
+        ivf_min_entries=args.ivf_min_entries,
+        search_workers=args.search_workers,
+        archive_after_days=args.archive_after_days,
+        archive_compression=args.archive_compression,
+        response_max_tokens=args.response_max_tokens,
+    )
     asyncio.run(server.run())
 
 
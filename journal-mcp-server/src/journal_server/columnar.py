@@ -0,0 +1,99 @@
+"""Compact column storage for journal entries."""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECONDS = 1_000_000
+
+
+def to_epoch_micros(timestamp: datetime) -> int:
+    """Exact epoch microseconds for a timestamp, treating naive values as UTC."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_micros(micros: int) -> datetime:
+    """Naive UTC timestamp for epoch microseconds."""
+    return EPOCH + timedelta(microseconds=int(micros))
+
+
+class TextArena:
+    """Interned strings addressed by integer id.
+
+    Work contexts and section paths repeat across many entries; each distinct
+    string is held once.
+    """
+
+    def __init__(self) -> None:
+        self._texts: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __getitem__(self, text_id: int) -> str:
+        return self._texts[text_id]
+
+    def intern(self, text: str) -> int:
+        """Id of ``text``, adding it if unseen."""
+        text_id = self._ids.get(text)
+        if text_id is None:
+            text_id = len(self._texts)
+            self._texts.append(text)
+            self._ids[text] = text_id
+        return text_id
+
+
+class EntryColumns:
+    """Where each index row lives, stored column-wise.
+
+    Each row is an int64 epoch-microsecond timestamp, an id of its section
+    path in a shared arena and the entry's position within its section:
+    20 bytes per row. The texts stay in the sections' ``EntryList`` columns
+    and are looked up by (section, position), so the index holds no copy.
+    """
+
+    def __init__(self) -> None:
+        self.paths = TextArena()
+        self._size = 0
+        self._timestamps = np.zeros(0, dtype=np.int64)
+        self._section_ids = np.zeros(0, dtype=np.int32)
+        self._entry_indices = np.zeros(0, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Epoch microseconds, one per row."""
+        return self._timestamps[: self._size]
+
+    def append(self, section_path: str, entry_index: int, micros: int) -> int:
+        """Add a row and return it."""
+        if self._size == len(self._timestamps):
+            capacity = max(64, self._size * 2)
+            self._timestamps = self._grow(self._timestamps, capacity)
+            self._section_ids = self._grow(self._section_ids, capacity)
+            self._entry_indices = self._grow(self._entry_indices, capacity)
+
+        row = self._size
+        self._timestamps[row] = micros
+        self._section_ids[row] = self.paths.intern(section_path)
+        self._entry_indices[row] = entry_index
+        self._size += 1
+        return row
+
+    def section_path(self, row: int) -> str:
+        return self.paths[self._section_ids[row]]
+
+    def entry_index(self, row: int) -> int:
+        return int(self._entry_indices[row])
+
+    def _grow(self, column: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.zeros(capacity, dtype=column.dtype)
+        grown[: self._size] = column[: self._size]
+        return grown
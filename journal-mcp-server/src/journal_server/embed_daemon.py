@@ -0,0 +1,603 @@
+"""Shared embedding daemon for several journal server processes.
+
+One daemon owns one embedding model. Journal servers on the same host
+attach over a Unix domain socket and send the texts they need embedded;
+requests arriving close together, from any number of servers, are merged
+into one ``encode`` call, and every embedding computed is kept in a cache
+shared by all of them.
+
+Messages are frames of a 4-byte big-endian length and a payload. A request
+is a JSON object ``{"model": name, "texts": [...]}``; the reply is a JSON
+frame ``{"count": n, "dimension": d}`` followed by a frame of ``n * d``
+little-endian float32 values, or a single ``{"error": message}`` frame.
+A request without texts only checks that the daemon serves the model.
+
+    uv run journal-embed-daemon --embedding-backend small
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from .backends import DEFAULT_MODELS, EmbeddingBackend, create_backend
+from .embeddings import EmbeddingCache
+from .quantized import MmapEmbeddingStore
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+class DaemonError(RuntimeError):
+    """The embedding daemon refused or failed a request."""
+
+
+def default_socket_path() -> Path:
+    """Per-user socket path, in a private directory under the runtime directory.
+
+    Without ``$XDG_RUNTIME_DIR`` the directory sits in the shared temp
+    directory, so ``bind`` creates it owner-only and refuses one it does
+    not own.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = Path(runtime) if runtime else Path(tempfile.gettempdir())
+    return base / f"journal-embed-{os.getuid()}" / "embed.sock"
+
+
+def _private_dir(directory: Path) -> None:
+    """Create ``directory`` owner-only, or check that an existing one is."""
+    try:
+        directory.mkdir(mode=0o700, parents=True)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise DaemonError(f"{directory} is not a directory owned by this user")
+    if info.st_mode & 0o022:
+        raise DaemonError(f"{directory} is writable by other users")
+
+
+def _check_peer(sock: socket.socket, socket_path: Path) -> None:
+    """Refuse a daemon socket run by another user."""
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = sock.getsockopt(
+            socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+        )
+        _, uid, _ = struct.unpack("3i", credentials)
+    else:
+        uid = os.stat(socket_path).st_uid
+    if uid != os.getuid():
+        raise DaemonError(f"{socket_path} belongs to user {uid}, not this user")
+
+
+def _send_frame(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > MAX_FRAME_BYTES:
+        raise ConnectionError(f"Frame of {size} bytes exceeds the limit")
+    return _recv_exact(sock, size)
+
+
+class LruEmbeddingCache(EmbeddingCache):
+    """In-memory cache keeping only the ``max_entries`` most recently used."""
+
+    def __init__(self, model_name: str, max_entries: int) -> None:
+        super().__init__(model_name)
+        self.max_entries = max_entries
+        self._vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self.key(text)
+        vector = self._vectors.get(key)
+        if vector is not None:
+            self._vectors.move_to_end(key)
+        return vector
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        key = self.key(text)
+        self._vectors[key] = np.asarray(vector, dtype=np.float32)
+        self._vectors.move_to_end(key)
+        while len(self._vectors) > self.max_entries:
+            self._vectors.popitem(last=False)
+
+
+class _Request:
+    """Texts from one client, waiting for the next shared batch."""
+
+    def __init__(self, texts: List[str]) -> None:
+        self.texts = texts
+        self.done = threading.Event()
+        self.vectors: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+
+
+class EmbeddingDaemon:
+    """Serves one embedding model to every journal server on the host.
+
+    Client connections are handled on their own threads, which queue
+    requests for a single encoder thread. The encoder waits
+    ``window_seconds`` after the first request so others can join, answers
+    what it can from the cache and encodes the rest in one call of up to
+    ``max_batch_texts`` texts.
+
+    ``cache_file`` persists the shared cache in a memory-mapped store;
+    without one it is kept in memory, limited to ``cache_entries`` texts.
+    With ``idle_timeout`` the daemon exits once no client has been attached
+    for that many seconds.
+    """
+
+    def __init__(
+        self,
+        backend: EmbeddingBackend,
+        socket_path: Path,
+        cache_file: Optional[Path] = None,
+        batch_size: int = 64,
+        window_seconds: float = 0.005,
+        max_batch_texts: int = 1024,
+        idle_timeout: Optional[float] = None,
+        cache_entries: int = 100_000,
+    ) -> None:
+        self.backend = backend
+        self.socket_path = socket_path
+        self.batch_size = batch_size
+        self.window_seconds = window_seconds
+        self.max_batch_texts = max_batch_texts
+        self.idle_timeout = idle_timeout
+        self.cache: EmbeddingCache = (
+            MmapEmbeddingStore(backend.name, cache_file, "float32")
+            if cache_file is not None
+            else LruEmbeddingCache(backend.name, cache_entries)
+        )
+        self.requests = 0
+        self.batches = 0
+        self.encoded = 0
+        self._model: Any = None
+        self._queue: Deque[_Request] = deque()
+        self._condition = threading.Condition()
+        self._clients: Set[socket.socket] = set()
+        self._idle_since = time.monotonic()
+        self._stopping = False
+        self._server: Optional[socketserver.ThreadingUnixStreamServer] = None
+
+    def bind(self) -> None:
+        """Listen on the socket, replacing a stale one left by a dead daemon.
+
+        The socket's directory must be private to this user.
+        """
+        _private_dir(self.socket_path.parent)
+        if self.socket_path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+            except OSError:
+                self.socket_path.unlink()
+            else:
+                raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+            finally:
+                probe.close()
+
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                daemon._serve_client(self.request)
+
+        # Only the owner may connect to the socket
+        umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(
+                str(self.socket_path), Handler
+            )
+        finally:
+            os.umask(umask)
+        self._server.daemon_threads = True
+
+    def serve_forever(self) -> None:
+        """Bind if needed and serve until ``shutdown`` or the idle timeout."""
+        if self._server is None:
+            self.bind()
+        assert self._server is not None
+        threading.Thread(
+            target=self._run_encoder, name="journal-embed-daemon", daemon=True
+        ).start()
+        logger.info("Embedding daemon for %s listening on %s", self.backend.name, self.socket_path)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            self.cache.save()
+
+    def shutdown(self) -> None:
+        """Stop serving; safe to call from any thread but the serving one."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            # Disconnect attached servers so they fall back instead of waiting
+            for sock in self._clients:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _serve_client(self, sock: socket.socket) -> None:
+        with self._condition:
+            self._clients.add(sock)
+        try:
+            while True:
+                try:
+                    request = json.loads(_recv_frame(sock))
+                except (OSError, ValueError):
+                    return
+                if not isinstance(request, dict):
+                    _send_frame(sock, json.dumps({
+                        "error": "Request must be a JSON object"
+                    }).encode("utf-8"))
+                    continue
+                if request.get("model") != self.backend.name:
+                    _send_frame(sock, json.dumps({
+                        "error": f"Daemon serves {self.backend.name}, not {request.get('model')}"
+                    }).encode("utf-8"))
+                    continue
+
+                texts = [str(text) for text in request.get("texts", [])]
+                try:
+                    vectors = self.encode(texts) if texts else None
+                except DaemonError as e:
+                    _send_frame(sock, json.dumps({"error": str(e)}).encode("utf-8"))
+                    continue
+                count, dimension = (0, 0) if vectors is None else vectors.shape
+                _send_frame(sock, json.dumps(
+                    {"count": count, "dimension": dimension}
+                ).encode("utf-8"))
+                if vectors is not None:
+                    _send_frame(sock, vectors.astype("<f4").tobytes())
+        finally:
+            with self._condition:
+                self._clients.discard(sock)
+                self._idle_since = time.monotonic()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as part of the next shared batch."""
+        request = _Request(texts)
+        with self._condition:
+            if self._stopping:
+                raise DaemonError("Daemon is shutting down")
+            self._queue.append(request)
+            self.requests += 1
+            self._condition.notify()
+        request.done.wait()
+        if request.error is not None or request.vectors is None:
+            raise DaemonError(request.error or "Embedding failed")
+        return request.vectors
+
+    def _run_encoder(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait(timeout=1.0)
+                    if self._idle_expired():
+                        threading.Thread(target=self.shutdown, daemon=True).start()
+                        self._stopping = True
+                if self._stopping:
+                    for request in self._queue:
+                        request.error = "Daemon is shutting down"
+                        request.done.set()
+                    self._queue.clear()
+                    return
+            # Let requests from other clients join this batch
+            time.sleep(self.window_seconds)
+
+            with self._condition:
+                batch = [self._queue.popleft()]
+                total = len(batch[0].texts)
+                while self._queue and total + len(self._queue[0].texts) <= self.max_batch_texts:
+                    total += len(self._queue[0].texts)
+                    batch.append(self._queue.popleft())
+
+            try:
+                self._encode_batch(batch)
+            except Exception as e:
+                logger.exception("Embedding batch of %d requests failed", len(batch))
+                for request in batch:
+                    request.error = str(e) or type(e).__name__
+            finally:
+                for request in batch:
+                    request.done.set()
+
+    def _idle_expired(self) -> bool:
+        return (
+            self.idle_timeout is not None
+            and not self._clients
+            and time.monotonic() - self._idle_since > self.idle_timeout
+        )
+
+    def _encode_batch(self, batch: List[_Request]) -> None:
+        if self._model is None:
+            self._model = self.backend.load()
+        vectors: Dict[str, np.ndarray] = {}
+        missing = []
+        for text in dict.fromkeys(text for request in batch for text in request.texts):
+            cached = self.cache.get(text)
+            if cached is None:
+                missing.append(text)
+            else:
+                vectors[text] = cached
+        if missing:
+            embeddings = self._model.encode(
+                missing,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            for text, embedding in zip(missing, embeddings):
+                vectors[text] = np.asarray(embedding, dtype=np.float32)
+                self.cache.put(text, embedding)
+            self.cache.save()
+            self.encoded += len(missing)
+        self.batches += 1
+        for request in batch:
+            request.vectors = np.stack([vectors[text] for text in request.texts])
+
+
+class DaemonClient:
+    """Encoder that embeds texts through a running daemon.
+
+    One connection is shared by the calling threads; requests on it are
+    serialized, and the daemon batches them with other processes' requests.
+    """
+
+    def __init__(self, socket_path: Path, model_name: str, timeout: float = 300.0) -> None:
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def connect(self) -> None:
+        """Connect and check that the daemon is ours and serves this model."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(str(self.socket_path))
+            _check_peer(sock, self.socket_path)
+        except (OSError, DaemonError):
+            sock.close()
+            raise
+        self._sock = sock
+        self.encode([])
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def encode(self, texts: Sequence[str], **kwargs: Any) -> np.ndarray:
+        if self._sock is None:
+            raise ConnectionError("Not connected to the embedding daemon")
+        with self._lock:
+            request = {"model": self.model_name, "texts": list(texts)}
+            _send_frame(self._sock, json.dumps(request).encode("utf-8"))
+            reply = json.loads(_recv_frame(self._sock))
+            if "error" in reply:
+                raise DaemonError(reply["error"])
+            count, dimension = reply["count"], reply["dimension"]
+            if count == 0:
+                return np.zeros((0, dimension), dtype=np.float32)
+            data = _recv_frame(self._sock)
+        return np.frombuffer(data, dtype="<f4").reshape(count, dimension)
+
+
+class _FallbackEncoder:
+    """Uses the daemon while it answers, then the in-process model."""
+
+    def __init__(self, client: Optional[DaemonClient], fallback: EmbeddingBackend) -> None:
+        self.client = client
+        self.fallback = fallback
+        self._local: Any = None
+        self._lock = threading.Lock()
+
+    def encode(self, texts: Sequence[str], **kwargs: Any) -> np.ndarray:
+        client = self.client
+        if client is not None:
+            try:
+                return client.encode(texts)
+            except (OSError, DaemonError, ValueError) as e:
+                logger.warning("Embedding daemon unavailable (%s); embedding in-process", e)
+                client.close()
+                self.client = None
+        with self._lock:
+            if self._local is None:
+                self._local = self.fallback.load()
+        return np.asarray(self._local.encode(texts, **kwargs))
+
+
+class DaemonBackend(EmbeddingBackend):
+    """Embeds through a shared daemon when one is listening.
+
+    Without a daemon for the same model, or once it stops answering, texts
+    are embedded in-process by ``fallback``. With ``spawn_command`` a
+    missing daemon is started first and given ``startup_timeout`` seconds
+    to listen.
+    """
+
+    def __init__(
+        self,
+        fallback: EmbeddingBackend,
+        socket_path: Path,
+        spawn_command: Optional[List[str]] = None,
+        startup_timeout: float = 10.0,
+    ) -> None:
+        self.fallback = fallback
+        self.name = fallback.name
+        self.socket_path = socket_path
+        self.spawn_command = spawn_command
+        self.startup_timeout = startup_timeout
+
+    def load(self) -> Any:
+        client = DaemonClient(self.socket_path, self.name)
+        try:
+            self._attach(client)
+        except (OSError, DaemonError, ValueError) as e:
+            logger.info("No embedding daemon at %s (%s); embedding in-process", self.socket_path, e)
+            return _FallbackEncoder(None, self.fallback)
+        logger.info("Attached to embedding daemon at %s", self.socket_path)
+        return _FallbackEncoder(client, self.fallback)
+
+    def _attach(self, client: DaemonClient) -> None:
+        try:
+            client.connect()
+            return
+        except OSError:
+            if self.spawn_command is None:
+                raise
+        subprocess.Popen(
+            self.spawn_command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                client.connect()
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+
+def daemon_command(
+    socket_path: Path,
+    backend: str,
+    model: Optional[str] = None,
+    idle_timeout: float = 900.0,
+) -> List[str]:
+    """Command line starting a daemon for ``DaemonBackend`` to spawn."""
+    command = [
+        sys.executable, "-m", "journal_server.embed_daemon",
+        "--socket", str(socket_path),
+        "--embedding-backend", backend,
+        "--idle-timeout", str(idle_timeout),
+    ]
+    if model is not None:
+        command += ["--embedding-model", model]
+    return command
+
+
+def main() -> None:
+    """Run an embedding daemon in the foreground."""
+    parser = argparse.ArgumentParser(description="Shared embedding daemon for journal servers")
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=default_socket_path(),
+        help="Unix socket to listen on, in a directory private to this user (default: journal-embed-<uid>/embed.sock in $XDG_RUNTIME_DIR or the temp directory)",
+    )
+    parser.add_argument(
+        "--embedding-backend",
+        choices=list(DEFAULT_MODELS),
+        default="sentence-transformers",
+        help="Embedding model to serve (default: sentence-transformers)",
+    )
+    parser.add_argument(
+        "--embedding-model",
+        default=None,
+        help="Sentence-transformers model name or local path, overriding the backend's default (not valid with the hashing backend)",
+    )
+    parser.add_argument(
+        "--cache-file",
+        type=Path,
+        default=None,
+        help="Persist the shared embedding cache in this memory-mapped file (default: memory only)",
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=100_000,
+        help="Most texts kept in the in-memory cache without --cache-file (default: 100000)",
+    )
+    parser.add_argument(
+        "--embed-batch-size",
+        type=int,
+        default=64,
+        help="Number of texts per embedding model batch (default: 64)",
+    )
+    parser.add_argument(
+        "--batch-window-ms",
+        type=float,
+        default=5.0,
+        help="How long to wait for requests from other servers to share a batch (default: 5)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        help="Exit after this many seconds without attached servers (default: never)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s"
+    )
+    daemon = EmbeddingDaemon(
+        create_backend(args.embedding_backend, args.embedding_model),
+        args.socket,
+        cache_file=args.cache_file,
+        batch_size=args.embed_batch_size,
+        window_seconds=args.batch_window_ms / 1000,
+        idle_timeout=args.idle_timeout,
+        cache_entries=args.cache_entries,
+    )
+    try:
+        daemon.bind()
+    except DaemonError as e:
+        # Another server started one first; attach to that instead
+        logger.info("%s", e)
+        return
+    # Shut down cleanly (removing the socket, saving the cache) when terminated
+    signal.signal(
+        signal.SIGTERM,
+        lambda *_: threading.Thread(target=daemon.shutdown, daemon=True).start(),
+    )
+    daemon.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Background embedding of newly written journal entries."""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+from .search import JournalSearcher
+from .storage import Entries
+from .types import JournalEntry
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedWorker:
+    """Embeds written entries on a background thread, ahead of searches.
+
+    ``submit`` queues an entry's texts; the worker waits ``window_seconds``
+    after the first arrival so entries written close together share one
+    model batch (up to ``max_batch`` entries), then stores the vectors in the
+    searcher's embedding cache. A later search finds them there and encodes
+    only entries the worker has not reached yet.
+
+    The cache file is written at most every ``save_seconds``, and once more
+    when the worker stops, rather than after every batch.
+
+    With ``entries`` (returning what the search index reads from), each
+    batch's entries are then indexed and assigned to the searcher's IVF
+    lists, so approximate searches cover them as soon as they are embedded.
+
+    A failed batch is logged and dropped; searches embed those entries
+    themselves.
+    """
+
+    def __init__(
+        self,
+        searcher: JournalSearcher,
+        window_seconds: float = 0.05,
+        max_batch: int = 256,
+        save_seconds: float = 5.0,
+        entries: Optional[Callable[[], Entries]] = None,
+    ) -> None:
+        self.searcher = searcher
+        self.entries = entries
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.save_seconds = save_seconds
+        self.batches = 0
+        self.embedded = 0
+        self.last_batch_seconds: Optional[float] = None
+        # (time queued, work context, content)
+        self._queue: Deque[Tuple[float, str, str]] = deque()
+        self._in_flight: Optional[float] = None
+        self._in_flight_count = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        # When embeddings not yet written to the cache file were first added
+        self._unsaved_since: Optional[float] = None
+
+    @property
+    def pending(self) -> int:
+        """Entries queued or being embedded."""
+        with self._condition:
+            return len(self._queue) + self._in_flight_count
+
+    @property
+    def lag_seconds(self) -> float:
+        """How long the oldest entry not yet embedded has been waiting."""
+        with self._condition:
+            oldest = self._in_flight
+            if oldest is None and self._queue:
+                oldest = self._queue[0][0]
+        return 0.0 if oldest is None else time.monotonic() - oldest
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="journal-embed-worker", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Stop after the current batch, waiting for the final cache save."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, entry: JournalEntry) -> None:
+        """Queue a newly written entry for embedding."""
+        with self._condition:
+            self._queue.append((time.monotonic(), entry.work_context, entry.content))
+            self._condition.notify()
+
+    def _save_wait(self) -> Optional[float]:
+        """Seconds until the cache is due to be saved; None if nothing is unsaved."""
+        if self._unsaved_since is None:
+            return None
+        return max(0.0, self._unsaved_since + self.save_seconds - time.monotonic())
+
+    def _save(self) -> None:
+        if self._unsaved_since is None:
+            return
+        self._unsaved_since = None
+        try:
+            self.searcher.save_cache()
+        except Exception:
+            logger.exception("Saving the embedding cache failed")
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping and self._save_wait() != 0:
+                    self._condition.wait(self._save_wait())
+                stopping = self._stopping
+                idle = not self._queue
+            if stopping or idle:
+                self._save()
+                if stopping:
+                    return
+                continue
+            # Let entries written close together join this batch
+            time.sleep(self.window_seconds)
+
+            with self._condition:
+                count = min(len(self._queue), self.max_batch)
+                batch = [self._queue.popleft() for _ in range(count)]
+                self._in_flight = batch[0][0]
+                self._in_flight_count = count
+
+            start = time.perf_counter()
+            try:
+                texts = [text for _, work, content in batch for text in (work, content)]
+                encoded = set(self.searcher.embed_entries(texts))
+                if encoded and self._unsaved_since is None:
+                    self._unsaved_since = time.monotonic()
+                if self.entries is not None:
+                    self.searcher.assign_written(self.entries)
+                # Entries whose texts were all cached already cost nothing
+                self.embedded += sum(
+                    1 for _, work, content in batch if work in encoded or content in encoded
+                )
+                self.batches += 1
+            except Exception:
+                logger.exception("Embedding %d written entries failed", count)
+            finally:
+                self.last_batch_seconds = time.perf_counter() - start
+                with self._condition:
+                    self._in_flight = None
+                    self._in_flight_count = 0
+            if self._save_wait() == 0:
+                self._save()
@@ -0,0 +1,139 @@
+"""Persistent embedding cache for journal entries."""
+
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from .locking import FileLock, FileStamp, file_stamp, lock_file_for
+
+
+def cache_file_for(data_file: Path) -> Path:
+    """Sidecar embedding cache path for a journal data file."""
+    return data_file.with_suffix(".embeddings.npz")
+
+
+class EmbeddingCache:
+    """Embeddings keyed by a hash of the model name and the embedded text.
+
+    Because the key covers both the text and the model, an entry is only
+    re-embedded when its text or the model changes.
+
+    Processes sharing the file merge rather than overwrite: ``save`` takes
+    an advisory lock and folds in what others saved first, and ``refresh``
+    picks up their embeddings between saves.
+    """
+
+    def __init__(self, model_name: str, cache_file: Optional[Path] = None) -> None:
+        self.model_name = model_name
+        self.cache_file = cache_file
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._dirty = False
+        # The file as last read or written by this process
+        self._stamp: Optional[FileStamp] = None
+        self._file_lock = FileLock(lock_file_for(cache_file)) if cache_file else None
+        if cache_file is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def key(self, text: str) -> str:
+        """Cache key for a piece of text under the current model."""
+        digest = hashlib.sha256()
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for text, if any."""
+        return self._vectors.get(self.key(text))
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """Store the embedding for text."""
+        self._vectors[self.key(text)] = np.asarray(vector, dtype=np.float32)
+        self._dirty = True
+
+    def load(self) -> None:
+        """Load cached embeddings from the sidecar file.
+
+        The cache is disposable: a missing, unreadable or foreign-model file
+        simply leaves the cache empty.
+        """
+        self._vectors = {}
+        self._dirty = False
+        if self.cache_file is None:
+            return
+        self._stamp = file_stamp(self.cache_file)
+        self._vectors = self._read()
+
+    def refresh(self) -> bool:
+        """Merge in embeddings other processes saved; returns whether any were."""
+        if self.cache_file is None:
+            return False
+        stamp = file_stamp(self.cache_file)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        for key, vector in self._read().items():
+            self._vectors.setdefault(key, vector)
+        return True
+
+    def _read(self) -> Dict[str, np.ndarray]:
+        """Embeddings in the sidecar file (none if missing or unusable)."""
+        if self.cache_file is None or not self.cache_file.exists():
+            return {}
+
+        try:
+            with np.load(self.cache_file, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    return {}
+                keys = data["keys"]
+                vectors = data["vectors"]
+        except (OSError, KeyError, ValueError):
+            return {}
+
+        return {
+            str(key): vectors[i] for i, key in enumerate(keys)
+        }
+
+    def save(self) -> None:
+        """Write the cache to the sidecar file if anything changed."""
+        if self.cache_file is None or not self._dirty:
+            return
+        assert self._file_lock is not None
+        with self._file_lock:
+            # Keep what other processes saved since this one last looked
+            self.refresh()
+            self._write()
+            self._stamp = file_stamp(self.cache_file)
+
+    def _write(self) -> None:
+        assert self.cache_file is not None
+        keys = list(self._vectors.keys())
+        if keys:
+            vectors = np.stack([self._vectors[key] for key in keys])
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to temporary file first, then rename for atomicity
+        temp_file = self.cache_file.with_suffix(".tmp")
+        try:
+            with open(temp_file, "wb") as f:
+                np.savez(
+                    f,
+                    model=np.array(self.model_name),
+                    keys=np.array(keys, dtype="U64"),
+                    vectors=vectors,
+                )
+            temp_file.replace(self.cache_file)
+        except Exception:
+            if temp_file.exists():
+                temp_file.unlink()
+            raise
+
+        self._dirty = False
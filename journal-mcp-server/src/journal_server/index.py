@@ -0,0 +1,538 @@
+"""In-memory matrix index for vectorized journal search."""
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+from .centroids import SectionTree
+from .columnar import MICROSECONDS, EntryColumns
+from .lexical import LexicalIndex
+from .quantized import PRECISIONS, dequantize, quantize
+from .storage import Entries, EntrySource, iter_sections, path_key
+from .types import EntryList, Journal, JournalEntry
+
+# Temporal salience: exponential decay with a 30 day half-life, floored at 0.1
+HALF_LIFE_DAYS = 30
+MIN_TEMPORAL_SCORE = 0.1
+SECONDS_PER_DAY = 86400
+
+# Rows scored per step of a search before checking for early termination
+SCAN_BLOCK_ROWS = 4096
+# Relative margin on the temporal upper bound of a combined score
+BOUND_SLACK = 1e-5
+
+
+def to_epoch(timestamp: datetime) -> float:
+    """Convert a timestamp to epoch seconds, treating naive values as UTC."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def temporal_scores(timestamps: np.ndarray, now: float) -> np.ndarray:
+    """Vectorized temporal salience for epoch-second timestamps.
+
+    Matches the per-entry rule: age is counted in whole days, decays with a
+    30 day half-life and never drops below 0.1.
+    """
+    age_days = np.floor((now - timestamps) / SECONDS_PER_DAY)
+    decay = np.exp(-age_days * math.log(2) / HALF_LIFE_DAYS)
+    return np.maximum(MIN_TEMPORAL_SCORE, decay)
+
+
+def normalize(vector: np.ndarray) -> np.ndarray:
+    """L2-normalize a vector; zero vectors stay zero."""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return vector
+    normalized: np.ndarray = vector / norm
+    return normalized
+
+
+class JournalEntries:
+    """The entry columns of an in-memory journal, as an ``EntrySource``.
+
+    Holds the columns the journal had when created, so positions read
+    later stay consistent if archival swaps a section's columns.
+    """
+
+    def __init__(self, journal: Journal) -> None:
+        self._sections = {path: section.entries for path, section in iter_sections(journal)}
+
+    def section_paths(self) -> List[str]:
+        return list(self._sections)
+
+    def scan_sections(
+        self, known: Mapping[str, Tuple[int, Optional[int]]]
+    ) -> List[Tuple[str, EntryList]]:
+        return [
+            (path, entries)
+            for path, entries in self._sections.items()
+            if known.get(path, (0, None))
+            != (len(entries), entries.timestamps[-1] if entries else None)
+        ]
+
+    def section_entries(self, path: str) -> Optional[EntryList]:
+        return self._sections.get(path)
+
+
+class PendingRow(NamedTuple):
+    """An entry not yet in the index, with the columns it needs."""
+
+    section_path: str
+    entry_index: int
+    timestamp: int
+    work_context: str
+    content: str
+
+
+@dataclass
+class IndexHit:
+    """A single scored row returned by the index."""
+
+    section_path: str
+    entry_index: int
+    entry: JournalEntry
+    work_context_score: float
+    content_score: float
+    temporal_score: float
+    combined_score: float
+    lexical_score: float = 0.0
+
+
+class EntryIndex:
+    """L2-normalized entry embeddings held in contiguous matrices.
+
+    Row ``i`` of ``work`` and ``content`` belongs to row ``i`` of ``columns``,
+    which holds the entry's section, position and timestamp as flat arrays.
+    Texts are read from the ``EntrySource`` by position when needed, so the
+    index keeps no copy of them; hits materialize their ``JournalEntry``
+    only when returned. Journals are append-only through the server, so the
+    index is kept in sync by appending the entries each section gained
+    since the last sync.
+
+    Rows may be added before they are embedded. A combined score never
+    exceeds the temporal score, so an entry too old to reach a query's
+    threshold needs no embedding for that query (see ``unembedded``).
+
+    ``precision`` selects how the matrices are held (float32, float16 or
+    int8 with a per-row scale); scoring multiplies the quantized rows
+    directly, block by block, without keeping a float32 copy.
+    """
+
+    def __init__(self, precision: str = "float32") -> None:
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision: {precision}")
+        self.precision = precision
+        self.clear()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def work_vectors(self, rows: Any) -> np.ndarray:
+        """Float32 work-context embeddings of ``rows`` (an index or slice)."""
+        return dequantize(self._work[: self._size][rows], self._work_scales[: self._size][rows])
+
+    def content_vectors(self, rows: Any) -> np.ndarray:
+        """Float32 content embeddings of ``rows`` (an index or slice)."""
+        return dequantize(
+            self._content[: self._size][rows], self._content_scales[: self._size][rows]
+        )
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Epoch microseconds, one per row."""
+        return self.columns.timestamps
+
+    @property
+    def embedded(self) -> np.ndarray:
+        """Whether each row has its embeddings."""
+        return self._embedded[: self._size]
+
+    def clear(self) -> None:
+        """Drop all rows."""
+        # Bumped whenever row numbers are reassigned
+        self.generation = getattr(self, "generation", -1) + 1
+        self._source: Any = None
+        # Where texts are read from, as of the last ``pending``
+        self._entries: EntrySource = JournalEntries(Journal())
+        self._section_counts: Dict[str, int] = {}
+        # Timestamp of each section's last indexed entry
+        self._section_newest: Dict[str, int] = {}
+        self._size = 0
+        self._work = np.zeros((0, 0), dtype=PRECISIONS[self.precision])
+        self._content = np.zeros((0, 0), dtype=PRECISIONS[self.precision])
+        self._work_scales = np.ones(0, dtype=np.float32)
+        self._content_scales = np.ones(0, dtype=np.float32)
+        self._embedded = np.zeros(0, dtype=bool)
+        self.columns = EntryColumns()
+        self.tree = SectionTree()
+        self.lexical = LexicalIndex()
+        # Rows by descending timestamp, rebuilt when rows are added
+        self._recency: Optional[np.ndarray] = None
+
+    def pending(self, source: Entries) -> List[PendingRow]:
+        """Return the entries of ``source`` not yet indexed.
+
+        Resets the index first if the source was replaced or any section
+        changed other than by appending entries.
+        """
+        entries = JournalEntries(source) if isinstance(source, Journal) else source
+        if source is not self._source:
+            self.clear()
+        self._source, self._entries = source, entries
+
+        paths = set(entries.section_paths())
+        rows = None
+        if all(path in paths for path in self._section_counts):
+            rows = self._collect()
+        if rows is None:
+            self.clear()
+            self._source, self._entries = source, entries
+            rows = self._collect()
+            assert rows is not None
+        return rows
+
+    def _collect(self) -> Optional[List[PendingRow]]:
+        """Entries sections gained since they were indexed, or None if one was rewritten."""
+        known = {
+            path: (count, self._section_newest[path])
+            for path, count in self._section_counts.items()
+        }
+        rows: List[PendingRow] = []
+        for path, entries in self._entries.scan_sections(known):
+            count = self._section_counts.get(path, 0)
+            if len(entries) < count or (
+                count and entries.timestamps[count - 1] != self._section_newest[path]
+            ):
+                return None
+            rows.extend(
+                PendingRow(
+                    path, i, entries.timestamps[i], entries.work_context(i), entries.content(i)
+                )
+                for i in range(count, len(entries))
+            )
+        return rows
+
+    def add(
+        self,
+        rows: List[PendingRow],
+        work_embeddings: Optional[List[np.ndarray]] = None,
+        content_embeddings: Optional[List[np.ndarray]] = None,
+    ) -> None:
+        """Append rows returned by ``pending``, with embeddings if known."""
+        first = self._size
+        for row in rows:
+            self._append(row)
+        if work_embeddings is not None and content_embeddings is not None:
+            self.fill(
+                np.arange(first, self._size), work_embeddings, content_embeddings
+            )
+
+    def unembedded(
+        self,
+        salience_threshold: float,
+        now: float,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Rows lacking embeddings that could still reach the threshold.
+
+        ``rows`` limits the check to a subset (default: all rows).
+        """
+        if rows is None:
+            missing = np.flatnonzero(~self.embedded)
+        else:
+            missing = rows[~self.embedded[rows]]
+        bounds = temporal_scores(self.timestamps[missing] / MICROSECONDS, now)
+        reachable: np.ndarray = missing[_reachable(bounds, salience_threshold)]
+        return reachable
+
+    def entry_texts(self, rows: np.ndarray) -> Tuple[List[str], List[str]]:
+        """Work contexts and contents of ``rows``, read section by section."""
+        work_texts = [""] * len(rows)
+        content_texts = [""] * len(rows)
+        by_path: Dict[str, List[int]] = {}
+        for k, row in enumerate(rows):
+            by_path.setdefault(self.columns.section_path(row), []).append(k)
+        # Tree order keeps a shard's sections together
+        for path in sorted(by_path, key=path_key):
+            entries = self._section(path)
+            for k in by_path[path]:
+                i = self.columns.entry_index(rows[k])
+                work_texts[k] = entries.work_context(i)
+                content_texts[k] = entries.content(i)
+        return work_texts, content_texts
+
+    def entry(self, row: int) -> JournalEntry:
+        """Materialize the entry at ``row``."""
+        return self._section(self.columns.section_path(row))[self.columns.entry_index(row)]
+
+    def _section(self, path: str) -> EntryList:
+        entries = self._entries.section_entries(path)
+        if entries is None:
+            raise KeyError(f"Section {path} left the journal since it was indexed")
+        return entries
+
+    def fill(
+        self,
+        rows: np.ndarray,
+        work_embeddings: List[np.ndarray],
+        content_embeddings: List[np.ndarray],
+    ) -> None:
+        """Store the embeddings of rows added without them."""
+        for row, work, content in zip(rows, work_embeddings, content_embeddings):
+            if self._embedded[row]:
+                continue
+            work_vector = normalize(work)
+            content_vector = normalize(content)
+            if self._work.shape[1] != work_vector.shape[0]:
+                # First embeddings seen: the dimension is now known
+                self._work = self._grow(self._work, self._work.shape[0], work_vector.shape[0])
+                self._content = self._grow(
+                    self._content, self._content.shape[0], work_vector.shape[0]
+                )
+            data, scales = quantize(np.stack([work_vector, content_vector]), self.precision)
+            self._work[row], self._content[row] = data
+            self._work_scales[row], self._content_scales[row] = scales
+            self._embedded[row] = True
+            self.tree.add_vectors(
+                self.columns.section_path(row), work_vector, content_vector
+            )
+
+    def sync(
+        self,
+        journal: Entries,
+        embed_many: Callable[[List[str]], List[np.ndarray]],
+    ) -> None:
+        """Bring the index up to date with the journal."""
+        rows = self.pending(journal)
+        if not rows:
+            return
+        vectors = embed_many(
+            [row.work_context for row in rows] + [row.content for row in rows]
+        )
+        self.add(rows, vectors[: len(rows)], vectors[len(rows):])
+
+    def _append(self, pending: PendingRow) -> None:
+        """Append one unembedded row, growing the matrices geometrically."""
+        if self._size == self._work.shape[0]:
+            capacity = max(64, self._size * 2)
+            dimension = self._work.shape[1]
+            self._work = self._grow(self._work, capacity, dimension)
+            self._content = self._grow(self._content, capacity, dimension)
+            self._work_scales = _grow_column(self._work_scales, capacity, self._size, 1)
+            self._content_scales = _grow_column(
+                self._content_scales, capacity, self._size, 1
+            )
+            self._embedded = _grow_column(self._embedded, capacity, self._size, False)
+
+        path = pending.section_path
+        row = self.columns.append(path, pending.entry_index, pending.timestamp)
+        self.tree.add_row(path, row)
+        self.lexical.add(row, f"{pending.work_context}\n{pending.content}")
+        self._section_counts[path] = pending.entry_index + 1
+        self._section_newest[path] = pending.timestamp
+        self._size += 1
+        self._recency = None
+
+    def _grow(self, matrix: np.ndarray, capacity: int, dimension: int) -> np.ndarray:
+        grown = np.zeros((capacity, dimension), dtype=matrix.dtype)
+        if self._size and matrix.shape[1] == dimension:
+            grown[: self._size] = matrix[: self._size]
+        return grown
+
+    def search(
+        self,
+        work_context_embedding: np.ndarray,
+        content_embedding: np.ndarray,
+        salience_threshold: float,
+        max_results: int,
+        now: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[IndexHit]:
+        """Score rows and return the top hits above the threshold.
+
+        Rows whose temporal score alone rules them out are skipped. The rest
+        are scored most recent first, in blocks of two matrix-vector products
+        and a vectorized temporal decay; scanning stops once the current
+        top ``max_results`` all beat the temporal bound of every remaining
+        row. Results match an exhaustive scan. ``rows`` restricts scoring to
+        a candidate subset (default: all rows).
+        """
+        return self.search_batch(
+            np.atleast_2d(work_context_embedding),
+            np.atleast_2d(content_embedding),
+            [salience_threshold],
+            [max_results],
+            now=now,
+            rows=rows,
+        )[0]
+
+    def search_batch(
+        self,
+        work_context_embeddings: np.ndarray,
+        content_embeddings: np.ndarray,
+        salience_thresholds: Sequence[float],
+        max_results: Sequence[int],
+        now: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[List[IndexHit]]:
+        """Score several queries in one pass over the rows.
+
+        Query ``i`` is row ``i`` of the embedding matrices with its own
+        threshold and result count; its hits are what ``search`` returns for
+        it alone. Each block of rows is scored against all queries still
+        open with two matrix-matrix products, and a query closes once its
+        top results beat the temporal bound of every remaining row.
+        """
+        count = len(work_context_embeddings)
+        thresholds = np.asarray(salience_thresholds, dtype=np.float64)
+        limits = np.asarray(max_results, dtype=np.int64)
+        if self._size == 0 or count == 0:
+            return [[] for _ in range(count)]
+        if now is None:
+            now = to_epoch(datetime.utcnow())
+        if rows is None:
+            if self._recency is None:
+                self._recency = np.argsort(-self.timestamps, kind="stable")
+            order = self._recency
+        else:
+            order = rows[np.argsort(-self.timestamps[rows], kind="stable")]
+
+        bounds = temporal_scores(self.timestamps[order] / MICROSECONDS, now)
+        keep = _reachable(bounds, thresholds.min()) & self.embedded[order]
+        order, bounds = order[keep], bounds[keep]
+
+        work_queries = np.stack([normalize(q) for q in work_context_embeddings])
+        content_queries = np.stack([normalize(q) for q in content_embeddings])
+        found: List[List[Tuple[np.ndarray, ...]]] = [[] for _ in range(count)]
+        open_queries = limits > 0
+        for start in range(0, len(order), SCAN_BLOCK_ROWS):
+            queries = np.flatnonzero(open_queries)
+            if len(queries) == 0:
+                break
+            block = order[start:start + SCAN_BLOCK_ROWS]
+            temporal = bounds[start:start + SCAN_BLOCK_ROWS]
+            work_scores = (
+                (self._work[block] @ work_queries[queries].T)
+                * self._work_scales[block][:, None]
+            )
+            content_scores = (
+                (self._content[block] @ content_queries[queries].T)
+                * self._content_scales[block][:, None]
+            )
+            combined = (work_scores + content_scores) / 2 * temporal[:, None]
+            for column, query in enumerate(queries):
+                passing = np.flatnonzero(combined[:, column] >= thresholds[query])
+                found[query].append((
+                    block[passing], work_scores[passing, column],
+                    content_scores[passing, column], temporal[passing],
+                    combined[passing, column],
+                ))
+
+            rest = bounds[start + SCAN_BLOCK_ROWS:start + SCAN_BLOCK_ROWS + 1]
+            if not len(rest):
+                break
+            for query in queries:
+                # Later rows are older: close queries none of them can reach
+                floor = thresholds[query]
+                scores = np.concatenate([hit[4] for hit in found[query]])
+                if len(scores) >= limits[query]:
+                    kth = np.partition(scores, len(scores) - limits[query])[-limits[query]]
+                    floor = max(floor, kth)
+                if not _reachable(rest, floor)[0]:
+                    open_queries[query] = False
+
+        return [self._top_hits(hits, int(limit)) for hits, limit in zip(found, limits)]
+
+    def _top_hits(self, found: List[Tuple[np.ndarray, ...]], max_results: int) -> List[IndexHit]:
+        """The best ``max_results`` of a query's passing rows, as hits."""
+        if not found or max_results <= 0:
+            return []
+        hit_rows, work_scores, content_scores, temporal, combined = (
+            np.concatenate(column) for column in zip(*found)
+        )
+        candidates = np.arange(len(hit_rows))
+        if len(candidates) > max_results:
+            top = np.argpartition(-combined, max_results - 1)
+            candidates = candidates[top[:max_results]]
+        # Highest score first, ties in row order
+        candidates = candidates[
+            np.lexsort((hit_rows[candidates], -combined[candidates]))
+        ]
+
+        return [
+            IndexHit(
+                section_path=self.columns.section_path(hit_rows[i]),
+                entry_index=self.columns.entry_index(hit_rows[i]),
+                entry=self.entry(hit_rows[i]),
+                work_context_score=float(work_scores[i]),
+                content_score=float(content_scores[i]),
+                temporal_score=float(temporal[i]),
+                combined_score=float(combined[i]),
+            )
+            for i in candidates
+        ]
+
+    def lexical_search(
+        self,
+        query: str,
+        max_results: int,
+        now: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[IndexHit]:
+        """Rank rows by BM25 relevance to ``query`` scaled by temporal salience.
+
+        Needs no embeddings. Similarity scores of the hits are left at zero.
+        """
+        if max_results <= 0:
+            return []
+        if now is None:
+            now = to_epoch(datetime.utcnow())
+        hit_rows, lexical = self.lexical.scores(query, rows)
+        temporal = temporal_scores(self.timestamps[hit_rows] / MICROSECONDS, now)
+        combined = lexical * temporal
+        # Highest score first, ties in row order
+        order = np.lexsort((hit_rows, -combined))[:max_results]
+        return [
+            IndexHit(
+                section_path=self.columns.section_path(hit_rows[i]),
+                entry_index=self.columns.entry_index(hit_rows[i]),
+                entry=self.entry(hit_rows[i]),
+                work_context_score=0.0,
+                content_score=0.0,
+                temporal_score=float(temporal[i]),
+                combined_score=float(combined[i]),
+                lexical_score=float(lexical[i]),
+            )
+            for i in order
+        ]
+
+
+def _grow_column(column: np.ndarray, capacity: int, size: int, fill: Any) -> np.ndarray:
+    grown = np.full(capacity, fill, dtype=column.dtype)
+    grown[:size] = column[:size]
+    return grown
+
+
+def _reachable(bounds: np.ndarray, salience_threshold: float) -> np.ndarray:
+    """Rows whose temporal bound leaves room to reach the threshold.
+
+    Cosine similarities computed in float32 can exceed 1 by a rounding
+    error, so the bound gets a little slack.
+    """
+    return bounds * (1 + BOUND_SLACK) >= salience_threshold
@@ -0,0 +1,114 @@
+"""BM25 inverted index and rank fusion for journal search."""
+
+import math
+import re
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+# Identifiers stay whole ("JIRA-1234", "storage.load", "_apply_write");
+# their parts are indexed too so "apply" also matches
+_TOKEN = re.compile(r"[a-z0-9_]+(?:[.\-#:/][a-z0-9_]+)*")
+_PART = re.compile(r"[a-z0-9]+")
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Rank offset for reciprocal rank fusion, from the original RRF paper
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms of ``text``, identifiers plus their parts."""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        terms.append(token)
+        parts = _PART.findall(token)
+        if len(parts) > 1 or (parts and parts[0] != token):
+            terms.extend(parts)
+    return terms
+
+
+Key = TypeVar("Key", bound=Hashable)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Key]], k: int = RRF_K
+) -> Dict[Key, float]:
+    """Fused score per key: the sum over rankings of 1 / (k + rank)."""
+    fused: Dict[Key, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+class LexicalIndex:
+    """Inverted index with BM25 scoring over numbered rows.
+
+    Rows are added in order (row ``n`` is the ``n``-th document) and never
+    change, so postings are append-only lists and adding a document costs
+    only its own terms.
+    """
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, List[int]] = {}
+        self._frequencies: Dict[str, List[int]] = {}
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._size = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, row: int, text: str) -> None:
+        """Index ``text`` as document ``row``."""
+        assert row == self._size, "rows must be added in order"
+        terms = tokenize(text)
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            self._postings.setdefault(term, []).append(row)
+            self._frequencies.setdefault(term, []).append(count)
+
+        if self._size == len(self._lengths):
+            lengths = np.zeros(max(64, self._size * 2), dtype=np.int32)
+            lengths[: self._size] = self._lengths[: self._size]
+            self._lengths = lengths
+        self._lengths[row] = len(terms)
+        self._size += 1
+        self._total_length += len(terms)
+
+    def scores(
+        self, query: str, rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 scores of the rows matching any query term.
+
+        Returns (rows, scores) in row order; ``rows`` restricts matching to a
+        subset. Only posting lists of the query terms are touched.
+        """
+        if self._size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        average_length = self._total_length / self._size or 1.0
+        matched: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (self._size - df + 0.5) / (df + 0.5))
+            term_rows = np.array(postings, dtype=np.int64)
+            tf = np.array(self._frequencies[term], dtype=np.float64)
+            norm = 1 - BM25_B + BM25_B * self._lengths[term_rows] / average_length
+            term_scores = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+            for row, score in zip(term_rows.tolist(), term_scores.tolist()):
+                matched[row] = matched.get(row, 0.0) + score
+
+        hit_rows = np.array(sorted(matched), dtype=np.int64)
+        hit_scores = np.array([matched[row] for row in hit_rows.tolist()])
+        if rows is not None and len(hit_rows):
+            keep = np.isin(hit_rows, rows)
+            hit_rows, hit_scores = hit_rows[keep], hit_scores[keep]
+        return hit_rows, hit_scores
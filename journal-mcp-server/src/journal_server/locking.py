@@ -0,0 +1,79 @@
+"""Advisory file locks and change stamps for sharing files between processes."""
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+# (inode, size, modification time in ns) of a file
+FileStamp = Tuple[int, int, int]
+
+
+def lock_file_for(path: Path) -> Path:
+    """Sidecar lock file guarding writes to ``path``."""
+    return path.with_name(path.name + ".lock")
+
+
+def file_stamp(path: Path) -> Optional[FileStamp]:
+    """Cheap change detector for a file; None if it does not exist.
+
+    Files replaced by rename get a new inode and appended files grow, so a
+    changed write is noticed even within the modification time resolution.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared by the threads of a process.
+
+    Cooperating processes (and threads) take it around read-modify-write
+    cycles. Nested acquisitions by the holding thread are free. Where
+    ``fcntl`` is unavailable only threads of this process are excluded.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self._lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._lock.release()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
@@ -0,0 +1,131 @@
+"""Size-budgeted tool responses with continuation cursors."""
+
+import base64
+import binascii
+import json
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .types import SearchResult
+
+# Rough size of a model token in bytes of English text
+BYTES_PER_TOKEN = 4
+
+# Entry bodies are cut to a share of the budget, but never below this
+MIN_ENTRY_BYTES = 256
+
+# Room kept for the continuation line at the end of a page
+FOOTER_BYTES = 200
+
+CURSOR_VERSION = 1
+
+
+def budget_bytes(max_tokens: int) -> int:
+    """Response size in bytes for a token budget."""
+    return max(1, max_tokens) * BYTES_PER_TOKEN
+
+
+def entry_bytes_limit(budget: int) -> int:
+    """Largest entry body shown in full in a response of ``budget`` bytes."""
+    return max(MIN_ENTRY_BYTES, budget // 4)
+
+
+def truncate_text(text: str, max_bytes: int) -> str:
+    """Shorten ``text`` to about ``max_bytes`` UTF-8 bytes at a natural break.
+
+    Prefers the last paragraph break, then sentence end, then whitespace in
+    the second half of the allowance, and notes how much was left out.
+    """
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    head = encoded[:max_bytes].decode('utf-8', errors='ignore')
+    for pattern in (r"\n\s*\n", r"[.!?][\"')\]]?\s", r"\s"):
+        breaks = [m.end() for m in re.finditer(pattern, head)]
+        if breaks and breaks[-1] >= len(head) // 2:
+            head = head[:breaks[-1]]
+            break
+    omitted = len(encoded) - len(head.encode('utf-8'))
+    return f"{head.rstrip()} … *[{omitted} more bytes not shown]*"
+
+
+class ResponseBuilder:
+    """Markdown assembled from parts, refusing parts past a byte budget."""
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.size = 0
+        self._parts: List[str] = []
+
+    def add(self, text: str, required: bool = False) -> bool:
+        """Append ``text`` if it fits (or is ``required``); returns whether it was."""
+        size = len(text.encode('utf-8'))
+        if not required and self.size + size > self.budget - FOOTER_BYTES:
+            return False
+        self._parts.append(text)
+        self.size += size
+        return True
+
+    def build(self, cursor: Optional[str] = None) -> str:
+        """The response, ending with a continuation line if ``cursor`` is set."""
+        if cursor is not None:
+            self._parts.append(
+                f"*More available: call again with `cursor` set to `{cursor}`*\n"
+            )
+        return "".join(self._parts)
+
+
+def encode_cursor(state: Dict[str, Any]) -> str:
+    """Opaque, URL-safe token for resuming a paged response."""
+    payload = json.dumps({"v": CURSOR_VERSION, **state}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip("=")
+
+
+def decode_cursor(cursor: str, tool: str) -> Dict[str, Any]:
+    """State from ``encode_cursor``; ValueError if it is not one for ``tool``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict) or state.get("v") != CURSOR_VERSION or state.get("tool") != tool:
+        raise ValueError(f"Cursor does not belong to {tool}")
+    return state
+
+
+class ResultPages:
+    """Ranked search results held between pages of one search.
+
+    Later pages slice the stored list, so they neither rescore nor shift
+    when entries are written meanwhile. Only the most recent
+    ``max_searches`` searches are kept, for ``ttl_seconds``; a cursor whose
+    results are gone is answered by searching again.
+    """
+
+    def __init__(self, max_searches: int = 64, ttl_seconds: float = 600.0) -> None:
+        self.max_searches = max_searches
+        self.ttl_seconds = ttl_seconds
+        self._pages: "OrderedDict[str, Tuple[float, List[SearchResult]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, results: List[SearchResult]) -> str:
+        """Keep ``results``; returns their key."""
+        key = secrets.token_urlsafe(8)
+        with self._lock:
+            self._pages[key] = (time.monotonic(), results)
+            while len(self._pages) > self.max_searches:
+                self._pages.popitem(last=False)
+        return key
+
+    def get(self, key: str) -> Optional[List[SearchResult]]:
+        with self._lock:
+            stored = self._pages.get(key)
+            if stored is None or time.monotonic() - stored[0] >= self.ttl_seconds:
+                self._pages.pop(key, None)
+                return None
+            self._pages.move_to_end(key)
+            return stored[1]
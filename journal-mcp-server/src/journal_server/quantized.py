@@ -0,0 +1,243 @@
+"""Quantized embeddings and a memory-mapped on-disk embedding store."""
+
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .embeddings import EmbeddingCache
+from .locking import file_stamp
+
+# Storage precisions for embedding vectors. int8 vectors carry a per-row
+# float32 scale; the others store the values directly.
+PRECISIONS: Dict[str, Any] = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+_PRECISION_CODES = {name: code for code, name in enumerate(PRECISIONS)}
+
+STORE_MAGIC = b"JVEC"
+STORE_VERSION = 1
+# magic, version, precision code, reserved, dimension, record count
+_HEADER = struct.Struct("<4sHBBIQ")
+HEADER_SIZE = 256
+_MODEL_NAME_SIZE = HEADER_SIZE - _HEADER.size
+
+
+def quantize(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Convert float vectors (rows) to ``precision``; returns (data, scales)."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.ones(len(vectors), dtype=np.float32)
+    if precision == "int8":
+        peak = np.abs(vectors).max(axis=1)
+        scales = np.where(peak > 0, peak / 127, 1).astype(np.float32)
+        data = np.round(vectors / scales[:, None]).astype(np.int8)
+        return data, scales
+    return vectors.astype(PRECISIONS[precision]), scales
+
+
+def dequantize(data: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Float32 vectors from quantized rows and their scales."""
+    return np.asarray(data, dtype=np.float32) * np.asarray(scales, dtype=np.float32)[..., None]
+
+
+def vector_store_for(data_file: Path) -> Path:
+    """Memory-mapped embedding store path for a journal data file."""
+    return data_file.with_suffix(".vectors")
+
+
+def _record_dtype(precision: str, dimension: int) -> np.dtype:
+    return np.dtype([
+        ("key", "S32"),
+        ("scale", "<f4"),
+        ("vector", PRECISIONS[precision], (dimension,)),
+    ])
+
+
+class MmapEmbeddingStore(EmbeddingCache):
+    """Embedding cache in a fixed-width binary file opened with ``mmap``.
+
+    The file is a 256-byte header (magic, version, precision, dimension,
+    record count, model name) followed by records of a SHA-256 key, a scale
+    and the quantized vector. Opening maps the file read-only, so startup
+    copies nothing and processes on one host share the pages through the OS
+    cache; the key lookup table is built on first use. New embeddings are
+    appended and the record count in the header is updated last, so a crash
+    mid-append leaves the previous records intact.
+
+    A file written for another model, precision or dimension is replaced.
+
+    Processes may share the file: appends happen under an advisory lock at
+    the count found in the header at that moment, and ``refresh`` maps
+    records others appended, extending the lookup table incrementally.
+    """
+
+    def __init__(
+        self, model_name: str, store_file: Path, precision: str = "float16"
+    ) -> None:
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown embedding precision: {precision}")
+        self.precision = precision
+        self._records: Optional[np.ndarray] = None
+        self._rows: Optional[Dict[bytes, int]] = None
+        self._compatible = False
+        super().__init__(model_name, store_file)
+
+    def __len__(self) -> int:
+        stored = 0 if self._records is None else len(self._records)
+        return stored + len(self._vectors)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the stored embedding for text, if any, as float32."""
+        key = self.key(text)
+        vector = self._vectors.get(key)
+        if vector is not None or self._records is None:
+            return vector
+        if self._rows is None:
+            self._rows = {
+                bytes(key): row for row, key in enumerate(self._records["key"])
+            }
+        row = self._rows.get(bytes.fromhex(key))
+        if row is None:
+            return None
+        record = self._records[row]
+        return dequantize(record["vector"], record["scale"])
+
+    def load(self) -> None:
+        """Map the store file; missing or foreign files leave it empty."""
+        self._vectors = {}
+        self._dirty = False
+        self._records = None
+        self._rows = None
+        self._compatible = False
+        if self.cache_file is None:
+            return
+        self._stamp = file_stamp(self.cache_file)
+        if self._stamp is None:
+            return
+
+        with open(self.cache_file, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            return
+        magic, version, code, _, dimension, count = _HEADER.unpack_from(header)
+        model_name = header[_HEADER.size:].rstrip(b"\0").decode("utf-8", "replace")
+        if (
+            magic != STORE_MAGIC
+            or version != STORE_VERSION
+            or code != _PRECISION_CODES[self.precision]
+            or model_name != self.model_name
+        ):
+            return
+
+        self._compatible = True
+        self._dimension = dimension
+        if count:
+            self._records = np.memmap(
+                self.cache_file,
+                dtype=_record_dtype(self.precision, dimension),
+                mode="r",
+                offset=HEADER_SIZE,
+                shape=(count,),
+            )
+
+    def refresh(self) -> bool:
+        """Map records other processes appended since the last look."""
+        if self.cache_file is None:
+            return False
+        stamp = file_stamp(self.cache_file)
+        if stamp == self._stamp:
+            return False
+        previous = self._stamp
+        pending, dirty = self._vectors, self._dirty
+        rows, known = self._rows, 0 if self._records is None else len(self._records)
+        self.load()
+        self._vectors, self._dirty = pending, dirty
+
+        # Same file, more records: index only the new ones
+        appended = (
+            previous is not None and stamp is not None and previous[0] == stamp[0]
+            and self._records is not None and len(self._records) >= known
+        )
+        if appended and rows is not None and self._records is not None:
+            for row in range(known, len(self._records)):
+                rows[bytes(self._records["key"][row])] = row
+            self._rows = rows
+        return True
+
+    def save(self) -> None:
+        """Append new embeddings to the store file."""
+        if self.cache_file is None or not self._dirty:
+            return
+        assert self._file_lock is not None
+        with self._file_lock:
+            # Append after records other processes added meanwhile
+            self.refresh()
+            self._append()
+
+    def _append(self) -> None:
+        assert self.cache_file is not None
+        keys = list(self._vectors)
+        vectors = np.stack([self._vectors[key] for key in keys])
+        if self._compatible and vectors.shape[1] != self._dimension:
+            self._compatible = False
+        if not self._compatible:
+            self._records = None
+        dimension = vectors.shape[1]
+
+        records = np.zeros(len(keys), dtype=_record_dtype(self.precision, dimension))
+        records["key"] = [bytes.fromhex(key) for key in keys]
+        records["vector"], records["scale"] = quantize(vectors, self.precision)
+
+        count = 0 if self._records is None else len(self._records)
+        if self._compatible:
+            with open(self.cache_file, "r+b") as f:
+                f.seek(HEADER_SIZE + count * records.dtype.itemsize)
+                f.write(records.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+                # Publish the new records only once they are on disk
+                f.seek(0)
+                f.write(self._header(dimension, count + len(records)))
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            self._write_new(records, dimension)
+
+        # Remap, then extend the lookup table by the new keys instead of
+        # rebuilding it from every record
+        rows = self._rows if self._compatible else {}
+        self.load()
+        if rows is not None and self._records is not None:
+            for row, key in enumerate(keys, count):
+                rows[bytes.fromhex(key)] = row
+            self._rows = rows
+
+    def _header(self, dimension: int, count: int) -> bytes:
+        name = self.model_name.encode("utf-8")[:_MODEL_NAME_SIZE]
+        return _HEADER.pack(
+            STORE_MAGIC, STORE_VERSION, _PRECISION_CODES[self.precision], 0,
+            dimension, count,
+        ) + name.ljust(_MODEL_NAME_SIZE, b"\0")
+
+    def _write_new(self, records: np.ndarray, dimension: int) -> None:
+        assert self.cache_file is not None
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to temporary file first, then rename for atomicity
+        temp_file = self.cache_file.with_suffix(self.cache_file.suffix + ".tmp")
+        try:
+            with open(temp_file, "wb") as f:
+                f.write(self._header(dimension, len(records)))
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            temp_file.replace(self.cache_file)
+        except Exception:
+            if temp_file.exists():
+                temp_file.unlink()
+            raise
@@ -1,135 +1,623 @@
 """Semantic search implementation for journal entries."""
 
+import logging
 import math
-from datetime import datetime, timedelta
-from typing import Any, List, Tuple, TYPE_CHECKING
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from sentence_transformers import SentenceTransformer
+import numpy as np
 
-from .types import Journal, JournalEntry, SearchResult
+from .ann import IvfIndex
+from .archive import ArchiveStore
+from .backends import EmbeddingBackend, SentenceTransformerBackend
+from .embeddings import EmbeddingCache
+from .index import EntryIndex, IndexHit, PendingRow, normalize, to_epoch
+from .lexical import reciprocal_rank_fusion
+from .storage import Entries
+from .types import SearchQuery, SearchResult
 
-if TYPE_CHECKING:
-    from .types import JournalSection
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("semantic", "hybrid", "lexical")
+
+# Candidates taken from each ranking before fusing them in hybrid mode
+HYBRID_POOL = 50
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search whose caller asked for it to stop."""
 
 
 class JournalSearcher:
     """Semantic search for journal entries with dual-dimension matching."""
     
-    def __init__(self) -> None:
-        # Use a lightweight model for embeddings
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        cache_file: Optional[Path] = None,
+        batch_size: int = 64,
+        ann_index: Optional[IvfIndex] = None,
+        cache: Optional[EmbeddingCache] = None,
+        precision: str = "float32",
+        query_cache_size: int = 1024,
+        result_cache_size: int = 256,
+        result_ttl_seconds: float = 60.0,
+        backend: Optional[EmbeddingBackend] = None,
+        archive: Optional[ArchiveStore] = None,
+        journal_lock: Optional[threading.RLock] = None,
+    ) -> None:
+        # Use a lightweight model for embeddings, loaded on first use
+        self.backend = backend or SentenceTransformerBackend(model_name)
+        self.model_name = self.backend.name
+        self.batch_size = batch_size
+        self._model: Any = None
+        self._model_lock = threading.Lock()
+        # Guards the index, caches and ANN state shared by concurrent searches
+        self._lock = threading.Lock()
+        # The storage's lock, held while reading new entries out of the journal
+        self.journal_lock = journal_lock or threading.RLock()
+        # Guards the embedding cache; saves hold only this, not the search lock
+        self._store_lock = threading.Lock()
+        self.model_load_seconds: Optional[float] = None
+        self.cache = cache or EmbeddingCache(self.model_name, cache_file)
+        self.index = EntryIndex(precision)
+        # Optional approximate candidate selection; exact scoring otherwise
+        self.ann_index = ann_index
+        # Old entries moved out of the journal, searched when the journal
+        # cannot fill a query's results
+        self.archive = archive
+        
+        # Recently used query embeddings, and recent results by journal
+        # generation; results also expire since temporal scores drift with time
+        self.query_cache_size = query_cache_size
+        self.result_cache_size = result_cache_size
+        self.result_ttl_seconds = result_ttl_seconds
+        self._query_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._results: "OrderedDict[Tuple[Any, ...], Tuple[float, List[SearchResult]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "query_cache_hits": 0,
+            "query_cache_misses": 0,
+            "result_cache_hits": 0,
+            "result_cache_misses": 0,
+        }
+    
+    @property
+    def model_loaded(self) -> bool:
+        return self._model is not None
+    
+    @property
+    def model(self) -> Any:
+        """The embedding model, loading it (or waiting for a load) if needed."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+    
+    def start_loading(self) -> None:
+        """Load the model on a background thread."""
+        thread = threading.Thread(
+            target=self._load_in_background, name="journal-model-loader", daemon=True
+        )
+        thread.start()
+    
+    def _load_in_background(self) -> None:
+        try:
+            self.model
+        except Exception:
+            # The next search retries the load and reports the error
+            logger.exception("Background load of embedding model failed")
+    
+    def _load_model(self) -> Any:
+        start = time.perf_counter()
+        model = self.backend.load()
+        self.model_load_seconds = time.perf_counter() - start
+        logger.info(
+            "Loaded embedding model %s in %.2fs", self.model_name, self.model_load_seconds
+        )
+        return model
     
     def search(
         self,
-        journal: Journal,
+        journal: Entries,
         work_context: str,
         content: str,
         salience_threshold: float = 0.5,
         max_results: int = 10,
+        cancel: Optional[threading.Event] = None,
+        path: Optional[str] = None,
+        beam_width: Optional[int] = None,
+        mode: str = "semantic",
+        generation: Optional[int] = None,
+        include_archive: bool = False,
     ) -> List[SearchResult]:
-        """Search journal entries using dual-dimension matching."""
+        """Search journal entries using dual-dimension matching.
+        
+        ``mode`` is one of ``SEARCH_MODES``: ``semantic`` ranks by embedding
+        similarity, ``lexical`` by BM25 over the entry texts without using
+        the embedding model, and ``hybrid`` fuses both rankings with
+        reciprocal rank fusion (``combined_score`` is then the fused score).
+        ``salience_threshold`` filters the semantic ranking only; BM25 scores
+        are unbounded, so lexical hits are ranked without one.
+        
+        ``path`` restricts the search to one section and its subsections.
+        With ``beam_width``, only the sections reached by descending into
+        the ``beam_width`` best-matching subtrees per level (by centroid) are
+        scored, which is approximate but skips whole unrelated subtrees.
         
-        # Generate embeddings for search queries
-        work_context_embedding = self.model.encode([work_context])[0]
-        content_embedding = self.model.encode([content])[0]
+        Safe to call from several threads. Setting ``cancel`` aborts the
+        search with ``SearchCancelled`` at the next checkpoint; entry
+        embeddings computed so far are kept in the cache.
         
-        results: List[SearchResult] = []
+        Passing the storage's write ``generation`` enables the result cache:
+        a repeated search returns the earlier results until the journal
+        changes or ``result_ttl_seconds`` pass.
         
-        # Search through all sections and entries
-        for section_path, section in journal.sections.items():
-            self._search_section(
-                section, section_path, work_context_embedding, content_embedding,
-                salience_threshold, results
+        With an ``archive``, semantic searches also score archived entries
+        when the journal yields fewer than ``max_results`` hits, or always
+        with ``include_archive``. Result ``entry_index`` values then count
+        a section's archived entries first. Lexical and hybrid searches
+        never score the archive and reject ``include_archive``.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if include_archive and mode != "semantic":
+            raise ValueError(f"include_archive is not supported in {mode} mode")
+        path = (path or "").strip('/')
+        
+        key = None
+        if generation is not None:
+            key = (
+                generation, work_context, content, salience_threshold, max_results,
+                path, beam_width, mode, include_archive,
             )
+            cached = self._cached_results(key)
+            if cached is not None:
+                return cached
+        results = self._search(
+            journal, work_context, content, salience_threshold, max_results,
+            cancel, path, beam_width, mode, include_archive,
+        )
+        if key is not None:
+            self._store_results(key, results)
+        return results
+    
+    def search_batch(
+        self,
+        journal: Entries,
+        queries: Sequence[SearchQuery],
+        cancel: Optional[threading.Event] = None,
+        generation: Optional[int] = None,
+    ) -> List[List[SearchResult]]:
+        """Run several semantic searches over the whole journal at once.
         
-        # Sort by combined score (descending)
-        results.sort(key=lambda r: r.combined_score, reverse=True)
+        Returns each query's results as ``search`` would. The queries are
+        encoded in one model batch together with any entries they need, and
+        scored in a single pass over the index (see
+        ``EntryIndex.search_batch``). Queries answered by the result cache
+        are not rescored.
+        """
+        results: List[Optional[List[SearchResult]]] = [None] * len(queries)
+        keys: List[Optional[Tuple[Any, ...]]] = [None] * len(queries)
+        if generation is not None:
+            for i, query in enumerate(queries):
+                # Same key as a semantic search of the whole journal
+                query_key = (
+                    generation, query.work_context, query.content,
+                    query.salience_threshold, query.max_results, "", None, "semantic",
+                    False,
+                )
+                keys[i] = query_key
+                results[i] = self._cached_results(query_key)
         
-        return results[:max_results]
+        todo = [i for i, cached in enumerate(results) if cached is None]
+        if todo:
+            computed = self._search_batch(journal, [queries[i] for i in todo], cancel)
+            for i, query_results in zip(todo, computed):
+                results[i] = query_results
+                key = keys[i]
+                if key is not None:
+                    self._store_results(key, query_results)
+        return [query_results or [] for query_results in results]
     
-    def _search_section(
+    def _search_batch(
         self,
-        section: "JournalSection",
-        section_path: str,
-        work_context_embedding: Any,
-        content_embedding: Any,
-        salience_threshold: float,
-        results: List[SearchResult],
-    ) -> None:
-        """Recursively search a section and its subsections."""
+        journal: Entries,
+        queries: Sequence[SearchQuery],
+        cancel: Optional[threading.Event],
+    ) -> List[List[SearchResult]]:
+        texts = [text for query in queries for text in (query.work_context, query.content)]
+        now = to_epoch(datetime.utcnow())
+        
+        with self._lock:
+            self.index.add(self._pending(journal))
+            with self._store_lock:
+                self.cache.refresh()
+            if self.ann_index is not None:
+                needed = self.index.unembedded(-math.inf, now)
+            else:
+                # Enough for the most permissive query
+                needed = self.index.unembedded(
+                    min(query.salience_threshold for query in queries), now
+                )
+            if len(needed):
+                work_texts, content_texts = self.index.entry_texts(needed)
+                query_embeddings, entry_embeddings = self._embed_many(
+                    texts, work_texts + content_texts, cancel
+                )
+                self.index.fill(
+                    needed,
+                    entry_embeddings[:len(needed)],
+                    entry_embeddings[len(needed):],
+                )
+        
+        if len(needed):
+            self.save_cache()
+        else:
+            query_embeddings, _ = self._embed_many(texts, [], cancel)
+        work_embeddings = np.stack(query_embeddings[0::2])
+        content_embeddings = np.stack(query_embeddings[1::2])
+        _check_cancelled(cancel)
         
-        # Search entries in this section
-        for i, entry in enumerate(section.entries):
-            result = self._score_entry(
-                section_path, i, entry, work_context_embedding, content_embedding
+        with self._lock:
+            candidates = None
+            # One pass over the union of every query's approximate candidates
+            if self.ann_index is not None and self.ann_index.sync(self.index):
+                self.ann_index.save()
+                candidates = np.unique(np.concatenate([
+                    self.ann_index.candidates(work, content)
+                    for work, content in zip(work_embeddings, content_embeddings)
+                ]))
+            hits = self.index.search_batch(
+                work_embeddings,
+                content_embeddings,
+                [query.salience_threshold for query in queries],
+                [query.max_results for query in queries],
+                now=now,
+                rows=candidates,
             )
+            hits = [
+                self._with_archive(
+                    query_hits, work, content, query.salience_threshold,
+                    query.max_results, now, "", False, cancel,
+                )
+                for query, query_hits, work, content in zip(
+                    queries, hits, work_embeddings, content_embeddings
+                )
+            ]
+        
+        return [[_to_result(hit) for hit in query_hits] for query_hits in hits]
+    
+    def _search(
+        self,
+        journal: Entries,
+        work_context: str,
+        content: str,
+        salience_threshold: float,
+        max_results: int,
+        cancel: Optional[threading.Event],
+        path: str,
+        beam_width: Optional[int],
+        mode: str,
+        include_archive: bool,
+    ) -> List[SearchResult]:
+        queries = [work_context, content]
+        lexical_query = f"{work_context}\n{content}"
+        now = to_epoch(datetime.utcnow())
+        
+        with self._lock:
+            self.index.add(self._pending(journal))
+            # Other processes sharing the cache may have embedded these already
+            with self._store_lock:
+                self.cache.refresh()
+            scope = self.index.tree.subtree_rows(path) if path else None
+            if mode == "lexical":
+                hits = self.index.lexical_search(lexical_query, max_results, now, rows=scope)
+                return [_to_result(hit) for hit in self._offset_archived(hits)]
+            
+            # Entries too old to reach the threshold are not embedded for this
+            # query. The IVF lists are built from every row, so keep them complete.
+            if self.ann_index is not None:
+                needed = self.index.unembedded(-math.inf, now)
+            else:
+                needed = self.index.unembedded(salience_threshold, now, rows=scope)
+            if len(needed):
+                # Embed the queries and the needed entries in one batch
+                work_texts, content_texts = self.index.entry_texts(needed)
+                query_embeddings, entry_embeddings = self._embed_many(
+                    queries, work_texts + content_texts, cancel
+                )
+                self.index.fill(
+                    needed,
+                    entry_embeddings[:len(needed)],
+                    entry_embeddings[len(needed):],
+                )
+        
+        # With the index current, concurrent searches only encode their queries
+        if len(needed):
+            self.save_cache()
+        else:
+            query_embeddings, _ = self._embed_many(queries, [], cancel)
+        work_context_embedding, content_embedding = query_embeddings
+        _check_cancelled(cancel)
+        
+        with self._lock:
+            candidates = scope
+            if beam_width is not None:
+                candidates = self.index.tree.beam_rows(
+                    normalize(work_context_embedding),
+                    normalize(content_embedding),
+                    beam_width,
+                    root=path,
+                )
             
-            if result.combined_score >= salience_threshold:
-                results.append(result)
-        
-        # Search subsections
-        for subsection_name, subsection in section.subsections.items():
-            subsection_path = f"{section_path}/{subsection_name}"
-            self._search_section(
-                subsection, subsection_path, work_context_embedding, content_embedding,
-                salience_threshold, results
+            # Narrow to approximate candidates once the journal is large enough
+            if self.ann_index is not None and self.ann_index.sync(self.index):
+                self.ann_index.save()
+                approximate = self.ann_index.candidates(
+                    work_context_embedding, content_embedding
+                )
+                candidates = (
+                    approximate if candidates is None
+                    else np.intersect1d(candidates, approximate)
+                )
+            
+            # Combined score is the mean cosine similarity scaled by temporal salience
+            pool = max_results if mode == "semantic" else max(max_results, HYBRID_POOL)
+            hits = self.index.search(
+                work_context_embedding, content_embedding,
+                salience_threshold, pool, now=now, rows=candidates
             )
+            if mode == "hybrid":
+                lexical_hits = self.index.lexical_search(
+                    lexical_query, pool, now, rows=scope
+                )
+                hits = self._offset_archived(_fuse(hits, lexical_hits, max_results))
+            else:
+                hits = self._with_archive(
+                    hits, work_context_embedding, content_embedding,
+                    salience_threshold, max_results, now, path, include_archive, cancel,
+                )
+        
+        return [_to_result(hit) for hit in hits]
     
-    def _score_entry(
+    def _with_archive(
         self,
-        section_path: str,
-        entry_index: int,
-        entry: JournalEntry,
-        work_context_embedding: Any,
-        content_embedding: Any,
-    ) -> SearchResult:
-        """Score a single entry against the search criteria."""
-        
-        # Generate embeddings for the entry
-        entry_work_embedding = self.model.encode([entry.work_context])[0]
-        entry_content_embedding = self.model.encode([entry.content])[0]
-        
-        # Calculate cosine similarity scores
-        work_context_score = self._cosine_similarity(work_context_embedding, entry_work_embedding)
-        content_score = self._cosine_similarity(content_embedding, entry_content_embedding)
-        
-        # Calculate temporal salience (recent entries score higher)
-        temporal_score = self._calculate_temporal_score(entry.timestamp)
-        
-        # Combine scores (equal weight for now, could be tunable)
-        combined_score = (work_context_score + content_score) / 2 * temporal_score
-        
-        return SearchResult(
-            section_path=section_path,
-            entry_index=entry_index,
-            entry=entry,
-            work_context_score=work_context_score,
-            content_score=content_score,
-            combined_score=combined_score,
-            temporal_score=temporal_score,
+        hits: List[IndexHit],
+        work_context_embedding: np.ndarray,
+        content_embedding: np.ndarray,
+        salience_threshold: float,
+        max_results: int,
+        now: float,
+        path: str,
+        include_archive: bool,
+        cancel: Optional[threading.Event],
+    ) -> List[IndexHit]:
+        """Semantic hits merged with the archive's when they are needed."""
+        hits = self._offset_archived(hits)
+        if self.archive is None or (len(hits) >= max_results and not include_archive):
+            return hits
+        _check_cancelled(cancel)
+        archived = self.archive.search(
+            work_context_embedding, content_embedding, salience_threshold,
+            max_results, now,
+            embed=lambda texts: self._embed_many([], texts, cancel)[1],
+            prefix=path,
         )
+        # Stable sort: on equal scores journal entries stay ahead
+        merged = sorted(hits + archived, key=lambda hit: -hit.combined_score)
+        return merged[:max_results]
+    
+    def _offset_archived(self, hits: List[IndexHit]) -> List[IndexHit]:
+        """Number journal hits after their section's archived entries."""
+        if self.archive is not None:
+            for hit in hits:
+                hit.entry_index += self.archive.entry_count(hit.section_path)
+        return hits
     
-    def _cosine_similarity(self, a: Any, b: Any) -> float:
-        """Calculate cosine similarity between two vectors."""
-        import numpy as np
+    def _cached_results(self, key: Tuple[Any, ...]) -> Optional[List[SearchResult]]:
+        with self._cache_lock:
+            cached = self._results.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.result_ttl_seconds:
+                self._results.move_to_end(key)
+                self.counters["result_cache_hits"] += 1
+                return list(cached[1])
+            self.counters["result_cache_misses"] += 1
+            return None
+    
+    def _store_results(self, key: Tuple[Any, ...], results: List[SearchResult]) -> None:
+        with self._cache_lock:
+            # Entries from older generations can never hit again
+            for stale in [k for k in self._results if k[0] != key[0]]:
+                del self._results[stale]
+            self._results[key] = (time.monotonic(), list(results))
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+    
+    def embed_entries(self, texts: Sequence[str]) -> List[str]:
+        """Put embeddings for entry texts into the cache ahead of searches.
         
-        dot_product = np.dot(a, b)
-        norm_a = np.linalg.norm(a)
-        norm_b = np.linalg.norm(b)
+        Neither encoding nor the cache touches the search lock, and the
+        cache is not saved; see ``save_cache``. Returns the texts that were
+        encoded, i.e. those not already cached.
+        """
+        with self._store_lock:
+            self.cache.refresh()
+            missing = [text for text in dict.fromkeys(texts) if self.cache.get(text) is None]
+        if not missing:
+            return []
+        embeddings = self.model.encode(
+            missing,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        with self._store_lock:
+            for text, embedding in zip(missing, embeddings):
+                self.cache.put(text, embedding)
+        return missing
+    
+    def cached_embeddings(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached embeddings of entry texts, None where missing; never encodes."""
+        with self._store_lock:
+            self.cache.refresh()
+            return [self.cache.get(text) for text in texts]
+    
+    def entries_renumbered(self) -> None:
+        """Forget IVF assignments after live entries moved to other indexes."""
+        with self._lock:
+            if self.ann_index is not None:
+                self.ann_index.reset_assignments()
+                self.ann_index.save()
+    
+    def save_cache(self) -> None:
+        """Write new embeddings to the cache file, outside the search lock."""
+        with self._store_lock:
+            self.cache.save()
+    
+    def refresh(self, journal: Entries) -> None:
+        """Index entries written since the last search, without embedding them."""
+        with self._lock:
+            self.index.add(self._pending(journal))
+    
+    def assign_written(self, entries: Callable[[], Entries]) -> None:
+        """Index written entries and add them to the IVF lists.
         
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-            
-        return float(dot_product / (norm_a * norm_b))
+        For the embed worker, once it has cached the entries' vectors:
+        nothing is encoded here, and rows are assigned only when every row
+        has a cached vector and the IVF index is already trained. Until a
+        search has built the index there is nothing to extend, and
+        ``entries`` is not called, so storage that loads sections lazily
+        stays unloaded.
+        """
+        if self.ann_index is None or not self.ann_index.trained:
+            return
+        with self._lock:
+            if not len(self.index):
+                return
+            self.index.add(self._pending(entries()))
+            missing = self.index.unembedded(-math.inf, to_epoch(datetime.utcnow()))
+            if len(missing):
+                work_texts, content_texts = self.index.entry_texts(missing)
+                cached = self.cached_embeddings(work_texts + content_texts)
+                vectors = [vector for vector in cached if vector is not None]
+                if len(vectors) < len(cached):
+                    return
+                self.index.fill(missing, vectors[:len(missing)], vectors[len(missing):])
+            if self.ann_index.sync(self.index):
+                self.ann_index.save()
     
-    def _calculate_temporal_score(self, timestamp: datetime) -> float:
-        """Calculate temporal salience score (recent entries score higher)."""
-        now = datetime.utcnow()
-        age = now - timestamp
+    def _pending(self, journal: Entries) -> List[PendingRow]:
+        """Entries not yet indexed, read while the storage cannot change them."""
+        with self.journal_lock:
+            return self.index.pending(journal)
+    
+    def _embed_many(
+        self,
+        query_texts: Sequence[str],
+        entry_texts: Sequence[str],
+        cancel: Optional[threading.Event] = None,
+    ) -> Tuple[List[Any], List[Any]]:
+        """Embed query and entry texts in deduplicated model batches.
         
-        # Exponential decay with half-life of 30 days
-        half_life_days = 30
-        decay_factor = math.exp(-age.days * math.log(2) / half_life_days)
+        Entry embeddings come from, and are added to, the persistent cache;
+        query embeddings are not persisted. Texts are encoded in chunks of a
+        few model batches so that cancellation is noticed between chunks.
+        """
+        to_encode: Dict[str, None] = {}
+        embedded: Dict[str, Any] = {}
+        with self._cache_lock:
+            for text in query_texts:
+                embedding = self._query_cache.get(text)
+                if embedding is None:
+                    self.counters["query_cache_misses"] += 1
+                    to_encode[text] = None
+                else:
+                    self._query_cache.move_to_end(text)
+                    self.counters["query_cache_hits"] += 1
+                    embedded[text] = embedding
+        with self._store_lock:
+            for text in entry_texts:
+                if text in embedded or text in to_encode:
+                    continue
+                embedding = self.cache.get(text)
+                if embedding is None:
+                    to_encode[text] = None
+                else:
+                    embedded[text] = embedding
         
-        # Ensure minimum score of 0.1 for very old entries
-        return max(0.1, decay_factor)
+        entry_set = set(entry_texts)
+        texts = list(to_encode)
+        chunk_size = self.batch_size * 8
+        for start in range(0, len(texts), chunk_size):
+            _check_cancelled(cancel)
+            chunk = texts[start:start + chunk_size]
+            embeddings = self.model.encode(
+                chunk,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+            with self._store_lock:
+                for text, embedding in zip(chunk, embeddings):
+                    embedded[text] = embedding
+                    if text in entry_set:
+                        self.cache.put(text, embedding)
+        
+        with self._cache_lock:
+            for text in query_texts:
+                self._query_cache[text] = embedded[text]
+                self._query_cache.move_to_end(text)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        
+        return (
+            [embedded[text] for text in query_texts],
+            [embedded[text] for text in entry_texts],
+        )
+
+
+def _fuse(
+    semantic: List[IndexHit], lexical: List[IndexHit], max_results: int
+) -> List[IndexHit]:
+    """Merge two rankings by reciprocal rank fusion."""
+    hits: Dict[Tuple[str, int], IndexHit] = {}
+    for hit in lexical:
+        hits[(hit.section_path, hit.entry_index)] = hit
+    for hit in semantic:
+        key = (hit.section_path, hit.entry_index)
+        if key in hits:
+            hit.lexical_score = hits[key].lexical_score
+        hits[key] = hit
+    
+    fused = reciprocal_rank_fusion([
+        [(hit.section_path, hit.entry_index) for hit in semantic],
+        [(hit.section_path, hit.entry_index) for hit in lexical],
+    ])
+    ranked = sorted(fused, key=lambda key: -fused[key])[:max_results]
+    for key in ranked:
+        hits[key].combined_score = fused[key]
+    return [hits[key] for key in ranked]
+
+
+def _to_result(hit: IndexHit) -> SearchResult:
+    return SearchResult(
+        section_path=hit.section_path,
+        entry_index=hit.entry_index,
+        entry=hit.entry,
+        work_context_score=hit.work_context_score,
+        content_score=hit.content_score,
+        combined_score=hit.combined_score,
+        temporal_score=hit.temporal_score,
+        lexical_score=hit.lexical_score,
+    )
+
+
+def _check_cancelled(cancel: Optional[threading.Event]) -> None:
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled()
@@ -1,25 +1,187 @@
 """Main MCP server implementation for the journal server."""
 
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
-from mcp.types import Tool, TextContent
+from mcp.types import TextContent, Tool
 
+from .aggregates import SectionAggregates
+from .ann import IvfIndex, ann_file_for
+from .archive import ArchiveStore, archive_dir_for
+from .backends import create_backend
+from .columnar import from_epoch_micros, to_epoch_micros
+from .embed_daemon import DaemonBackend, daemon_command, default_socket_path
+from .embed_worker import EmbedWorker
+from .embeddings import EmbeddingCache, cache_file_for
+from .pagination import (
+    ResponseBuilder,
+    ResultPages,
+    budget_bytes,
+    decode_cursor,
+    encode_cursor,
+    entry_bytes_limit,
+    truncate_text,
+)
+from .quantized import MmapEmbeddingStore, vector_store_for
 from .search import JournalSearcher
-from .storage import JsonStorage
-from .types import JournalEntry
+from .sharded_storage import ShardedStorage
+from .sqlite_storage import SqliteEmbeddingCache, SqliteStorage, embeddings_file_for
+from .storage import EntryWrite, JsonStorage
+from .types import JournalEntry, SearchQuery, SearchResult, SectionStats, SectionSummary
+from .wal_storage import WalStorage
+from .write_pipeline import GroupCommitWriter
+
+logger = logging.getLogger(__name__)
+
+# Arguments shared by the tools whose responses are paged
+PAGING_PROPERTIES: Dict[str, Any] = {
+    "max_tokens": {
+        "type": "integer",
+        "description": "Optional: Approximate size limit of the response in tokens; long entries are shortened and the rest is left for a next page"
+    },
+    "cursor": {
+        "type": "string",
+        "description": "Optional: Continuation cursor from the end of a previous response; fetches its next page (other arguments are ignored)"
+    },
+}
 
 
 class JournalServer:
     """MCP server for journal operations."""
     
-    def __init__(self, data_file: Path) -> None:
-        self.storage = JsonStorage(data_file)
-        self.searcher = JournalSearcher()
+    def __init__(
+        self,
+        data_file: Path,
+        embed_batch_size: int = 64,
+        search_index: str = "exact",
+        ivf_lists: Optional[int] = None,
+        ivf_probes: int = 8,
+        ivf_min_entries: int = 10000,
+        search_workers: int = 2,
+        storage: str = "json",
+        wal_compact_bytes: int = 4 * 1024 * 1024,
+        fsync: str = "batch",
+        commit_window_ms: float = 2.0,
+        shard_memory_bytes: int = 64 * 1024 * 1024,
+        embedding_store: str = "npz",
+        embedding_precision: str = "float32",
+        embedding_backend: str = "sentence-transformers",
+        embedding_model: Optional[str] = None,
+        embedding_daemon: str = "off",
+        embedding_daemon_socket: Optional[Path] = None,
+        embed_on_write: bool = True,
+        embed_window_ms: float = 50.0,
+        archive_after_days: Optional[float] = None,
+        archive_compression: str = "gzip",
+        response_max_tokens: int = 8000,
+    ) -> None:
+        start = time.perf_counter()
+        # Startup phase durations in seconds, reported as each phase completes
+        self.startup_timings: Dict[str, float] = {}
+        
+        self.storage: JsonStorage
+        if storage == "json":
+            self.storage = JsonStorage(data_file, fsync=fsync)
+        elif storage == "wal":
+            self.storage = WalStorage(
+                data_file, compact_bytes=wal_compact_bytes, fsync=fsync
+            )
+        elif storage == "sqlite":
+            self.storage = SqliteStorage(data_file, fsync=fsync)
+        elif storage == "sharded":
+            self.storage = ShardedStorage(
+                data_file, memory_budget_bytes=shard_memory_bytes, fsync=fsync
+            )
+        else:
+            raise ValueError(f"Unknown storage backend: {storage}")
+        # Bursts of journal_write calls share one durable commit
+        self.writer = GroupCommitWriter(
+            self.storage, window_seconds=commit_window_ms / 1000
+        )
+        # Cached vectors, the IVF index and archived vectors are keyed by the backend's name
+        backend = create_backend(embedding_backend, embedding_model)
+        model_name = backend.name
+        # Optionally share one model with other servers through a local daemon
+        if embedding_daemon != "off":
+            if embedding_daemon not in ("attach", "start"):
+                raise ValueError(f"Unknown embedding daemon mode: {embedding_daemon}")
+            socket_path = embedding_daemon_socket or default_socket_path()
+            backend = DaemonBackend(
+                backend,
+                socket_path,
+                spawn_command=(
+                    daemon_command(socket_path, embedding_backend, embedding_model)
+                    if embedding_daemon == "start" else None
+                ),
+            )
+        
+        # Embeddings live in a SQLite database beside a SQLite journal, otherwise in a sidecar file
+        cache: EmbeddingCache
+        if embedding_store == "mmap":
+            cache = MmapEmbeddingStore(
+                model_name, vector_store_for(data_file), embedding_precision
+            )
+        elif embedding_store != "npz":
+            raise ValueError(f"Unknown embedding store: {embedding_store}")
+        elif isinstance(self.storage, SqliteStorage):
+            cache = SqliteEmbeddingCache(model_name, embeddings_file_for(data_file))
+        else:
+            cache = EmbeddingCache(model_name, cache_file_for(data_file))
+        ann_index = None
+        if search_index == "ivf":
+            ann_index = IvfIndex(
+                model_name,
+                ann_file_for(data_file),
+                n_lists=ivf_lists,
+                n_probe=ivf_probes,
+                min_entries=ivf_min_entries,
+            )
+        elif search_index != "exact":
+            raise ValueError(f"Unknown search index: {search_index}")
+        # Entries past the archive age move to compressed segments at startup;
+        # an existing archive stays readable even with archiving turned off
+        self.archive_after_days = archive_after_days
+        self.archive = ArchiveStore(
+            archive_dir_for(data_file), archive_compression, model_name=model_name
+        )
+        self.searcher = JournalSearcher(
+            model_name,
+            batch_size=embed_batch_size,
+            ann_index=ann_index,
+            cache=cache,
+            precision=embedding_precision,
+            backend=backend,
+            archive=self.archive,
+            journal_lock=self.storage.lock,
+        )
+        # New entries are embedded in the background so searches find them ready
+        self.embed_worker: Optional[EmbedWorker] = None
+        if embed_on_write:
+            self.embed_worker = EmbedWorker(
+                self.searcher,
+                window_seconds=embed_window_ms / 1000,
+                entries=self.storage.entry_source,
+            )
+        # Embedding and scoring run here, keeping the event loop free for other tools
+        self.executor = ThreadPoolExecutor(
+            max_workers=search_workers, thread_name_prefix="journal-search"
+        )
+        # Default size of read, list and search responses; larger ones page
+        self.response_max_tokens = response_max_tokens
+        self.result_pages = ResultPages()
+        # Index refreshes after writes, kept until done so errors get logged
+        self._background: Set["asyncio.Future[None]"] = set()
         self.server: Server = Server("journal-server")
         self._register_tools()
+        self._record_timing("server_init", start)
     
     def _register_tools(self) -> None:
         """Register all MCP tools."""
@@ -46,7 +208,8 @@ class JournalServer:
                                 "type": "integer",
                                 "default": 5,
                                 "description": "Maximum number of recent entries to include"
-                            }
+                            },
+                            **PAGING_PROPERTIES,
                         },
                         "required": ["path"]
                     }
@@ -94,17 +257,76 @@ class JournalServer:
                             "salience_threshold": {
                                 "type": "number",
                                 "default": 0.5,
-                                "description": "Minimum relevance score for results"
+                                "description": "Minimum relevance score for embedding matches; lexical mode returns the best BM25 matches without a threshold, and hybrid mode applies it to the semantic ranking only"
                             },
                             "max_results": {
                                 "type": "integer",
                                 "default": 10,
                                 "description": "Maximum number of results to return"
-                            }
+                            },
+                            "path": {
+                                "type": "string",
+                                "description": "Optional: Only search this section and its subsections"
+                            },
+                            "beam_width": {
+                                "type": "integer",
+                                "description": "Optional: Descend only into this many best-matching subsections per level (faster, approximate)"
+                            },
+                            "mode": {
+                                "type": "string",
+                                "enum": ["semantic", "hybrid", "lexical"],
+                                "default": "semantic",
+                                "description": "semantic: embedding similarity; lexical: keyword (BM25) matching, good for exact identifiers, no model needed; hybrid: both, fused by rank"
+                            },
+                            "include_archive": {
+                                "type": "boolean",
+                                "default": False,
+                                "description": "Optional: Also search archived old entries (semantic mode searches them anyway when recent entries give too few results; not supported in lexical or hybrid mode)"
+                            },
+                            **PAGING_PROPERTIES,
                         },
                         "required": ["work_context", "content"]
                     }
                 ),
+                Tool(
+                    name="journal_search_batch",
+                    description="Run several journal searches in one call, e.g. to gather context at the start of a session",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "queries": {
+                                "type": "array",
+                                "description": "Searches to run; results are returned per query, in order",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "work_context": {
+                                            "type": "string",
+                                            "description": "The broader kind of work being done"
+                                        },
+                                        "content": {
+                                            "type": "string",
+                                            "description": "Specific content being sought"
+                                        },
+                                        "salience_threshold": {
+                                            "type": "number",
+                                            "default": 0.5,
+                                            "description": "Minimum relevance score for results"
+                                        },
+                                        "max_results": {
+                                            "type": "integer",
+                                            "default": 10,
+                                            "description": "Maximum number of results to return"
+                                        }
+                                    },
+                                    "required": ["work_context", "content"]
+                                }
+                            },
+                            "max_tokens": PAGING_PROPERTIES["max_tokens"],
+                        },
+                        "required": ["queries"]
+                    }
+                ),
                 Tool(
                     name="journal_toc",
                     description="Get table of contents showing journal structure",
@@ -119,6 +341,12 @@ class JournalServer:
                                 "type": "integer",
                                 "default": 3,
                                 "description": "Maximum depth to show in the tree"
+                            },
+                            "sort": {
+                                "type": "string",
+                                "enum": ["tree", "recent"],
+                                "default": "tree",
+                                "description": "tree: sections in path order; recent: within each level, sections with the newest entries first"
                             }
                         }
                     }
@@ -142,62 +370,237 @@ class JournalServer:
                                 "type": "integer",
                                 "default": 0,
                                 "description": "Number of entries to skip"
-                            }
+                            },
+                            **PAGING_PROPERTIES,
                         },
                         "required": ["path"]
                     }
+                ),
+                Tool(
+                    name="journal_stats",
+                    description="Show search index and cache statistics",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {}
+                    }
                 )
             ]
         
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
+            # Another server process may share the journal: pick up its writes.
+            # Reading them is file I/O, so it runs on the loop's default pool
+            # rather than on the loop or behind searches.
+            await asyncio.get_running_loop().run_in_executor(None, self.storage.refresh)
             if name == "journal_read":
                 return await self._handle_read(arguments)
             elif name == "journal_write":
                 return await self._handle_write(arguments)
             elif name == "journal_search":
                 return await self._handle_search(arguments)
+            elif name == "journal_search_batch":
+                return await self._handle_search_batch(arguments)
             elif name == "journal_toc":
                 return await self._handle_toc(arguments)
             elif name == "journal_list_entries":
                 return await self._handle_list_entries(arguments)
+            elif name == "journal_stats":
+                return await self._handle_stats(arguments)
             else:
                 raise ValueError(f"Unknown tool: {name}")
     
+    def archive_old_entries(self) -> int:
+        """Move entries older than ``archive_after_days`` into the archive.
+        
+        Entries take their embeddings along when the cache has them; the
+        model is not loaded for this. Returns how many entries were moved.
+        """
+        if self.archive_after_days is None:
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.archive_after_days)
+        
+        def sink(path: str, entries: Sequence[JournalEntry]) -> None:
+            vectors = self.searcher.cached_embeddings(
+                [text for e in entries for text in (e.work_context, e.content)]
+            )
+            self.archive.append(path, entries, list(zip(vectors[0::2], vectors[1::2])))
+        
+        moved = self.storage.move_entries_before(cutoff, sink)
+        if moved:
+            # Live entries were renumbered, so persisted IVF assignments are stale
+            self.searcher.entries_renumbered()
+            logger.info("Archived %d entries older than %s", moved, cutoff.isoformat())
+        return moved
+    
+    def _refresh_index(self) -> None:
+        """Index entries written since the last search (runs on the executor)."""
+        self.searcher.refresh(self.storage.entry_source())
+    
+    def _refresh_done(self, refresh: "asyncio.Future[None]") -> None:
+        self._background.discard(refresh)
+        if not refresh.cancelled() and refresh.exception() is not None:
+            logger.error("Refreshing the search index failed", exc_info=refresh.exception())
+    
+    async def _archive_in_background(self) -> None:
+        """Archive old entries on the executor while the server answers calls."""
+        start = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.archive_old_entries
+            )
+        except Exception:
+            logger.exception("Archiving old entries failed")
+        else:
+            self._record_timing("archive", start)
+    
+    def _summarize(self, path: str) -> Optional[SectionSummary]:
+        """Section summary counting archived entries too."""
+        section = self.storage.summarize_section(path)
+        if section is not None:
+            section.entry_count += self.archive.entry_count(path)
+        return section
+    
+    def _section_stats(self, prefix: str) -> List[SectionStats]:
+        """Storage aggregates for a subtree with archived entries folded in."""
+        stats = self.storage.section_stats(prefix)
+        by_path = {s.path: s for s in stats}
+        aggregates = SectionAggregates()
+        for path, count, size, newest in self.archive.section_totals():
+            if path in by_path:
+                aggregates.add(path, count, size, newest)
+        for section in stats:
+            archived = aggregates.get(section.path)
+            if archived is None:
+                continue
+            # Archived entries are older than the section's live ones
+            section.entry_count += archived.entry_count
+            section.recursive_entry_count += archived.recursive_entry_count
+            section.total_bytes += archived.recursive_bytes
+            if section.newest_timestamp is None and archived.recursive_newest_micros is not None:
+                section.newest_timestamp = from_epoch_micros(archived.recursive_newest_micros)
+        return stats
+    
+    def _list_entries(self, path: str, limit: int, offset: int = 0) -> List[JournalEntry]:
+        """Page through a section's entries, continuing into the archive."""
+        entries = self.storage.list_entries(path, limit, offset)
+        if len(entries) < limit:
+            # Offset past the live entries, counted from the newest archived one
+            live = len(entries) + offset if entries else self._live_count(path)
+            entries += self.archive.list_entries(
+                path, limit - len(entries), max(0, offset - live)
+            )
+        return entries
+    
+    def _live_count(self, path: str) -> int:
+        section = self.storage.summarize_section(path)
+        return 0 if section is None else section.entry_count
+    
+    def _budget(self, args: Dict[str, Any]) -> int:
+        """Response size in bytes requested by a tool call."""
+        return budget_bytes(args.get("max_tokens") or self.response_max_tokens)
+    
+    def _add_entries(
+        self,
+        builder: ResponseBuilder,
+        tool: str,
+        path: str,
+        total: int,
+        first: int,
+        limit: int,
+        heading: str,
+        separator: str = "",
+        title: Optional[Callable[[int], str]] = None,
+    ) -> Optional[str]:
+        """Add up to ``limit`` entries, newest first, starting at entry ``first``.
+        
+        Entries are numbered from the oldest (1) to ``total``. Adds as many
+        as fit, with ``title(shown)`` above them, and
+        returns a cursor for the rest, if any.
+        """
+        offset = total - first
+        entries = self._list_entries(path, limit, offset)
+        body_limit = entry_bytes_limit(builder.budget)
+        page = ResponseBuilder(builder.budget - builder.size - 100)
+        shown = 0
+        for entry in entries:
+            text = "".join([
+                f"{heading} Entry {first - shown}\n",
+                f"**Work Context:** {entry.work_context}\n",
+                f"**Timestamp:** {entry.timestamp.isoformat()}\n\n",
+                f"{truncate_text(entry.content, body_limit)}\n\n",
+                separator,
+            ])
+            if not page.add(text, required=not shown):
+                break
+            shown += 1
+        if title is not None:
+            builder.add(title(shown), required=True)
+        builder.add(page.build(), required=True)
+        
+        remaining = min(limit, first) - shown
+        if remaining <= 0:
+            return None
+        return encode_cursor({
+            "tool": tool, "path": path, "next": first - shown, "remaining": remaining,
+        })
+    
+    def _record_timing(self, phase: str, start: float) -> None:
+        """Record and log how long a startup phase took."""
+        self.startup_timings[phase] = time.perf_counter() - start
+        logger.info("Startup phase %s took %.3fs", phase, self.startup_timings[phase])
+    
     async def _handle_read(self, args: Dict[str, Any]) -> List[TextContent]:
         """Handle journal_read tool."""
+        builder = ResponseBuilder(self._budget(args))
+        if args.get("cursor"):
+            # A later page holds only more of the section's entries
+            state = decode_cursor(args["cursor"], "journal_read")
+            path = state["path"]
+            section = self._summarize(path)
+            if section is None:
+                return [TextContent(type="text", text=f"Journal section '{path}' not found")]
+            count = section.entry_count
+            builder.add(f"# Journal Section: {path} (continued)\n\n", required=True)
+            cursor = self._add_entries(
+                builder, "journal_read", path, count,
+                state["next"], state["remaining"], "###",
+                title=lambda shown: f"## Recent Entries, continued ({shown} of {count})\n\n",
+            )
+            return [TextContent(type="text", text=builder.build(cursor))]
+        
         path = args["path"]
         include_entries = args.get("include_entries", False)
         max_entries = args.get("max_entries", 5)
         
-        section = self.storage.get_section(path)
+        section = self._summarize(path)
         if section is None:
             return [TextContent(type="text", text=f"Journal section '{path}' not found")]
         
-        response = f"# Journal Section: {path}\n\n"
+        builder.add(f"# Journal Section: {path}\n\n", required=True)
         
         if section.overview:
-            response += f"## Overview\n\n{section.overview}\n\n"
+            overview = truncate_text(section.overview, builder.budget // 2)
+            builder.add(f"## Overview\n\n{overview}\n\n", required=True)
         else:
-            response += "## Overview\n\n*No overview yet*\n\n"
-        
-        if include_entries and section.entries:
-            response += f"## Recent Entries ({min(len(section.entries), max_entries)} of {len(section.entries)})\n\n"
-            
-            # Show most recent entries first
-            recent_entries = section.entries[-max_entries:]
-            for i, entry in enumerate(reversed(recent_entries)):
-                response += f"### Entry {len(section.entries) - i}\n"
-                response += f"**Work Context:** {entry.work_context}\n"
-                response += f"**Timestamp:** {entry.timestamp.isoformat()}\n\n"
-                response += f"{entry.content}\n\n"
+            builder.add("## Overview\n\n*No overview yet*\n\n", required=True)
         
+        # Subsections come before entries so that paging never drops them
         if section.subsections:
-            response += "## Subsections\n\n"
-            for subsection_name in section.subsections.keys():
-                response += f"- {subsection_name}\n"
+            builder.add("## Subsections\n\n", required=True)
+            for subsection_name in section.subsections:
+                builder.add(f"- {subsection_name}\n", required=True)
+            builder.add("\n", required=True)
+        
+        cursor = None
+        count = section.entry_count
+        if include_entries and count:
+            # Show most recent entries first
+            cursor = self._add_entries(
+                builder, "journal_read", path, count, count, max_entries, "###",
+                title=lambda shown: f"## Recent Entries ({shown} of {count})\n\n",
+            )
         
-        return [TextContent(type="text", text=response)]
+        return [TextContent(type="text", text=builder.build(cursor))]
     
     async def _handle_write(self, args: Dict[str, Any]) -> List[TextContent]:
         """Handle journal_write tool."""
@@ -206,25 +609,22 @@ class JournalServer:
         work_context = args["work_context"]
         overview = args.get("overview")
         
-        # Get or create the section
-        section = self.storage.get_section(path)
-        if section is None:
-            section = self.storage.create_section(path)
-        
-        # Add the new entry
+        # Add the new entry (creating the section if needed) and update the overview
         new_entry = JournalEntry(
             work_context=work_context,
             content=entry_content
         )
-        section.entries.append(new_entry)
-        
-        # Update overview if provided
-        if overview is not None:
-            section.overview = overview
-        
-        # Save the journal
-        journal = self.storage.load()
-        self.storage.save(journal)
+        await self.writer.write(EntryWrite(path, new_entry, overview))
+        if self.embed_worker is not None:
+            self.embed_worker.submit(new_entry)
+        
+        # Keep the inverted index current once search has built it
+        if len(self.searcher.index):
+            refresh = asyncio.get_running_loop().run_in_executor(
+                self.executor, self._refresh_index
+            )
+            self._background.add(refresh)
+            refresh.add_done_callback(self._refresh_done)
         
         response = f"Added entry to journal section '{path}'"
         if overview is not None:
@@ -234,102 +634,212 @@ class JournalServer:
     
     async def _handle_search(self, args: Dict[str, Any]) -> List[TextContent]:
         """Handle journal_search tool."""
+        budget = self._budget(args)
+        if args.get("cursor"):
+            state = decode_cursor(args["cursor"], "journal_search")
+            results = self.result_pages.get(state["key"])
+            if results is None:
+                # The stored results expired; search again
+                results = await self._search(state["args"])
+                state["key"] = self.result_pages.put(results)
+            return [TextContent(type="text", text=self._results_page(
+                results, state["next"], state["args"].get("mode", "semantic"), budget,
+                state["key"], state["args"],
+            ))]
+        
+        results = await self._search(args)
+        key = self.result_pages.put(results) if results else ""
+        search_args = {k: v for k, v in args.items() if k not in PAGING_PROPERTIES}
+        return [TextContent(type="text", text=self._results_page(
+            results, 0, args.get("mode", "semantic"), budget, key, search_args,
+        ))]
+    
+    async def _search(self, args: Dict[str, Any]) -> List[SearchResult]:
+        """Run one journal_search off the event loop."""
         work_context = args["work_context"]
         content = args["content"]
         salience_threshold = args.get("salience_threshold", 0.5)
         max_results = args.get("max_results", 10)
+        path = args.get("path")
+        beam_width = args.get("beam_width")
+        mode = args.get("mode", "semantic")
+        include_archive = args.get("include_archive", False)
+        
+        cancel = threading.Event()
+        
+        def search() -> List[SearchResult]:
+            # Loading a journal can read files, so it happens off the loop too
+            return self.searcher.search(
+                self.storage.entry_source(), work_context, content,
+                salience_threshold, max_results,
+                cancel=cancel, path=path, beam_width=beam_width, mode=mode,
+                generation=self.storage.generation, include_archive=include_archive,
+            )
         
-        journal = self.storage.load()
-        results = self.searcher.search(
-            journal, work_context, content, salience_threshold, max_results
-        )
-        
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, search
+            )
+        except asyncio.CancelledError:
+            # The client cancelled the request; stop the worker at its next checkpoint
+            cancel.set()
+            raise
+        return results
+    
+    def _results_page(
+        self,
+        results: List[SearchResult],
+        start: int,
+        mode: str,
+        budget: int,
+        key: str,
+        search_args: Dict[str, Any],
+    ) -> str:
+        """Render the results from ``start`` that fit in ``budget`` bytes."""
         if not results:
-            return [TextContent(type="text", text="No matching entries found")]
+            return "No matching entries found"
+        builder = ResponseBuilder(budget)
+        page = ResponseBuilder(budget - 100)
+        shown = _add_results(page, results, start, mode)
+        end = start + shown
+        if start or end < len(results):
+            builder.add(
+                f"Found {len(results)} matching entries (showing {start + 1}-{end}):\n\n",
+                required=True,
+            )
+        else:
+            builder.add(f"Found {len(results)} matching entries:\n\n", required=True)
+        builder.add(page.build(), required=True)
+        cursor = None
+        if end < len(results):
+            cursor = encode_cursor({
+                "tool": "journal_search", "key": key, "next": end, "args": search_args,
+            })
+        return builder.build(cursor)
+    
+    async def _handle_search_batch(self, args: Dict[str, Any]) -> List[TextContent]:
+        """Handle journal_search_batch tool."""
+        queries = [SearchQuery(**query) for query in args["queries"]]
         
-        response = f"Found {len(results)} matching entries:\n\n"
+        cancel = threading.Event()
         
-        for i, result in enumerate(results, 1):
-            response += f"## Result {i} (Score: {result.combined_score:.3f})\n"
-            response += f"**Section:** {result.section_path}\n"
-            response += f"**Work Context:** {result.entry.work_context}\n"
-            response += f"**Timestamp:** {result.entry.timestamp.isoformat()}\n"
-            response += f"**Scores:** Context={result.work_context_score:.3f}, Content={result.content_score:.3f}, Temporal={result.temporal_score:.3f}\n\n"
-            response += f"{result.entry.content}\n\n"
-            response += "---\n\n"
+        def search_batch() -> List[List[SearchResult]]:
+            return self.searcher.search_batch(
+                self.storage.entry_source(), queries,
+                cancel=cancel, generation=self.storage.generation,
+            )
         
-        return [TextContent(type="text", text=response)]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, search_batch
+            )
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
+        
+        # Each query gets an equal share of the budget; run journal_search
+        # on a query for the results that did not fit
+        share = self._budget(args) // max(1, len(queries))
+        parts = []
+        for i, (query, query_results) in enumerate(zip(queries, results), 1):
+            parts.append(f"# Query {i}: {query.work_context} / {query.content}\n\n")
+            if not query_results:
+                parts.append("No matching entries found\n")
+                continue
+            page = ResponseBuilder(share)
+            shown = _add_results(page, query_results, 0, "semantic")
+            parts.append(f"Found {len(query_results)} matching entries:\n\n")
+            parts.append(page.build())
+            if shown < len(query_results):
+                parts.append(
+                    f"*{len(query_results) - shown} more not shown; use journal_search for this query*\n"
+                )
+            parts.append("\n")
+        
+        return [TextContent(type="text", text="".join(parts))]
     
     async def _handle_toc(self, args: Dict[str, Any]) -> List[TextContent]:
         """Handle journal_toc tool."""
-        root_path = args.get("path", "")
+        root_path = args.get("path", "").strip('/')
         max_depth = args.get("max_depth", 3)
-        
-        journal = self.storage.load()
-        
-        if root_path:
-            section = self.storage.get_section(root_path)
-            if section is None:
-                return [TextContent(type="text", text=f"Journal section '{root_path}' not found")]
-            sections = {root_path.split('/')[-1]: section}
-        else:
-            sections = journal.sections
-        
-        response = "# Journal Table of Contents\n\n"
-        response += self._build_toc_tree(sections, 0, max_depth)
+        sort = args.get("sort", "tree")
+        
+        # The root section (if any) and its subtree, each section before its children
+        stats = self._section_stats(root_path)
+        if root_path and not stats:
+            return [TextContent(type="text", text=f"Journal section '{root_path}' not found")]
+        
+        # Aggregates are kept by storage, so no entries are read here
+        root_depth = root_path.count('/') if root_path else 0
+        stats = [s for s in stats if s.path.count('/') - root_depth < max_depth]
+        if sort == "recent":
+            stats = _by_recent_activity(stats)
+        
+        lines = []
+        for section in stats:
+            depth = section.path.count('/') - root_depth
+            name = section.path.rsplit('/', 1)[-1]
+            details = [f"{section.entry_count} entries"]
+            if section.recursive_entry_count != section.entry_count:
+                details.append(f"{section.recursive_entry_count} with subsections")
+            if section.newest_timestamp is not None:
+                details.append(f"latest {section.newest_timestamp.date().isoformat()}")
+            lines.append(f"{'  ' * depth}- **{name}** ({', '.join(details)})\n")
+        
+        response = "# Journal Table of Contents\n\n" + "".join(lines)
         
         return [TextContent(type="text", text=response)]
     
-    def _build_toc_tree(self, sections: Dict[str, Any], current_depth: int, max_depth: int) -> str:
-        """Build a tree representation of journal sections."""
-        if current_depth >= max_depth:
-            return ""
-        
-        result = ""
-        indent = "  " * current_depth
-        
-        for name, section in sections.items():
-            entry_count = len(section.entries) if hasattr(section, 'entries') else 0
-            result += f"{indent}- **{name}** ({entry_count} entries)\n"
-            
-            if hasattr(section, 'subsections') and section.subsections:
-                result += self._build_toc_tree(section.subsections, current_depth + 1, max_depth)
-        
-        return result
-    
     async def _handle_list_entries(self, args: Dict[str, Any]) -> List[TextContent]:
         """Handle journal_list_entries tool."""
-        path = args["path"]
-        limit = args.get("limit", 10)
-        offset = args.get("offset", 0)
-        
-        section = self.storage.get_section(path)
+        if args.get("cursor"):
+            state = decode_cursor(args["cursor"], "journal_list_entries")
+            path = state["path"]
+            section = self._summarize(path)
+            total = 0 if section is None else section.entry_count
+            # Entry numbers count from the oldest, so appends do not shift the page
+            offset = max(0, total - state["next"])
+            limit = state["remaining"]
+        else:
+            path = args["path"]
+            limit = args.get("limit", 10)
+            offset = args.get("offset", 0)
+            section = self._summarize(path)
         if section is None:
             return [TextContent(type="text", text=f"Journal section '{path}' not found")]
         
-        if not section.entries:
+        if not section.entry_count:
             return [TextContent(type="text", text=f"No entries in journal section '{path}'")]
         
         # Get entries with pagination (most recent first)
-        total_entries = len(section.entries)
-        start_idx = max(0, total_entries - offset - limit)
-        end_idx = total_entries - offset
-        
-        if start_idx >= end_idx:
+        total_entries = section.entry_count
+        if offset >= total_entries or limit <= 0:
             return [TextContent(type="text", text="No more entries")]
         
-        entries = section.entries[start_idx:end_idx]
-        entries.reverse()  # Most recent first
-        
-        response = f"# Entries from {path} ({len(entries)} of {total_entries})\n\n"
+        builder = ResponseBuilder(self._budget(args))
+        cursor = self._add_entries(
+            builder, "journal_list_entries", path, total_entries,
+            total_entries - offset, limit, "##", separator="---\n\n",
+            title=lambda shown: f"# Entries from {path} ({shown} of {total_entries})\n\n",
+        )
         
-        for i, entry in enumerate(entries):
-            entry_num = total_entries - offset - i
-            response += f"## Entry {entry_num}\n"
-            response += f"**Work Context:** {entry.work_context}\n"
-            response += f"**Timestamp:** {entry.timestamp.isoformat()}\n\n"
-            response += f"{entry.content}\n\n"
-            response += "---\n\n"
+        return [TextContent(type="text", text=builder.build(cursor))]
+    
+    async def _handle_stats(self, args: Dict[str, Any]) -> List[TextContent]:
+        """Handle journal_stats tool."""
+        searcher = self.searcher
+        response = "# Journal Server Statistics\n\n"
+        response += f"- **Journal generation:** {self.storage.generation}\n"
+        response += f"- **Indexed entries:** {len(searcher.index)} ({int(searcher.index.embedded.sum())} embedded)\n"
+        response += f"- **Archived entries:** {self.archive.total_entries()}\n"
+        response += f"- **Embedding model:** {searcher.model_name} ({'loaded' if searcher.model_loaded else 'not loaded'})\n"
+        for name, value in searcher.counters.items():
+            response += f"- **{name.replace('_', ' ').capitalize()}:** {value}\n"
+        if self.embed_worker is not None:
+            worker = self.embed_worker
+            response += f"- **Embed queue depth:** {worker.pending}\n"
+            response += f"- **Embed lag:** {worker.lag_seconds:.3f}s\n"
+            response += f"- **Entries embedded on write:** {worker.embedded} in {worker.batches} batches\n"
         
         return [TextContent(type="text", text=response)]
     
@@ -337,12 +847,93 @@ class JournalServer:
         """Run the MCP server."""
         from mcp.server.models import InitializationOptions
         
+        start = time.perf_counter()
         async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream, 
-                write_stream, 
-                InitializationOptions(
-                    server_name="journal-server",
-                    server_version="0.1.0"
+            self._record_timing("stdio_ready", start)
+            
+            # Load the model in the background; only journal_search needs it
+            self.searcher.start_loading()
+            if self.embed_worker is not None:
+                self.embed_worker.start()
+            # Archival runs alongside serving so it never delays the handshake
+            archive_task = None
+            if self.archive_after_days is not None:
+                archive_task = asyncio.create_task(self._archive_in_background())
+            
+            try:
+                await self.server.run(
+                    read_stream, 
+                    write_stream, 
+                    InitializationOptions(
+                        server_name="journal-server",
+                        server_version="0.1.0"
+                    )
                 )
-            )
+            finally:
+                if archive_task is not None:
+                    await archive_task
+                if self._background:
+                    await asyncio.wait(self._background)
+                await self.writer.drain()
+                if self.embed_worker is not None:
+                    # Waits for the worker's final save of the embedding cache
+                    await asyncio.get_running_loop().run_in_executor(
+                        self.executor, self.embed_worker.stop
+                    )
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.storage.close()
+
+
+def _by_recent_activity(stats: List[SectionStats]) -> List[SectionStats]:
+    """Reorder tree-ordered stats so siblings with newer entries come first."""
+    children: Dict[str, List[SectionStats]] = {}
+    paths = {s.path for s in stats}
+    roots = []
+    for section in stats:
+        parent = section.path.rsplit('/', 1)[0] if '/' in section.path else None
+        if parent in paths:
+            children.setdefault(parent, []).append(section)
+        else:
+            roots.append(section)
+    
+    def newest_first(sections: List[SectionStats]) -> List[SectionStats]:
+        return sorted(sections, key=lambda s: (
+            s.newest_timestamp is None,
+            -to_epoch_micros(s.newest_timestamp) if s.newest_timestamp else 0,
+        ))
+    
+    ordered: List[SectionStats] = []
+    stack = list(reversed(newest_first(roots)))
+    while stack:
+        section = stack.pop()
+        ordered.append(section)
+        stack.extend(reversed(newest_first(children.get(section.path, []))))
+    return ordered
+
+
+def _add_results(
+    builder: ResponseBuilder, results: List[SearchResult], start: int, mode: str
+) -> int:
+    """Add results from ``start`` as markdown while they fit; returns how many did."""
+    body_limit = entry_bytes_limit(builder.budget)
+    shown = 0
+    for i, result in enumerate(results[start:], start + 1):
+        scores = (
+            f"Context={result.work_context_score:.3f}, Content={result.content_score:.3f}, "
+            f"Temporal={result.temporal_score:.3f}"
+        )
+        if mode != "semantic":
+            scores += f", Lexical={result.lexical_score:.3f}"
+        text = "".join([
+            f"## Result {i} (Score: {result.combined_score:.3f})\n",
+            f"**Section:** {result.section_path}\n",
+            f"**Work Context:** {result.entry.work_context}\n",
+            f"**Timestamp:** {result.entry.timestamp.isoformat()}\n",
+            f"**Scores:** {scores}\n\n",
+            f"{truncate_text(result.entry.content, body_limit)}\n\n",
+            "---\n\n",
+        ])
+        if not builder.add(text, required=not shown):
+            break
+        shown += 1
+    return shown
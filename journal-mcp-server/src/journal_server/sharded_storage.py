@@ -0,0 +1,402 @@
+"""Section-sharded storage backend for the journal server."""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
+from urllib.parse import quote
+
+from .locking import file_stamp
+from .storage import Entries, EntryWrite, JsonStorage, iter_sections, path_key
+from .types import EntryList, Journal, JournalSection, SectionStats
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def shard_dir_for(data_file: Path) -> Path:
+    """Directory holding the shards and manifest for a journal data file."""
+    return data_file.with_suffix('.shards')
+
+
+def _write_json(target: Path, data: Any, fsync: bool) -> int:
+    """Atomically replace ``target`` with ``data``; returns the bytes written."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(data, indent=2, default=str)
+
+    # Write to temporary file first, then rename for atomicity
+    temp_file = target.with_suffix(target.suffix + '.tmp')
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        temp_file.replace(target)
+    except Exception:
+        if temp_file.exists():
+            temp_file.unlink()
+        raise
+    return len(text.encode('utf-8'))
+
+
+class ShardedStorage(JsonStorage):
+    """One JSON file per top-level section, loaded on demand.
+
+    A manifest records every section path with its entry count, entry
+    bytes, newest entry and last-modified time, so the table of contents
+    (and its subtree aggregates) never opens a shard.
+    Reading a section loads only its top-level shard; loaded shards are kept
+    in LRU order and evicted once their on-disk size passes
+    ``memory_budget_bytes``. A write rewrites the touched shards and the
+    manifest, each with a temp-file rename.
+
+    Search reads the storage as an ``EntrySource``: it scans only the
+    shards whose manifest counts changed since it last looked, one at a
+    time, so the budget holds across searches too. ``load()`` assembles the
+    whole journal for callers that need it, without pinning the shards.
+
+    An existing single-file journal is split into shards on first use.
+
+    Every shard record in the manifest carries a version that each rewrite
+    bumps. Writes happen under the journal lock after a ``refresh``, which
+    re-reads a manifest changed by another process and drops only the
+    shards whose version moved.
+    """
+
+    def __init__(
+        self,
+        data_file: Path,
+        memory_budget_bytes: int = 64 * 1024 * 1024,
+        fsync: str = "batch",
+    ) -> None:
+        super().__init__(data_file, fsync)
+        self.shard_dir = shard_dir_for(data_file)
+        self.manifest_file = self.shard_dir / 'manifest.json'
+        self.memory_budget_bytes = memory_budget_bytes
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._shards: "OrderedDict[str, JournalSection]" = OrderedDict()
+        self._resident_bytes = 0
+        # Shards changed in memory but not yet written; never evicted
+        self._dirty: Set[str] = set()
+
+    @property
+    def resident_shards(self) -> List[str]:
+        """Names of the loaded shards, least recently used first."""
+        return list(self._shards)
+
+    def load(self) -> Journal:
+        """Assemble the full journal; shards stay subject to eviction."""
+        with self._lock:
+            sections = {}
+            for name in list(self._load_manifest()["shards"]):
+                section = self._load_shard(name)
+                assert section is not None
+                sections[name] = section
+                self._evict(keep=(name,))
+            return Journal(sections=sections)
+
+    def entry_source(self) -> Entries:
+        """The storage itself: search reads one shard at a time."""
+        return self
+
+    def scan_sections(
+        self, known: Mapping[str, Tuple[int, Optional[int]]]
+    ) -> Iterator[Tuple[str, EntryList]]:
+        """Entry columns of the shards whose manifest counts differ from ``known``.
+
+        ``known`` maps section paths to the (entry count, last timestamp) a
+        reader has seen. Shards are read one at a time and may be evicted
+        before the next is read.
+        """
+        with self._lock:
+            self._load_manifest()
+            names: List[str] = []
+            for path in self._paths:
+                aggregate = self._aggregates.get(path)
+                seen = known.get(path, (0, None))
+                top = path.split('/')[0]
+                if top not in names and (
+                    aggregate is None
+                    or seen != (aggregate.entry_count, aggregate.newest_micros)
+                ):
+                    names.append(top)
+        for name in names:
+            with self._lock:
+                section = self._load_shard(name)
+                if section is None:
+                    continue
+                sections = [
+                    (path, subsection.entries)
+                    for path, subsection in iter_sections(Journal(sections={name: section}))
+                ]
+                self._evict(keep=(name,))
+            yield from sections
+
+    def section_entries(self, path: str) -> Optional[EntryList]:
+        """Entry columns of one section, loading its shard if needed."""
+        section = self.get_section(path)
+        return None if section is None else section.entries
+
+    def refresh(self) -> bool:
+        """Reload the shards other processes rewrote since the last look."""
+        with self._lock:
+            if self._manifest is None:
+                return False
+            stamp = file_stamp(self.manifest_file)
+            if stamp == self._stamp:
+                return False
+            old = self._manifest["shards"]
+            self._manifest = None
+            manifest = self._load_manifest()
+
+            changed = [
+                name for name in self._shards
+                if manifest["shards"].get(name) != old.get(name)
+            ]
+            for name in changed:
+                section = self._shards.pop(name)
+                self._resident_bytes -= old[name]["bytes"]
+                for path, _ in iter_sections(Journal(sections={name: section})):
+                    self._sections.pop(path, None)
+            self.generation += 1
+            return True
+
+    def save(self, journal: Journal) -> None:
+        """Rewrite every shard and the manifest."""
+        with self._file_lock, self._lock:
+            manifest = self._load_manifest()
+            stale = [
+                manifest["shards"][name]["file"]
+                for name in set(manifest["shards"]) - set(journal.sections)
+            ]
+
+            self._shards = OrderedDict(journal.sections)
+            self._reindex(journal)
+            self._resident_bytes = 0
+            manifest["sections"] = {}
+            manifest["shards"] = {}
+            self._commit(list(journal.sections), self._paths)
+
+            for file in stale:
+                self._remove_shard_file(file)
+
+    def get_section(self, path: str) -> Optional[JournalSection]:
+        """Get a section, loading only its top-level shard."""
+        with self._lock:
+            top = path.split('/')[0]
+            if self._load_shard(top) is None:
+                return None
+            self._evict(keep=(top,))
+            return self._sections.get(path)
+
+    def section_paths(self, prefix: str = "") -> List[str]:
+        """Section paths in tree order, answered from the manifest."""
+        with self._lock:
+            self._load_manifest()
+            return self._paths_under(prefix)
+
+    def section_stats(self, prefix: str = "") -> List[SectionStats]:
+        """Aggregates built from the manifest; ``last_modified`` is the last write."""
+        with self._lock:
+            sections = self._load_manifest()["sections"]
+            stats = []
+            for path in self._paths_under(prefix):
+                section_stats = self._aggregates.stats(path)
+                last_modified = sections[path]["last_modified"]
+                if last_modified is not None:
+                    section_stats.last_modified = datetime.fromisoformat(last_modified)
+                stats.append(section_stats)
+            return stats
+
+    def create_section(self, path: str) -> JournalSection:
+        """Create a new journal section at the given path."""
+        with self._file_lock, self._lock:
+            self.refresh()
+            self._dirty.add(path.split('/')[0])
+            section = self._ensure_section(path)
+            self._commit([path.split('/')[0]], [path])
+            return section
+
+    def append_entries(self, writes: Sequence[EntryWrite]) -> None:
+        """Apply writes, then rewrite only the shards they touched."""
+        with self._file_lock, self._lock:
+            self.refresh()
+            touched: List[str] = []
+            for write in writes:
+                top = write.path.split('/')[0]
+                if top not in touched:
+                    touched.append(top)
+                    self._dirty.add(top)
+                self._apply_write(write)
+            self._commit(touched, [write.path for write in writes])
+
+    def _commit(self, names: List[str], modified: Sequence[str]) -> None:
+        """Write the named shards, stamp ``modified`` paths, then the manifest."""
+        for name in names:
+            self._write_shard(name)
+        sections = self._manifest_sections()
+        now = datetime.now(timezone.utc).isoformat()
+        for path in modified:
+            sections[path]["last_modified"] = now
+        self._write_manifest()
+        self._dirty.difference_update(names)
+        self.generation += 1
+        self._evict()
+
+    def _ensure_section(self, path: str) -> JournalSection:
+        """Return the section at path, creating it (and parents) in memory."""
+        section = self.get_section(path)
+        if section is not None:
+            return section
+
+        parts = path.split('/')
+        parent = self._shards.get(parts[0])
+        if parent is None:
+            parent = JournalSection(path=parts[0])
+            self._shards[parts[0]] = parent
+            self._register(parts[0], parent)
+
+        current_path = parts[0]
+        for part in parts[1:]:
+            current_path = f"{current_path}/{part}"
+            section = self._sections.get(current_path)
+            if section is None:
+                section = JournalSection(path=current_path)
+                parent.subsections[part] = section
+                self._register(current_path, section)
+            parent = section
+        return parent
+
+    def _register(self, path: str, section: JournalSection) -> None:
+        if path not in self._manifest_sections():
+            super()._register(path, section)
+        else:
+            self._sections[path] = section
+
+    def _manifest_sections(self) -> Dict[str, Any]:
+        return cast(Dict[str, Any], self._load_manifest()["sections"])
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Read the manifest, splitting a single-file journal on first use."""
+        if self._manifest is not None:
+            return self._manifest
+
+        self._stamp = file_stamp(self.manifest_file)
+        if self._stamp is not None:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                self._manifest = json.load(f)
+            assert self._manifest is not None
+            paths = sorted(self._manifest["sections"], key=path_key)
+            self._paths = paths
+            self._keys = [path_key(path) for path in paths]
+            # Manifests written before sizes were recorded count them as 0
+            self._aggregates.rebuild(
+                (path, record["entry_count"], record.get("bytes", 0), record.get("newest_us"))
+                for path, record in self._manifest["sections"].items()
+            )
+        else:
+            self._manifest = {"version": MANIFEST_VERSION, "sections": {}, "shards": {}}
+            if self.data_file.exists():
+                logger.info("Splitting %s into shards in %s", self.data_file, self.shard_dir)
+                self.save(JsonStorage(self.data_file).load())
+                # Start from an empty cache like any other open
+                self._shards.clear()
+                self._sections = {}
+                self._resident_bytes = 0
+        return self._manifest
+
+    def _shard_file(self, name: str) -> Path:
+        # Shards sit apart from the manifest, so no section name can clash with it
+        return self.shard_dir / 'shards' / f"{quote(name, safe='')}.json"
+
+    def _remove_shard_file(self, file: str) -> None:
+        target = self.shard_dir / file
+        # A section named "manifest" used to share the manifest's file
+        if target != self.manifest_file:
+            target.unlink(missing_ok=True)
+
+    def _load_shard(self, name: str) -> Optional[JournalSection]:
+        """Return a top-level section, reading its shard if needed."""
+        section = self._shards.get(name)
+        if section is not None:
+            self._shards.move_to_end(name)
+            return section
+
+        info = self._load_manifest()["shards"].get(name)
+        if info is None:
+            return None
+        # Older manifests name shards beside the manifest; the recorded file wins
+        with open(self.shard_dir / info["file"], 'r', encoding='utf-8') as f:
+            section = JournalSection.model_validate(json.load(f))
+
+        self._shards[name] = section
+        self._resident_bytes += info["bytes"]
+        sections = self._manifest_sections()
+        for path, subsection in iter_sections(Journal(sections={name: section})):
+            self._sections[path] = subsection
+            # The shard is authoritative if a crash left the manifest behind
+            if path in sections:
+                sections[path]["entry_count"] = len(subsection.entries)
+        return section
+
+    def _write_shard(self, name: str) -> None:
+        """Write one shard and refresh its manifest records."""
+        section = self._shards[name]
+        manifest = self._load_manifest()
+        size = _write_json(
+            self._shard_file(name), section.model_dump(), fsync=self.fsync != "os"
+        )
+        old = manifest["shards"].get(name)
+        file = self._shard_file(name).relative_to(self.shard_dir).as_posix()
+        if old is not None:
+            self._resident_bytes -= old["bytes"]
+            if old["file"] != file:
+                self._remove_shard_file(old["file"])
+        manifest["shards"][name] = {
+            "file": file,
+            "bytes": size,
+            "version": (old or {}).get("version", 0) + 1,
+        }
+        self._resident_bytes += size
+
+        for path, subsection in iter_sections(Journal(sections={name: section})):
+            record = manifest["sections"].setdefault(path, {"last_modified": None})
+            record["entry_count"] = len(subsection.entries)
+            aggregate = self._aggregates.get(path)
+            if aggregate is not None:
+                record["bytes"] = aggregate.bytes
+                record["newest_us"] = aggregate.newest_micros
+
+    def _write_manifest(self) -> None:
+        assert self._manifest is not None
+        _write_json(self.manifest_file, self._manifest, fsync=self.fsync != "os")
+        self._stamp = file_stamp(self.manifest_file)
+
+    def _evict(self, keep: Sequence[str] = ()) -> None:
+        """Drop least recently used shards until under the memory budget."""
+        shards = self._load_manifest()["shards"]
+        for name in list(self._shards):
+            if self._resident_bytes <= self.memory_budget_bytes:
+                break
+            if name in keep or name in self._dirty:
+                continue
+            section = self._shards.pop(name)
+            self._resident_bytes -= shards[name]["bytes"]
+            for path, _ in iter_sections(Journal(sections={name: section})):
+                self._sections.pop(path, None)
@@ -0,0 +1,555 @@
+"""SQLite storage backend for the journal server."""
+
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .columnar import MICROSECONDS, to_epoch_micros
+from .embeddings import EmbeddingCache
+from .index import to_epoch
+from .storage import (
+    EntrySink,
+    EntryWrite,
+    JsonStorage,
+    count_older,
+    iter_sections,
+    path_key,
+)
+from .types import Journal, JournalEntry, JournalSection, SectionStats, SectionSummary
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent_id INTEGER REFERENCES sections(id),
+    name TEXT NOT NULL,
+    overview TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS sections_parent ON sections(parent_id);
+
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    section_id INTEGER NOT NULL REFERENCES sections(id),
+    position INTEGER NOT NULL,
+    work_context TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    epoch REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS entries_section ON entries(section_id, position);
+CREATE INDEX IF NOT EXISTS entries_epoch ON entries(epoch);
+
+-- Counters other connections poll; 'removals' goes up with every commit
+-- that deletes entries
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('removals', 0);
+"""
+
+EMBEDDINGS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    vector BLOB NOT NULL
+);
+"""
+
+
+def database_file_for(data_file: Path) -> Path:
+    """SQLite database path for a journal data file."""
+    return data_file.with_suffix(".db")
+
+
+def embeddings_file_for(data_file: Path) -> Path:
+    """SQLite database of cached embeddings for a journal data file.
+
+    Separate from the journal database: every commit there bumps its
+    ``data_version``, which readers take to mean the journal changed.
+    """
+    return data_file.with_suffix(".embeddings.db")
+
+
+def _subtree_bounds(path: str) -> Tuple[str, str]:
+    """Half-open range of materialized paths strictly below ``path``."""
+    # '0' sorts immediately after '/', so this covers every "path/..." value
+    return f"{path}/", f"{path}0"
+
+
+class SqliteStorage(JsonStorage):
+    """SQLite-backed journal storage.
+
+    Sections are rows with a materialized path and entries are rows indexed
+    on (section, position) and on timestamp (embeddings are BLOBs in a
+    database of their own, see ``SqliteEmbeddingCache``). Reading a
+    section or paging its entries only touches that section's rows; ``load``
+    still assembles the whole journal for search and keeps it up to date as
+    entries are appended.
+
+    An existing JSON journal at ``data_file`` is imported into an empty
+    database on first use. With the ``always`` fsync policy every entry is
+    its own transaction; ``batch`` commits a group of writes at once and
+    ``os`` turns off SQLite's syncing.
+
+    SQLite's own locking makes the database safe to share between
+    processes. Commits by other connections show up as a new
+    ``data_version``; ``refresh`` then reads only the entries added since
+    (by row id) into the assembled journal, and reassembles it only when
+    the ``removals`` counter shows entries were deleted.
+    """
+
+    def __init__(self, data_file: Path, fsync: str = "batch") -> None:
+        super().__init__(data_file, fsync)
+        self.database_file = database_file_for(data_file)
+        self.database_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.database_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "PRAGMA synchronous=" + ("OFF" if fsync == "os" else "FULL")
+        )
+        self._conn.executescript(SCHEMA)
+        self._import_json()
+        self._data_version = self._read_data_version()
+        # Entries with larger ids are not yet in the assembled journal
+        self._max_entry_id = 0
+        # The removals counter the assembled journal reflects
+        self._removals = 0
+        # data_version the section aggregates were read at; None if stale
+        self._aggregates_version: Optional[int] = None
+
+    def load(self) -> Journal:
+        """Assemble the whole journal from the database."""
+        with self._lock:
+            if self._journal is None:
+                self._data_version = self._read_data_version()
+                self._removals = self._read_removals()
+                (self._max_entry_id,) = self._conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM entries"
+                ).fetchone()
+                sections = self._read_sections("SELECT id, path, overview FROM sections", ())
+                self._journal = Journal(sections={
+                    path: section for path, section in sections.items() if "/" not in path
+                })
+                self._reindex(self._journal)
+            return self._journal
+
+    def refresh(self) -> bool:
+        """Pick up entries and overviews committed by other processes."""
+        with self._lock:
+            if not self._catch_up():
+                return False
+            self.generation += 1
+            return True
+
+    def _read_data_version(self) -> int:
+        (version,) = self._conn.execute("PRAGMA data_version").fetchone()
+        return int(version)
+
+    def _read_removals(self) -> int:
+        (removals,) = self._conn.execute(
+            "SELECT value FROM counters WHERE name = 'removals'"
+        ).fetchone()
+        return int(removals)
+
+    def _count_removal(self) -> None:
+        """Mark the current transaction as deleting entries; call inside it."""
+        self._conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'removals'")
+        self._removals = self._read_removals()
+
+    def _catch_up(self) -> bool:
+        """Apply rows other connections committed to the assembled journal."""
+        version = self._read_data_version()
+        if version == self._data_version:
+            return False
+        self._data_version = version
+        # Reads without an assembled journal go to the database anyway
+        if self._journal is None:
+            return False
+
+        # Other writers may only have rewritten rows; only real changes count
+        changed = False
+        for path, overview in self._conn.execute(
+            "SELECT path, overview FROM sections"
+        ).fetchall():
+            section = self._sections.get(path)
+            if section is None or section.overview != overview:
+                self._ensure_section(path).overview = overview
+                changed = True
+        for entry_id, path, work_context, content, timestamp in self._conn.execute(
+            "SELECT e.id, s.path, e.work_context, e.content, e.timestamp FROM entries e"
+            " JOIN sections s ON s.id = e.section_id WHERE e.id > ? ORDER BY e.id",
+            (self._max_entry_id,),
+        ).fetchall():
+            entry = _entry_from_row((work_context, content, timestamp))
+            self._ensure_section(path).entries.append(entry)
+            self._aggregates.add_entry(path, entry)
+            self._max_entry_id = entry_id
+            changed = True
+
+        # Another process deleted entries (see save and move_entries_before)
+        removals = self._read_removals()
+        if removals != self._removals:
+            self._removals = removals
+            sections = self._read_sections("SELECT id, path, overview FROM sections", ())
+            self._absorb(Journal(sections={
+                path: section for path, section in sections.items() if "/" not in path
+            }))
+            changed = True
+        return changed
+
+    def save(self, journal: Journal) -> None:
+        """Replace the stored journal with ``journal``."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM sections")
+            self._count_removal()
+            stack: List[Tuple[Optional[int], str, JournalSection]] = [
+                (None, path, section) for path, section in journal.sections.items()
+            ]
+            while stack:
+                parent_id, path, section = stack.pop()
+                section_id = self._insert_section(path, parent_id, section.overview)
+                self._insert_entries(section_id, 0, section.entries)
+                for name, subsection in section.subsections.items():
+                    stack.append((section_id, f"{path}/{name}", subsection))
+            self._journal = journal
+            self._aggregates_version = None
+            self.generation += 1
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def get_section(self, path: str) -> Optional[JournalSection]:
+        """Get a section and its subtree without touching other sections."""
+        with self._lock:
+            if self._journal is not None:
+                return super().get_section(path)
+            low, high = _subtree_bounds(path)
+            sections = self._read_sections(
+                "SELECT id, path, overview FROM sections"
+                " WHERE path = ? OR (path >= ? AND path < ?)",
+                (path, low, high),
+            )
+            return sections.get(path)
+
+    def section_paths(self, prefix: str = "") -> List[str]:
+        """Paths at and below ``prefix`` in tree order, from the database."""
+        with self._lock:
+            if self._journal is not None:
+                return super().section_paths(prefix)
+            prefix = prefix.strip('/')
+            if prefix:
+                low, high = _subtree_bounds(prefix)
+                rows = self._conn.execute(
+                    "SELECT path FROM sections WHERE path = ? OR (path >= ? AND path < ?)",
+                    (prefix, low, high),
+                )
+            else:
+                rows = self._conn.execute("SELECT path FROM sections")
+            return sorted((path for (path,) in rows), key=path_key)
+
+    def section_stats(self, prefix: str = "") -> List[SectionStats]:
+        """Statistics from the in-memory aggregates.
+        
+        The aggregates are read from the database once, kept current by this
+        connection's writes and re-read only after other connections commit.
+        """
+        with self._lock:
+            version = self._read_data_version()
+            if version != self._aggregates_version:
+                self._aggregates.rebuild(
+                    (path, count, size, None if newest is None else round(newest * MICROSECONDS))
+                    for path, count, size, newest in self._conn.execute(
+                        "SELECT s.path, COUNT(e.id),"
+                        " COALESCE(SUM(LENGTH(CAST(e.work_context AS BLOB))"
+                        " + LENGTH(CAST(e.content AS BLOB))), 0), MAX(e.epoch)"
+                        " FROM sections s LEFT JOIN entries e ON e.section_id = s.id"
+                        " GROUP BY s.id"
+                    )
+                )
+                self._aggregates_version = version
+            return [self._aggregates.stats(path) for path in self.section_paths(prefix)]
+
+    def summarize_section(self, path: str) -> Optional[SectionSummary]:
+        """Overview, entry count and subsection names from indexed queries."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, overview FROM sections WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None:
+                return None
+            section_id, overview = row
+            (entry_count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE section_id = ?", (section_id,)
+            ).fetchone()
+            subsections = [
+                name for (name,) in self._conn.execute(
+                    "SELECT name FROM sections WHERE parent_id = ? ORDER BY id",
+                    (section_id,),
+                )
+            ]
+        return SectionSummary(
+            path=path, overview=overview, entry_count=entry_count, subsections=subsections
+        )
+
+    def list_entries(self, path: str, limit: int, offset: int = 0) -> List[JournalEntry]:
+        """Page through a section's entries, most recent first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.work_context, e.content, e.timestamp FROM entries e"
+                " JOIN sections s ON s.id = e.section_id"
+                " WHERE s.path = ? ORDER BY e.position DESC LIMIT ? OFFSET ?",
+                (path, max(0, limit), max(0, offset)),
+            ).fetchall()
+        return [_entry_from_row(row) for row in rows]
+
+    def create_section(self, path: str) -> JournalSection:
+        """Create a new journal section at the given path."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._catch_up()
+            self._ensure_section_row(path)
+            self._aggregates.add_section(path)
+            self.generation += 1
+            if self._journal is not None:
+                return self._ensure_section(path)
+        section = self.get_section(path)
+        assert section is not None
+        return section
+
+    def append_entries(self, writes: Sequence[EntryWrite]) -> None:
+        """Insert entries (and optional overviews) transactionally."""
+        if self.fsync == "always":
+            groups = [[write] for write in writes]
+        else:
+            groups = [list(writes)]
+
+        with self._lock:
+            for group in groups:
+                with self._conn:
+                    # Take the write lock before reading positions, and catch
+                    # up first so row ids stay in step with the journal
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    self._catch_up()
+                    for write in group:
+                        self._insert_write(write)
+                    # Keep the assembled journal in step for search
+                    if self._journal is not None:
+                        for write in group:
+                            self._apply_write(write)
+                        (self._max_entry_id,) = self._conn.execute(
+                            "SELECT MAX(id) FROM entries"
+                        ).fetchone()
+                    else:
+                        for write in group:
+                            self._aggregates.add_entry(write.path, write.entry)
+            self.generation += 1
+
+    def move_entries_before(self, cutoff: datetime, sink: EntrySink) -> int:
+        """Delete every section's entries older than ``cutoff`` in one transaction."""
+        with self._lock:
+            journal = self.load()
+            moved = 0
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if self._catch_up():
+                    self.generation += 1
+                for path, section in list(iter_sections(journal)):
+                    count = count_older(section.entries, cutoff)
+                    if not count:
+                        continue
+                    sink(path, section.entries[:count])
+                    # Positions are left as they are; new entries still go last
+                    self._conn.execute(
+                        "DELETE FROM entries WHERE id IN ("
+                        " SELECT e.id FROM entries e JOIN sections s ON s.id = e.section_id"
+                        " WHERE s.path = ? ORDER BY e.position LIMIT ?)",
+                        (path, count),
+                    )
+                    section.entries = section.entries.tail(count)
+                    moved += count
+                if moved:
+                    self._count_removal()
+            if moved:
+                self._data_version = self._read_data_version()
+                self._aggregates_version = None
+                self.generation += 1
+            return moved
+
+    def _insert_write(self, write: EntryWrite) -> None:
+        section_id = self._ensure_section_row(write.path)
+        (position,) = self._conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM entries WHERE section_id = ?",
+            (section_id,),
+        ).fetchone()
+        self._insert_entries(section_id, position, [write.entry])
+        if write.overview is not None:
+            self._conn.execute(
+                "UPDATE sections SET overview = ? WHERE id = ?",
+                (write.overview, section_id),
+            )
+
+    def _import_json(self) -> None:
+        """Import a JSON journal into an empty database."""
+        if self.data_file == self.database_file or not self.data_file.exists():
+            return
+        (sections,) = self._conn.execute("SELECT COUNT(*) FROM sections").fetchone()
+        if sections:
+            return
+        self.save(JsonStorage(self.data_file).load())
+        self._journal = None
+
+    def _ensure_section_row(self, path: str) -> int:
+        """Return the id for ``path``, inserting it and its parents as needed."""
+        parent_id: Optional[int] = None
+        current_path = ""
+        for part in path.split('/'):
+            current_path = f"{current_path}/{part}" if current_path else part
+            row = self._conn.execute(
+                "SELECT id FROM sections WHERE path = ?", (current_path,)
+            ).fetchone()
+            if row is None:
+                parent_id = self._insert_section(current_path, parent_id, "")
+            else:
+                parent_id = row[0]
+        assert parent_id is not None
+        return parent_id
+
+    def _insert_section(self, path: str, parent_id: Optional[int], overview: str) -> int:
+        cursor = self._conn.execute(
+            "INSERT INTO sections (path, parent_id, name, overview) VALUES (?, ?, ?, ?)",
+            (path, parent_id, path.rsplit('/', 1)[-1], overview),
+        )
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def _insert_entries(
+        self, section_id: int, first_position: int, entries: Sequence[JournalEntry]
+    ) -> None:
+        self._conn.executemany(
+            "INSERT INTO entries"
+            " (section_id, position, work_context, content, timestamp, epoch)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    section_id,
+                    first_position + i,
+                    entry.work_context,
+                    entry.content,
+                    entry.timestamp.isoformat(),
+                    to_epoch(entry.timestamp),
+                )
+                for i, entry in enumerate(entries)
+            ],
+        )
+
+    def _read_sections(
+        self, query: str, params: Tuple[str, ...]
+    ) -> Dict[str, JournalSection]:
+        """Build sections (with entries) for the rows selected by ``query``.
+
+        Returns every selected section by path, with subsections attached to
+        their parents when both were selected.
+        """
+        sections: Dict[str, JournalSection] = {}
+        by_id: Dict[int, JournalSection] = {}
+        for section_id, path, overview in self._conn.execute(
+            query + " ORDER BY id", params
+        ):
+            section = JournalSection(path=path, overview=overview)
+            sections[path] = section
+            by_id[section_id] = section
+            parent_path, _, name = path.rpartition('/')
+            if parent_path in sections:
+                sections[parent_path].subsections[name] = section
+
+        for chunk in _chunks(list(by_id), 500):
+            placeholders = ",".join("?" * len(chunk))
+            for section_id, work_context, content, timestamp in self._conn.execute(
+                "SELECT section_id, work_context, content, timestamp FROM entries"
+                f" WHERE section_id IN ({placeholders}) ORDER BY section_id, position",
+                chunk,
+            ):
+                by_id[section_id].entries.append_row(
+                    work_context, content, to_epoch_micros(datetime.fromisoformat(timestamp))
+                )
+        return sections
+
+
+class SqliteEmbeddingCache(EmbeddingCache):
+    """Embedding cache stored as BLOBs in a SQLite database.
+
+    One connection is kept open and shared by the threads using the cache.
+    """
+
+    def __init__(self, model_name: str, database_file: Path) -> None:
+        self.database_file = database_file
+        self._new_keys: List[str] = []
+        self._max_rowid = 0
+        database_file.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(database_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(EMBEDDINGS_SCHEMA)
+        self._conn_lock = threading.Lock()
+        super().__init__(model_name, database_file)
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        super().put(text, vector)
+        self._new_keys.append(self.key(text))
+
+    def load(self) -> None:
+        """Load this model's embeddings from the database."""
+        self._vectors = {}
+        self._dirty = False
+        self._max_rowid = 0
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Load embeddings inserted (by any process) since the last look."""
+        found = False
+        with self._conn_lock:
+            for rowid, key, vector in self._conn.execute(
+                "SELECT rowid, key, vector FROM embeddings"
+                " WHERE model = ? AND rowid > ? ORDER BY rowid",
+                (self.model_name, self._max_rowid),
+            ):
+                self._vectors.setdefault(key, np.frombuffer(vector, dtype=np.float32))
+                self._max_rowid = rowid
+                found = True
+        return found
+
+    def save(self) -> None:
+        """Insert embeddings added since the last save."""
+        if not self._new_keys:
+            return
+        keys, self._new_keys = self._new_keys, []
+        with self._conn_lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                [
+                    (key, self.model_name, self._vectors[key].tobytes())
+                    for key in dict.fromkeys(keys)
+                ],
+            )
+        self._dirty = False
+
+
+def _entry_from_row(row: Tuple[str, str, str]) -> JournalEntry:
+    work_context, content, timestamp = row
+    return JournalEntry(
+        work_context=work_context,
+        content=content,
+        timestamp=datetime.fromisoformat(timestamp),
+    )
+
+
+def _chunks(items: List[int], size: int) -> Iterator[List[int]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
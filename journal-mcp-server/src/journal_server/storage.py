@@ -1,48 +1,252 @@
 """JSON storage backend for the journal server."""
 
 import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from .types import Journal, JournalSection
+from .aggregates import SectionAggregates, SectionTotals
+from .columnar import to_epoch_micros
+from .locking import FileLock, FileStamp, file_stamp, lock_file_for
+from .types import (
+    EntryList,
+    Journal,
+    JournalEntry,
+    JournalSection,
+    SectionStats,
+    SectionSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+# When writes are forced to stable storage:
+#   always - after every record
+#   batch  - once per commit (a commit may hold many records)
+#   os     - never explicitly; the OS flushes page cache on its own schedule
+FSYNC_POLICIES = ("always", "batch", "os")
+
+
+def iter_sections(journal: Journal) -> Iterator[Tuple[str, JournalSection]]:
+    """Yield (path, section) for every section, depth first.
+    
+    Each dict is copied before it is walked, so sections created concurrently
+    by another thread do not break the iteration.
+    """
+    stack = list(reversed(list(journal.sections.items())))
+    while stack:
+        path, section = stack.pop()
+        yield path, section
+        for name, subsection in reversed(list(section.subsections.items())):
+            stack.append((f"{path}/{name}", subsection))
+
+
+def path_key(path: str) -> Tuple[str, ...]:
+    """Sort key placing every section directly before its subtree."""
+    return tuple(path.split('/'))
+
+
+def count_older(entries: EntryList, cutoff: datetime) -> int:
+    """Length of the leading run of ``entries`` timestamped before ``cutoff``."""
+    return entries.count_before(to_epoch_micros(cutoff))
+
+
+# Receives a section path and the entries being moved out of it, oldest first
+EntrySink = Callable[[str, Sequence[JournalEntry]], None]
+
+
+class EntrySource(Protocol):
+    """Where the index reads entries from, by section path.
+
+    ``ShardedStorage`` is one, reading a shard at a time so its memory
+    budget holds; an in-memory ``Journal`` is read through the index's
+    ``JournalEntries``.
+    """
+
+    def section_paths(self) -> List[str]: ...
+
+    def scan_sections(
+        self, known: Mapping[str, Tuple[int, Optional[int]]]
+    ) -> Iterable[Tuple[str, EntryList]]:
+        """Sections whose (entry count, last timestamp) may differ from ``known``."""
+        ...
+
+    def section_entries(self, path: str) -> Optional[EntryList]: ...
+
+
+# A loaded journal, or a storage that serves entries section by section
+Entries = Union[Journal, EntrySource]
+
+
+class EntryWrite(NamedTuple):
+    """A journal entry to add, with an optional new section overview."""
+    
+    path: str
+    entry: JournalEntry
+    overview: Optional[str] = None
 
 
 class JsonStorage:
-    """JSON file-based storage for journal data."""
+    """JSON file-based storage for journal data.
+    
+    Every commit rewrites the whole file, so the ``always`` and ``batch``
+    fsync policies behave the same here.
+    
+    Alongside the nested tree, sections are indexed by full path for
+    constant-time lookup, and the paths are kept in tree order so that a
+    subtree is one contiguous slice. Per-section aggregates (see
+    ``SectionAggregates``) are updated as entries are written, so
+    ``section_stats`` never walks entries.
     
-    def __init__(self, data_file: Path) -> None:
+    Several processes may share a data file: commits take an advisory lock
+    on ``<data-file>.lock`` and first pick up what other processes wrote
+    (see ``refresh``), so no process overwrites another's entries. Within
+    the process, the in-memory journal only changes under ``lock``.
+    """
+    
+    def __init__(self, data_file: Path, fsync: str = "batch") -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
         self.data_file = data_file
+        self.fsync = fsync
         self._journal: Optional[Journal] = None
+        self._sections: Dict[str, JournalSection] = {}
+        self._keys: List[Tuple[str, ...]] = []
+        self._paths: List[str] = []
+        self._aggregates = SectionAggregates()
+        # Bumped by every commit (and every change picked up from another
+        # process), so readers can cache results between writes
+        self.generation = 0
+        self._file_lock = FileLock(lock_file_for(data_file))
+        # Held while the in-memory journal changes; see ``lock``
+        self._lock = threading.RLock()
+        # The data file as last read or written by this process
+        self._stamp: Optional[FileStamp] = None
+    
+    @property
+    def lock(self) -> threading.RLock:
+        """Lock to hold while iterating the loaded journal from another thread."""
+        return self._lock
     
     def load(self) -> Journal:
         """Load journal from JSON file."""
         if self._journal is not None:
             return self._journal
-            
-        if self.data_file.exists():
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self._journal = Journal.model_validate(data)
-            except (json.JSONDecodeError, ValueError) as e:
-                raise ValueError(f"Failed to load journal from {self.data_file}: {e}")
-        else:
-            self._journal = Journal()
-            
+        
+        self._stamp = file_stamp(self.data_file)
+        self._journal = self._read_journal()
+        self._reindex(self._journal)
         return self._journal
     
+    def entry_source(self) -> Entries:
+        """What the search index reads entries from: the loaded journal."""
+        return self.load()
+    
+    def refresh(self) -> bool:
+        """Pick up commits other processes made since this one last looked.
+        
+        Costs one ``stat`` when nothing changed. The loaded journal object is
+        kept and its sections are swapped for the new ones, so the search
+        index (which tracks entry counts per section) only adds the entries
+        appended elsewhere. Returns whether anything changed.
+        """
+        if self._journal is None:
+            return False
+        stamp = file_stamp(self.data_file)
+        if stamp == self._stamp:
+            return False
+        fresh = self._read_journal()
+        with self._lock:
+            self._stamp = stamp
+            self._absorb(fresh)
+            self.generation += 1
+        return True
+    
     def save(self, journal: Journal) -> None:
         """Save journal to JSON file."""
-        self._journal = journal
+        with self._file_lock, self._lock:
+            if journal is not self._journal:
+                self._reindex(journal)
+            self._journal = journal
+            self._write_snapshot(self._to_data(journal), fsync=self.fsync != "os")
+            self._stamp = file_stamp(self.data_file)
+            self.generation += 1
+    
+    def _read_journal(self) -> Journal:
+        """Parse the data file (an empty journal if there is none)."""
+        if not self.data_file.exists():
+            return Journal()
         
+        start = time.perf_counter()
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            journal = self._from_data(data)
+        except (json.JSONDecodeError, ValueError) as e:
+            raise ValueError(f"Failed to load journal from {self.data_file}: {e}")
+        logger.info(
+            "Loaded journal from %s in %.3fs",
+            self.data_file, time.perf_counter() - start
+        )
+        return journal
+    
+    def _absorb(self, fresh: Journal) -> None:
+        """Give the loaded journal ``fresh``'s sections; call under ``lock``.
+        
+        The sections dict is replaced in one assignment, never emptied and
+        refilled, so a reader still iterating the old one is unaffected.
+        """
+        assert self._journal is not None
+        self._journal.sections = dict(fresh.sections)
+        self._reindex(self._journal)
+    
+    def close(self) -> None:
+        """Release resources; the JSON backend holds none."""
+    
+    def _from_data(self, data: Dict[str, Any]) -> Journal:
+        """Build a journal from the parsed data file."""
+        return Journal.model_validate(data)
+    
+    def _to_data(self, journal: Journal) -> Dict[str, Any]:
+        """Serializable form of the journal for the data file."""
+        return journal.model_dump()
+    
+    def _write_snapshot(self, data: Dict[str, Any], fsync: bool = False) -> None:
+        """Atomically replace the data file with ``data``."""
+        self._write_text(json.dumps(data, indent=2, default=str), fsync)
+    
+    def _write_text(self, text: str, fsync: bool = False) -> None:
+        """Atomically replace the data file with serialized ``text``."""
         # Ensure parent directory exists
         self.data_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Write to temporary file first, then rename for atomicity
-        temp_file = self.data_file.with_suffix('.tmp')
+        # Keep the full name: "journal.tmp" would clash with other sidecars' temp files
+        temp_file = self.data_file.with_suffix(self.data_file.suffix + '.tmp')
         try:
             with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(journal.model_dump(), f, indent=2, default=str)
+                f.write(text)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
             temp_file.replace(self.data_file)
         except Exception:
             # Clean up temp file if something went wrong
@@ -52,56 +256,180 @@ class JsonStorage:
     
     def get_section(self, path: str) -> Optional[JournalSection]:
         """Get a specific journal section by path."""
-        journal = self.load()
-        
-        # Handle root level sections
-        if '/' not in path:
-            return journal.sections.get(path)
+        self.load()
+        return self._sections.get(path)
+    
+    def section_paths(self, prefix: str = "") -> List[str]:
+        """Paths of the section at ``prefix`` and everything below it.
         
-        # Handle nested sections
-        parts = path.split('/')
-        current = journal.sections.get(parts[0])
+        Paths come in tree order (each section directly before its
+        subsections); an empty prefix lists the whole journal.
+        """
+        self.load()
+        return self._paths_under(prefix)
+    
+    def _paths_under(self, prefix: str) -> List[str]:
+        """Slice of the path index covering ``prefix`` and its subtree."""
+        prefix = prefix.strip('/')
+        if not prefix:
+            return list(self._paths)
+        key = path_key(prefix)
+        low = bisect_left(self._keys, key)
+        # Appending "\0" to the last part sorts after every descendant
+        high = bisect_left(self._keys, key[:-1] + (key[-1] + "\0",), low)
+        return self._paths[low:high]
+    
+    def section_stats(self, prefix: str = "") -> List[SectionStats]:
+        """Statistics for the sections at and below ``prefix``, in tree order.
         
-        for part in parts[1:]:
-            if current is None:
-                return None
-            current = current.subsections.get(part)
-            
-        return current
+        ``last_modified`` is the newest entry of the section itself.
+        """
+        return [self._aggregates.stats(path) for path in self.section_paths(prefix)]
+    
+    def summarize_section(self, path: str) -> Optional[SectionSummary]:
+        """Overview, entry count and subsection names for a section."""
+        section = self.get_section(path)
+        if section is None:
+            return None
+        return SectionSummary(
+            path=path,
+            overview=section.overview,
+            entry_count=len(section.entries),
+            subsections=list(section.subsections.keys()),
+        )
+    
+    def list_entries(self, path: str, limit: int, offset: int = 0) -> List[JournalEntry]:
+        """Entries of a section, most recent first, skipping ``offset``."""
+        section = self.get_section(path)
+        if section is None:
+            return []
+        total_entries = len(section.entries)
+        start_idx = max(0, total_entries - offset - limit)
+        end_idx = max(0, total_entries - offset)
+        return list(reversed(section.entries[start_idx:end_idx]))
     
     def create_section(self, path: str) -> JournalSection:
         """Create a new journal section at the given path."""
+        with self._file_lock, self._lock:
+            self.refresh()
+            section = self._ensure_section(path)
+            self.save(self.load())
+            return section
+    
+    def append_entry(
+        self, path: str, entry: JournalEntry, overview: Optional[str] = None
+    ) -> JournalSection:
+        """Add an entry to a section, creating the section if needed.
+        
+        Optionally replaces the section overview. The journal is written once.
+        """
+        self.append_entries([EntryWrite(path, entry, overview)])
+        section = self.get_section(path)
+        assert section is not None
+        return section
+    
+    def append_entries(self, writes: Sequence[EntryWrite]) -> None:
+        """Apply several writes and commit them together."""
+        with self._file_lock, self._lock:
+            self.refresh()
+            for write in writes:
+                self._apply_write(write)
+            self.save(self.load())
+    
+    def move_entries_before(self, cutoff: datetime, sink: EntrySink) -> int:
+        """Remove every section's entries older than ``cutoff``.
+        
+        Each section's removed entries (a prefix, since entries are appended
+        in time order) are handed to ``sink`` before the journal is
+        rewritten, so a failed write leaves them duplicated, never lost.
+        Returns how many entries were moved.
+        """
+        with self._file_lock, self._lock:
+            self.refresh()
+            journal = self.load()
+            moved = 0
+            for path, section in list(iter_sections(journal)):
+                count = count_older(section.entries, cutoff)
+                if count:
+                    sink(path, section.entries[:count])
+                    # Swapped rather than trimmed: the search index may be
+                    # reading the old columns by position
+                    section.entries = section.entries.tail(count)
+                    moved += count
+            if moved:
+                self._reindex(journal)
+                self.save(journal)
+            return moved
+    
+    def _apply_write(self, write: EntryWrite) -> JournalSection:
+        """Apply a write to the in-memory journal."""
+        section = self._ensure_section(write.path)
+        section.entries.append(write.entry)
+        self._aggregates.add_entry(write.path, write.entry)
+        if write.overview is not None:
+            section.overview = write.overview
+        return section
+    
+    def _ensure_section(self, path: str) -> JournalSection:
+        """Return the section at path, creating it (and parents) in memory."""
         journal = self.load()
+        section = self._sections.get(path)
+        if section is not None:
+            return section
         
-        # Handle root level sections
-        if '/' not in path:
-            if path not in journal.sections:
-                journal.sections[path] = JournalSection(path=path)
-            section = journal.sections[path]
-        else:
-            # Handle nested sections
-            parts = path.split('/')
-            
-            # Ensure parent sections exist
-            current_sections = journal.sections
-            current_path = ""
-            
-            for i, part in enumerate(parts):
-                if current_path:
-                    current_path += f"/{part}"
-                else:
-                    current_path = part
-                    
-                if i == len(parts) - 1:
-                    # This is the target section
-                    if part not in current_sections:
-                        current_sections[part] = JournalSection(path=current_path)
-                    section = current_sections[part]
+        # Create missing ancestors from the top down
+        parent: Optional[JournalSection] = None
+        current_path = ""
+        for part in path.split('/'):
+            current_path = f"{current_path}/{part}" if current_path else part
+            section = self._sections.get(current_path)
+            if section is None:
+                section = JournalSection(path=current_path)
+                if parent is None:
+                    journal.sections[part] = section
                 else:
-                    # This is a parent section
-                    if part not in current_sections:
-                        current_sections[part] = JournalSection(path=current_path)
-                    current_sections = current_sections[part].subsections
+                    parent.subsections[part] = section
+                self._register(current_path, section)
+            parent = section
         
-        self.save(journal)
+        assert section is not None
         return section
+    
+    def _register(self, path: str, section: JournalSection) -> None:
+        """Add a new section to the path index."""
+        self._sections[path] = section
+        self._aggregates.add_section(path)
+        key = path_key(path)
+        i = bisect_left(self._keys, key)
+        self._keys.insert(i, key)
+        self._paths.insert(i, path)
+    
+    def _reindex(self, journal: Journal) -> None:
+        """Rebuild the path index for a whole journal.
+        
+        Sections whose entry count and newest entry match their current
+        aggregate keep its size, and sections that only gained entries add
+        the size of the new ones, so only rewritten sections are measured
+        in full.
+        """
+        sections = dict(iter_sections(journal))
+        totals = [self._section_totals(path, section) for path, section in sections.items()]
+        self._sections = sections
+        self._paths = sorted(self._sections, key=path_key)
+        self._keys = [path_key(path) for path in self._paths]
+        self._aggregates.rebuild(totals)
+    
+    def _section_totals(self, path: str, section: JournalSection) -> SectionTotals:
+        """Direct totals of a section, reusing its aggregate where it still holds."""
+        entries = section.entries
+        # Entries are appended in time order
+        newest = entries.timestamps[-1] if entries else None
+        known = self._aggregates.get(path)
+        if known is None or known.entry_count > len(entries) or (
+            known.entry_count
+            and entries.timestamps[known.entry_count - 1] != known.newest_micros
+        ):
+            size = entries.text_bytes()
+        else:
+            size = known.bytes + entries[known.entry_count:].text_bytes()
+        return path, len(entries), size, newest
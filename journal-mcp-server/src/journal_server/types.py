@@ -1,8 +1,25 @@
 """Type definitions for the journal server."""
 
+import sys
+from array import array
+from bisect import bisect_left
 from datetime import datetime
-from typing import Dict, List, Optional
-from pydantic import BaseModel, Field
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Union,
+    overload,
+)
+
+from pydantic import BaseModel, Field, GetCoreSchemaHandler
+from pydantic_core import CoreSchema, core_schema
+
+from .columnar import from_epoch_micros, to_epoch_micros
 
 
 class JournalEntry(BaseModel):
@@ -13,21 +30,209 @@ class JournalEntry(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     
 
+class EntryList(MutableSequence[JournalEntry]):
+    """A section's entries held as parallel columns.
+
+    A list of ``JournalEntry`` models costs several hundred bytes of object
+    overhead per entry (the model, its ``__dict__``, its fields-set and a
+    ``datetime``) on top of the texts. Here each entry is one int64
+    epoch-microsecond timestamp and two string references, with repeated
+    work contexts interned, so a loaded journal costs little more than its
+    text.
+
+    It is a mutable sequence of ``JournalEntry``: indexing and iteration
+    materialize entries on demand, for the response builders and
+    serialization, and slicing yields another ``EntryList``; hot paths read
+    the columns directly.
+    """
+
+    __slots__ = ("_timestamps", "_work_contexts", "_contents")
+
+    def __init__(self, entries: Iterable[JournalEntry] = ()) -> None:
+        self._timestamps = array("q")
+        self._work_contexts: List[str] = []
+        self._contents: List[str] = []
+        self.extend(entries)
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> CoreSchema:
+        entries = handler.generate_schema(List[JournalEntry])
+        from_entries = core_schema.no_info_after_validator_function(cls, entries)
+        return core_schema.json_or_python_schema(
+            json_schema=from_entries,
+            python_schema=core_schema.union_schema(
+                [core_schema.is_instance_schema(cls), from_entries]
+            ),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                list, return_schema=entries
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    @overload
+    def __getitem__(self, index: int) -> JournalEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "EntryList": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[JournalEntry, "EntryList"]:
+        if isinstance(index, slice):
+            entries = EntryList()
+            entries._timestamps = self._timestamps[index]
+            entries._work_contexts = self._work_contexts[index]
+            entries._contents = self._contents[index]
+            return entries
+        return self._entry(range(len(self))[index])
+
+    @overload
+    def __setitem__(self, index: int, value: JournalEntry) -> None: ...
+
+    @overload
+    def __setitem__(self, index: slice, value: Iterable[JournalEntry]) -> None: ...
+
+    def __setitem__(
+        self, index: Union[int, slice], value: Union[JournalEntry, Iterable[JournalEntry]]
+    ) -> None:
+        if isinstance(index, slice):
+            assert not isinstance(value, JournalEntry)
+            rows = EntryList(value)
+            self._timestamps[index] = rows._timestamps
+            self._work_contexts[index] = rows._work_contexts
+            self._contents[index] = rows._contents
+        else:
+            assert isinstance(value, JournalEntry)
+            self._timestamps[index] = to_epoch_micros(value.timestamp)
+            self._work_contexts[index] = sys.intern(value.work_context)
+            self._contents[index] = value.content
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        del self._timestamps[index]
+        del self._work_contexts[index]
+        del self._contents[index]
+
+    def insert(self, index: int, entry: JournalEntry) -> None:
+        self._timestamps.insert(index, to_epoch_micros(entry.timestamp))
+        self._work_contexts.insert(index, sys.intern(entry.work_context))
+        self._contents.insert(index, entry.content)
+
+    def __iter__(self) -> Iterator[JournalEntry]:
+        return (self._entry(i) for i in range(len(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, EntryList):
+            return (
+                self._timestamps == other._timestamps
+                and self._work_contexts == other._work_contexts
+                and self._contents == other._contents
+            )
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"EntryList({list(self)!r})"
+
+    @property
+    def timestamps(self) -> array:
+        """Epoch microseconds, one per entry."""
+        return self._timestamps
+
+    def work_context(self, index: int) -> str:
+        return self._work_contexts[index]
+
+    def content(self, index: int) -> str:
+        return self._contents[index]
+
+    def append(self, entry: JournalEntry) -> None:
+        self.append_row(
+            entry.work_context, entry.content, to_epoch_micros(entry.timestamp)
+        )
+
+    def append_row(self, work_context: str, content: str, micros: int) -> None:
+        """Append an entry from its column values, without building a model."""
+        self._timestamps.append(micros)
+        # Work contexts repeat across many entries; hold each one once
+        self._work_contexts.append(sys.intern(work_context))
+        self._contents.append(content)
+
+    def extend(self, entries: Iterable[JournalEntry]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def tail(self, start: int) -> "EntryList":
+        """A copy holding the entries from ``start`` on."""
+        return self[start:]
+
+    def count_before(self, micros: int) -> int:
+        """Number of entries timestamped before ``micros``.
+
+        Entries are appended in time order, so this is a binary search.
+        """
+        return bisect_left(self._timestamps, micros)
+
+    def text_bytes(self) -> int:
+        """UTF-8 size of all work contexts and contents."""
+        return sum(len(text.encode('utf-8')) for text in self._work_contexts) + sum(
+            len(text.encode('utf-8')) for text in self._contents
+        )
+
+    def _entry(self, index: int) -> JournalEntry:
+        return JournalEntry.model_construct(
+            work_context=self._work_contexts[index],
+            content=self._contents[index],
+            timestamp=from_epoch_micros(self._timestamps[index]),
+        )
+
+
 class JournalSection(BaseModel):
     """A journal section with overview and entries."""
     
     path: str = Field(description="Path identifier for this section")
     overview: str = Field(default="", description="Current synthesis/understanding")
-    entries: List[JournalEntry] = Field(default_factory=list)
+    entries: EntryList = Field(default_factory=EntryList)
     subsections: Dict[str, "JournalSection"] = Field(default_factory=dict)
     
 
+class SectionSummary(BaseModel):
+    """Section metadata without its entries."""
+    
+    path: str
+    overview: str = ""
+    entry_count: int = 0
+    subsections: List[str] = Field(default_factory=list)
+    
+
+class SectionStats(BaseModel):
+    """Aggregate statistics for one journal section."""
+    
+    path: str
+    entry_count: int = 0
+    last_modified: Optional[datetime] = None
+    # Totals over the section and all its subsections
+    recursive_entry_count: int = 0
+    newest_timestamp: Optional[datetime] = None
+    total_bytes: int = 0
+    
+
 class Journal(BaseModel):
     """Root journal structure."""
     
     sections: Dict[str, JournalSection] = Field(default_factory=dict)
     
 
+class SearchQuery(BaseModel):
+    """One query of a batch search."""
+    
+    work_context: str
+    content: str
+    salience_threshold: float = 0.5
+    max_results: int = 10
+    
+
 class SearchResult(BaseModel):
     """Search result with scoring information."""
     
@@ -38,7 +243,7 @@ class SearchResult(BaseModel):
     content_score: float
     combined_score: float
     temporal_score: float
-
+    lexical_score: float = 0.0
 
 # Enable forward references
 JournalSection.model_rebuild()
@@ -0,0 +1,276 @@
+"""Write-ahead log storage backend for the journal server."""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Sequence
+
+from .locking import file_stamp
+from .storage import EntryWrite, JsonStorage
+from .types import Journal, JournalEntry, JournalSection
+
+logger = logging.getLogger(__name__)
+
+
+class WalStorage(JsonStorage):
+    """JSON snapshot plus an append-only JSONL log of writes.
+
+    Each write appends one record to ``<data-file>.wal`` instead of
+    rewriting the journal. At startup the snapshot is loaded and the log is
+    replayed on top of it. Once the log passes ``compact_bytes`` it is folded
+    into a fresh snapshot on a background thread.
+
+    Records carry a sequence number and the snapshot stores the last one it
+    contains, so a crash between replacing the snapshot and trimming the log
+    never applies a record twice. A torn final record is discarded.
+
+    Processes sharing the files append under the journal lock after reading
+    the others' new records, so sequence numbers stay in order. ``refresh``
+    applies just the records appended since it last looked, and reloads the
+    snapshot only after another process compacted.
+    """
+
+    def __init__(
+        self,
+        data_file: Path,
+        compact_bytes: int = 4 * 1024 * 1024,
+        fsync: str = "batch",
+    ) -> None:
+        super().__init__(data_file, fsync)
+        self.log_file = data_file.with_suffix('.wal')
+        self.compact_bytes = compact_bytes
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._log_size = 0
+        self._log: Optional[IO[str]] = None
+        self._compactor: Optional[threading.Thread] = None
+
+    def load(self) -> Journal:
+        """Load the snapshot and replay the log."""
+        with self._lock:
+            if self._journal is not None:
+                return self._journal
+        # Replaying may truncate a torn record, which must not race an append
+        with self._file_lock, self._lock:
+            if self._journal is not None:
+                return self._journal
+            journal = super().load()
+            self._seq = self._snapshot_seq
+            self._replay()
+            return journal
+
+    def refresh(self) -> bool:
+        """Apply log records other processes appended since the last look."""
+        with self._lock:
+            if self._journal is None:
+                return False
+            if file_stamp(self.data_file) == self._stamp and self._disk_log_size() == self._log_size:
+                return False
+        with self._file_lock, self._lock:
+            stamp = file_stamp(self.data_file)
+            log_size = self._disk_log_size()
+            if stamp == self._stamp and log_size == self._log_size:
+                return False
+            if stamp == self._stamp and log_size > self._log_size:
+                self._replay(self._log_size)
+            else:
+                # Another process compacted: reload the snapshot, replay the log
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                self._stamp = stamp
+                self._absorb(self._read_journal())
+                self._seq = self._snapshot_seq
+                self._replay()
+            self.generation += 1
+            return True
+
+    def save(self, journal: Journal) -> None:
+        """Write a full snapshot and empty the log."""
+        with self._file_lock, self._lock:
+            self.refresh()
+            self._journal = journal
+            self._write_snapshot(self._to_data(journal), fsync=True)
+            self._stamp = file_stamp(self.data_file)
+            self._trim_log(self._log_size)
+            self.generation += 1
+
+    def create_section(self, path: str) -> JournalSection:
+        """Create a new journal section at the given path."""
+        with self._file_lock, self._lock:
+            self.load()
+            self.refresh()
+            self._append_records([{"op": "section", "path": path}])
+            self.generation += 1
+            return self._ensure_section(path)
+
+    def append_entries(self, writes: Sequence[EntryWrite]) -> None:
+        """Log writes as one append and apply them in memory."""
+        with self._file_lock, self._lock:
+            self.load()
+            self.refresh()
+            self._append_records([
+                {
+                    "op": "entry",
+                    "path": write.path,
+                    "entry": write.entry.model_dump(mode="json"),
+                    "overview": write.overview,
+                }
+                for write in writes
+            ])
+            for write in writes:
+                self._apply_write(write)
+            self.generation += 1
+        self._maybe_compact()
+
+    def compact(self) -> None:
+        """Fold the log into a fresh snapshot.
+
+        Only the in-memory dump happens under the lock and serializing does
+        not block writers. Replacing the snapshot and trimming the log happen
+        together under the journal lock; if another process compacted in the
+        meantime this compaction is dropped.
+        """
+        with self._lock:
+            data = self._to_data(self.load())
+            offset = self._log_size
+            stamp = self._stamp
+        text = json.dumps(data, indent=2, default=str)
+        with self._file_lock, self._lock:
+            if file_stamp(self.data_file) != stamp:
+                return
+            self._write_text(text, fsync=True)
+            self._stamp = file_stamp(self.data_file)
+            self._trim_log(offset)
+
+    def close(self) -> None:
+        """Wait for a running compaction and close the log."""
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def _from_data(self, data: Dict[str, Any]) -> Journal:
+        self._snapshot_seq = int(data.get("wal_seq", 0))
+        return super()._from_data(data)
+
+    def _to_data(self, journal: Journal) -> Dict[str, Any]:
+        data = super()._to_data(journal)
+        data["wal_seq"] = self._seq
+        return data
+
+    def _disk_log_size(self) -> int:
+        stamp = file_stamp(self.log_file)
+        return 0 if stamp is None else stamp[1]
+
+    def _replay(self, offset: int = 0) -> None:
+        """Apply log records after byte ``offset`` newer than the snapshot."""
+        self._log_size = 0
+        if not self.log_file.exists():
+            return
+
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            raw = f.read()
+
+        valid = 0
+        for line in raw.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            valid += len(line)
+            if record["seq"] <= self._seq:
+                continue
+            if record["op"] == "entry":
+                self._apply_write(EntryWrite(
+                    record["path"],
+                    JournalEntry.model_validate(record["entry"]),
+                    record.get("overview"),
+                ))
+            elif record["op"] == "section":
+                self._ensure_section(record["path"])
+            self._seq = record["seq"]
+
+        if valid < len(raw):
+            # Drop a record torn by a crash mid-append
+            logger.warning("Discarding torn record at end of %s", self.log_file)
+            with open(self.log_file, 'r+b') as f:
+                f.truncate(offset + valid)
+        self._log_size = offset + valid
+
+    def _append_records(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the log, syncing according to the fsync policy."""
+        if self._log is None:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(self.log_file, 'a', encoding='utf-8')
+
+        seq = self._seq
+        for record in records:
+            seq += 1
+            line = json.dumps({"seq": seq, **record}, default=str) + "\n"
+            self._log.write(line)
+            self._log_size += len(line.encode('utf-8'))
+            if self.fsync == "always":
+                self._sync_log()
+        if self.fsync == "batch":
+            self._sync_log()
+        else:
+            self._log.flush()
+        self._seq = seq
+
+    def _sync_log(self) -> None:
+        assert self._log is not None
+        self._log.flush()
+        os.fsync(self._log.fileno())
+
+    def _trim_log(self, offset: int) -> None:
+        """Atomically drop the first ``offset`` bytes of the log."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if not self.log_file.exists():
+            self._log_size = 0
+            return
+
+        with open(self.log_file, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+
+        # Write to temporary file first, then rename for atomicity
+        temp_file = self.log_file.with_suffix('.wal.tmp')
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            temp_file.replace(self.log_file)
+        except Exception:
+            if temp_file.exists():
+                temp_file.unlink()
+            raise
+        self._log_size = len(tail)
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once the log is large enough."""
+        if self._log_size < self.compact_bytes:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(
+            target=self._compact_in_background, name="journal-wal-compactor", daemon=True
+        )
+        self._compactor.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception:
+            # The log stays authoritative; the next write retries
+            logger.exception("Compaction of %s failed", self.log_file)
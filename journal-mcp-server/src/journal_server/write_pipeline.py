@@ -0,0 +1,84 @@
+"""Group-commit pipeline for journal writes."""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Optional, Tuple
+
+from .storage import EntryWrite, JsonStorage
+
+
+class GroupCommitWriter:
+    """Coalesces writes arriving close together into one storage commit.
+
+    ``write`` queues an entry and returns only once the commit containing it
+    has completed, so callers still get durable acknowledgements. The first
+    write in an idle period opens a window of ``window_seconds``; everything
+    queued by the time it closes (up to ``max_batch`` writes) is committed
+    with a single ``append_entries`` call.
+
+    Commits run on ``executor`` (the loop's default one if None), one at a
+    time, so the JSON rewrite, fsync and file lock never block the event
+    loop; writers' futures are resolved back on the loop afterwards.
+    """
+
+    def __init__(
+        self,
+        storage: JsonStorage,
+        window_seconds: float = 0.002,
+        max_batch: int = 512,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.storage = storage
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.executor = executor
+        self.commits = 0
+        self.writes = 0
+        self._queue: List[Tuple[EntryWrite, "asyncio.Future[None]"]] = []
+        self._flusher: Optional["asyncio.Task[None]"] = None
+
+    async def write(self, write: EntryWrite) -> None:
+        """Queue a write and wait until it has been committed."""
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._queue.append((write, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        await future
+
+    async def drain(self) -> None:
+        """Wait for all queued writes to be committed."""
+        if self._flusher is not None:
+            await self._flusher
+
+    async def _flush(self) -> None:
+        batch: List[Tuple[EntryWrite, "asyncio.Future[None]"]] = []
+        try:
+            while self._queue:
+                if self.window_seconds > 0:
+                    await asyncio.sleep(self.window_seconds)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+
+                try:
+                    await asyncio.get_running_loop().run_in_executor(
+                        self.executor,
+                        self.storage.append_entries,
+                        [write for write, _ in batch],
+                    )
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    self.commits += 1
+                    self.writes += len(batch)
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_result(None)
+        finally:
+            # Cancelled mid-flush: no writer may wait for a commit that never comes
+            pending = batch + self._queue
+            del self._queue[:]
+            for _, future in pending:
+                if not future.done():
+                    future.cancel()
@@ -0,0 +1,77 @@
+"""Tests for per-section aggregate statistics."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from journal_server.aggregates import SectionAggregates, entry_bytes
+from journal_server.sharded_storage import ShardedStorage
+from journal_server.sqlite_storage import SqliteStorage
+from journal_server.storage import EntryWrite, JsonStorage
+from journal_server.types import JournalEntry
+from journal_server.wal_storage import WalStorage
+
+BACKENDS = {
+    "json": JsonStorage,
+    "wal": WalStorage,
+    "sharded": ShardedStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+def _entry(content, days_ago=0):
+    return JournalEntry(
+        work_context="notes",
+        content=content,
+        timestamp=datetime(2026, 1, 31) - timedelta(days=days_ago),
+    )
+
+
+def test_adding_entries_updates_ancestors_only():
+    """Test that direct totals stay on the section and roll up its ancestors."""
+    aggregates = SectionAggregates()
+    aggregates.add_section("beta")
+    aggregates.add_entry("alpha/api/auth", _entry("tokens", 2))
+    aggregates.add_entry("alpha", _entry("overview", 5))
+
+    auth = aggregates.stats("alpha/api/auth")
+    api = aggregates.stats("alpha/api")
+    alpha = aggregates.stats("alpha")
+    assert (auth.entry_count, auth.recursive_entry_count) == (1, 1)
+    assert (api.entry_count, api.recursive_entry_count) == (0, 1)
+    assert (alpha.entry_count, alpha.recursive_entry_count) == (1, 2)
+    assert alpha.last_modified == datetime(2026, 1, 26)
+    assert alpha.newest_timestamp == datetime(2026, 1, 29)
+    assert alpha.total_bytes == entry_bytes(_entry("tokens")) + entry_bytes(_entry("overview"))
+    assert aggregates.stats("beta").newest_timestamp is None
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_section_stats_from_aggregates(tmp_path, backend):
+    """Test subtree totals on every backend, after writes and on reopen."""
+    storage = BACKENDS[backend](tmp_path / "journal.json")
+    storage.append_entries([
+        EntryWrite("alpha", _entry("old", 10)),
+        EntryWrite("alpha/api", _entry("newer", 1)),
+        EntryWrite("beta", _entry("middle", 5)),
+    ])
+    storage.create_section("gamma")
+    expected = [
+        ("alpha", 1, 2, datetime(2026, 1, 30)),
+        ("alpha/api", 1, 1, datetime(2026, 1, 30)),
+        ("beta", 1, 1, datetime(2026, 1, 26)),
+        ("gamma", 0, 0, None),
+    ]
+
+    for opened in (storage, BACKENDS[backend](tmp_path / "journal.json")):
+        stats = opened.section_stats()
+        assert [
+            (s.path, s.entry_count, s.recursive_entry_count, s.newest_timestamp)
+            for s in stats
+        ] == expected
+        assert stats[0].total_bytes == entry_bytes(_entry("old")) + entry_bytes(_entry("newer"))
+
+    storage.append_entries([EntryWrite("alpha/api", _entry("newest"))])
+    (api,) = storage.section_stats("alpha/api")
+    assert (api.entry_count, api.newest_timestamp) == (2, datetime(2026, 1, 31))
+    assert storage.section_stats("alpha")[0].recursive_entry_count == 3
@@ -0,0 +1,136 @@
+"""Tests for the approximate IVF index."""
+
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from journal_server.ann import IvfIndex
+from journal_server.index import EntryIndex, to_epoch
+from journal_server.types import Journal, JournalEntry, JournalSection
+
+NOW = datetime(2025, 1, 1)
+
+
+def _clustered_journal(size: int = 1500, dimension: int = 16):
+    """A journal whose embeddings fall into a handful of clusters."""
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(12, dimension))
+    vectors = {}
+    journal = Journal()
+    section = JournalSection(path="notes")
+    for i in range(size):
+        work, content = f"work {i}", f"content {i}"
+        center = centers[i % len(centers)]
+        vectors[work] = center + 0.1 * rng.normal(size=dimension)
+        vectors[content] = center + 0.1 * rng.normal(size=dimension)
+        section.entries.append(JournalEntry(
+            work_context=work, content=content, timestamp=NOW
+        ))
+    journal.sections["notes"] = section
+
+    def embed_many(texts):
+        return [vectors[text] for text in texts]
+
+    return journal, embed_many, vectors
+
+
+def _search(index, vectors, rows=None):
+    return index.search(
+        vectors["work 3"], vectors["content 3"], -1.0, 10, to_epoch(NOW), rows=rows
+    )
+
+
+def test_small_journals_fall_back_to_exact():
+    """Test that the IVF index declines journals below its threshold."""
+    journal, embed_many, _ = _clustered_journal(size=50)
+    index = EntryIndex()
+    index.sync(journal, embed_many)
+
+    ivf = IvfIndex("model", min_entries=100)
+    assert not ivf.sync(index)
+    assert not ivf.trained
+
+
+def test_probing_every_list_matches_exact_search():
+    """Test that a full probe returns exactly the brute-force results."""
+    journal, embed_many, vectors = _clustered_journal()
+    index = EntryIndex()
+    index.sync(journal, embed_many)
+
+    ivf = IvfIndex("model", n_lists=8, min_entries=100)
+    assert ivf.sync(index)
+
+    exact = _search(index, vectors)
+    approximate = _search(index, vectors, rows=ivf.candidates(
+        vectors["work 3"], vectors["content 3"], n_probe=8
+    ))
+    assert [h.entry_index for h in approximate] == [h.entry_index for h in exact]
+
+    # A single probe still finds the query's own cluster
+    narrow = ivf.candidates(vectors["work 3"], vectors["content 3"], n_probe=1)
+    assert 3 in narrow
+    assert len(narrow) < len(index)
+
+
+def test_ivf_persistence_and_incremental_inserts():
+    """Test that assignments survive a restart and new rows are inserted."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index_file = Path(tmpdir) / "test.ivf.npz"
+        journal, embed_many, vectors = _clustered_journal()
+        index = EntryIndex()
+        index.sync(journal, embed_many)
+
+        ivf = IvfIndex("model", index_file, n_lists=8, min_entries=100)
+        ivf.sync(index)
+        ivf.save()
+        before = ivf.candidates(vectors["work 3"], vectors["content 3"], n_probe=2)
+
+        # Restart: a fresh index over the same journal reuses the assignments
+        reloaded = IvfIndex("model", index_file, n_lists=8, min_entries=100)
+        assert reloaded.trained
+        fresh = EntryIndex()
+        fresh.sync(journal, embed_many)
+        reloaded.sync(fresh)
+        after = reloaded.candidates(vectors["work 3"], vectors["content 3"], n_probe=2)
+        np.testing.assert_array_equal(before, after)
+
+        # A new entry lands in the list of its nearest centroid
+        vectors["work new"] = vectors["work 3"]
+        vectors["content new"] = vectors["content 3"]
+        journal.sections["notes"].entries.append(JournalEntry(
+            work_context="work new", content="content new", timestamp=NOW
+        ))
+        fresh.sync(journal, embed_many)
+        reloaded.sync(fresh)
+        candidates = reloaded.candidates(vectors["work 3"], vectors["content 3"], n_probe=1)
+        assert len(fresh) - 1 in candidates
+
+        # Embeddings from another model are not reused
+        assert not IvfIndex("other-model", index_file).trained
+
+
+def test_reset_assignments_after_renumbering():
+    """Test that archived-away entries do not leave stale list assignments."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index_file = Path(tmpdir) / "test.ivf.npz"
+        journal, embed_many, vectors = _clustered_journal()
+        index = EntryIndex()
+        index.sync(journal, embed_many)
+        ivf = IvfIndex("model", index_file, n_lists=8, min_entries=100)
+        ivf.sync(index)
+        ivf.save()
+
+        # As archival does: the oldest entries leave and the rest shift down
+        del journal.sections["notes"].entries[:3]
+        ivf.reset_assignments()
+        ivf.save()
+
+        reloaded = IvfIndex("model", index_file, n_lists=8, min_entries=100)
+        assert reloaded.trained
+        fresh = EntryIndex()
+        fresh.sync(journal, embed_many)
+        reloaded.sync(fresh)
+        # Row 0 now holds "work 3" and sits in that entry's nearest list
+        assert 0 in reloaded.candidates(vectors["work 3"], vectors["content 3"], n_probe=1)
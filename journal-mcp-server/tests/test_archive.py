@@ -0,0 +1,217 @@
+"""Tests for archiving old entries into compressed segments."""
+
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from journal_server.archive import ArchiveStore
+from journal_server.index import to_epoch
+from journal_server.server import JournalServer
+from journal_server.sharded_storage import ShardedStorage
+from journal_server.sqlite_storage import SqliteStorage
+from journal_server.storage import EntryWrite, JsonStorage
+from journal_server.types import JournalEntry
+from journal_server.wal_storage import WalStorage
+
+BACKENDS = {
+    "json": JsonStorage,
+    "wal": WalStorage,
+    "sharded": ShardedStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+def _entry(content, days_ago, work_context="notes"):
+    return JournalEntry(
+        work_context=work_context,
+        content=content,
+        timestamp=datetime.utcnow() - timedelta(days=days_ago),
+    )
+
+
+@pytest.mark.parametrize("compression", ["gzip", "lzma"])
+def test_archive_pages_across_segments(tmp_path, compression):
+    """Test that paging reads newest first across segments and reopens."""
+    archive = ArchiveStore(tmp_path / "archive", compression)
+    archive.append("notes", [_entry(f"e{i}", 100 - i) for i in range(3)], [(None, None)] * 3)
+    archive.append("notes", [_entry(f"e{i}", 100 - i) for i in range(3, 5)], [(None, None)] * 2)
+
+    reopened = ArchiveStore(tmp_path / "archive")
+    assert reopened.entry_count("notes") == 5
+    assert reopened.entry_count("other") == 0
+    assert [e.content for e in reopened.list_entries("notes", 3)] == ["e4", "e3", "e2"]
+    assert [e.content for e in reopened.list_entries("notes", 3, offset=3)] == ["e1", "e0"]
+    assert reopened.list_entries("notes", 3, offset=5) == []
+
+
+def test_archive_segment_cache_shared_by_threads(tmp_path):
+    """Test that concurrent readers share the segment LRU safely."""
+    archive = ArchiveStore(tmp_path / "archive", cache_segments=2)
+    for start in range(0, 40, 5):
+        archive.append(
+            "notes", [_entry(f"e{i}", 100 - i) for i in range(start, start + 5)],
+            [(None, None)] * 5,
+        )
+    expected = [f"e{i}" for i in reversed(range(40))]
+
+    def page_through(offset):
+        return [e.content for e in archive.list_entries("notes", 40 - offset, offset)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        pages = list(pool.map(page_through, [i % 7 for i in range(200)]))
+    assert all(page == expected[i % 7:] for i, page in enumerate(pages))
+
+
+def test_archive_search_embeds_missing_and_skips_unreachable(tmp_path):
+    """Test vector reuse, on-demand embedding and temporal segment pruning."""
+    archive = ArchiveStore(tmp_path / "archive")
+    axis = np.array([1.0, 0.0], dtype=np.float32)
+    other = np.array([0.0, 1.0], dtype=np.float32)
+    archive.append(
+        "notes/api",
+        [_entry("api design", 2), _entry("lunch", 2)],
+        [(axis, axis), (None, None)],
+    )
+    archive.append("notes", [_entry("ancient api", 400)], [(axis, axis)])
+
+    embedded = []
+
+    def embed(texts):
+        embedded.extend(texts)
+        return [axis if "api" in text else other for text in texts]
+
+    now = to_epoch(datetime.utcnow())
+    hits = archive.search(axis, axis, 0.5, 10, now, embed)
+    # Only the second entry lacked vectors; the 400 day old segment is skipped
+    assert embedded == ["notes", "lunch"]
+    assert [(h.section_path, h.entry_index, h.entry.content) for h in hits] == [
+        ("notes/api", 0, "api design")
+    ]
+
+    hits = archive.search(axis, axis, 0.05, 10, now, embed, prefix="notes")
+    assert [h.entry.content for h in hits] == ["api design", "ancient api"]
+    assert archive.search(axis, axis, 0.05, 10, now, embed, prefix="notes/other") == []
+
+    # Computed vectors were written back to the segment
+    embedded.clear()
+    reopened = ArchiveStore(tmp_path / "archive")
+    assert len(reopened.search(axis, axis, 0.05, 10, now, embed)) == 2
+    assert embedded == []
+
+
+def test_archive_search_reembeds_vectors_of_another_model(tmp_path):
+    """Test that stored vectors are only reused by the model that made them."""
+    axis = np.array([1.0, 0.0], dtype=np.float32)
+    ArchiveStore(tmp_path / "archive", model_name="two").append(
+        "notes", [_entry("api design", 2), _entry("lunch", 2)], [(axis, axis)] * 2
+    )
+
+    embedded = []
+    wide = np.array([0.0, 0.0, 1.0], dtype=np.float32)
+
+    def embed(texts):
+        embedded.extend(texts)
+        return [wide if "api" in text or text == "notes" else wide[::-1] for text in texts]
+
+    now = to_epoch(datetime.utcnow())
+    archive = ArchiveStore(tmp_path / "archive", model_name="three")
+    hits = archive.search(wide, wide, 0.5, 10, now, embed)
+    assert embedded == ["notes", "notes", "api design", "lunch"]
+    assert [h.entry.content for h in hits] == ["api design"]
+
+    # The new model's vectors were written back in place of the old ones
+    embedded.clear()
+    reopened = ArchiveStore(tmp_path / "archive", model_name="three")
+    assert [h.entry.content for h in reopened.search(wide, wide, 0.5, 10, now, embed)] == [
+        "api design"
+    ]
+    assert embedded == []
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_move_entries_before(tmp_path, backend):
+    """Test that old entries leave every backend and reach the sink in order."""
+    storage = BACKENDS[backend](tmp_path / "journal.json")
+    other = BACKENDS[backend](tmp_path / "journal.json")
+    other.load()
+    storage.append_entries([
+        EntryWrite("notes", _entry("old", 90)),
+        EntryWrite("notes", _entry("older sub", 80)),
+        EntryWrite("notes/sub", _entry("sub old", 70)),
+        EntryWrite("notes", _entry("new", 1)),
+    ])
+    moved = {}
+    cutoff = datetime.utcnow() - timedelta(days=30)
+
+    count = storage.move_entries_before(cutoff, lambda path, entries: moved.setdefault(
+        path, [e.content for e in entries]
+    ))
+
+    assert count == 3
+    assert moved == {"notes": ["old", "older sub"], "notes/sub": ["sub old"]}
+    assert [e.content for e in storage.get_section("notes").entries] == ["new"]
+    assert other.refresh()
+    assert [e.content for e in other.get_section("notes").entries] == ["new"]
+    assert other.get_section("notes/sub").entries == []
+
+    storage.append_entries([EntryWrite("notes", _entry("newest", 0))])
+    reopened = BACKENDS[backend](tmp_path / "journal.json")
+    assert [e.content for e in reopened.list_entries("notes", 10)] == ["newest", "new"]
+    for s in (storage, other, reopened):
+        s.close()
+
+
+@pytest.mark.asyncio
+async def test_server_reads_and_searches_through_archive():
+    """Test that reads page into the archive and search falls back to it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = JsonStorage(data_file)
+        storage.append_entries([
+            EntryWrite("auth", _entry(f"JWT token rotation {i}", 60 - i, "authentication"))
+            for i in range(3)
+        ] + [EntryWrite("auth", _entry("Recent note about caching", 0, "performance"))])
+
+        server = JournalServer(
+            data_file, embedding_backend="hashing", archive_after_days=30,
+            archive_compression="lzma",
+        )
+        assert server.archive_old_entries() == 3
+        assert len(server.storage.get_section("auth").entries) == 1
+
+        listing = (await server._handle_list_entries({"path": "auth", "limit": 2}))[0].text
+        assert "(2 of 4)" in listing
+        assert "## Entry 4" in listing and "Recent note" in listing
+        assert "## Entry 3" in listing and "rotation 2" in listing
+        listing = (await server._handle_list_entries(
+            {"path": "auth", "limit": 5, "offset": 2}
+        ))[0].text
+        assert "## Entry 2" in listing and "## Entry 1" in listing
+        assert "rotation 0" in listing
+
+        read = (await server._handle_read(
+            {"path": "auth", "include_entries": True, "max_entries": 3}
+        ))[0].text
+        assert "(3 of 4)" in read and "rotation 1" in read
+
+        # Archived entries sit at the temporal floor, so use a low threshold
+        results = server.searcher.search(
+            server.storage.load(), "authentication", "JWT token rotation",
+            salience_threshold=0.05, max_results=3,
+        )
+        assert len(results) == 3
+        assert all("rotation" in r.entry.content for r in results)
+        assert {r.entry_index for r in results} <= {0, 1, 2}
+
+        recent = server.searcher.search(
+            server.storage.load(), "performance", "caching",
+            salience_threshold=0.05, max_results=1,
+        )
+        assert recent[0].entry_index == 3
+
+        stats = (await server._handle_stats({}))[0].text
+        assert "Archived entries:** 3" in stats
@@ -0,0 +1,55 @@
+"""Tests for embedding backends."""
+
+import numpy as np
+import pytest
+
+from journal_server.backends import (
+    EmbeddingBackend,
+    HashingEmbedder,
+    SentenceTransformerBackend,
+    create_backend,
+)
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dimension=64)
+    first = embedder.encode(["Fixed the WAL replay bug", ""])
+    second = HashingEmbedder(dimension=64).encode(["Fixed the WAL replay bug", ""])
+    
+    assert first.shape == (2, 64)
+    assert np.array_equal(first, second)
+    assert np.linalg.norm(first[0]) == pytest.approx(1.0)
+    assert not first[1].any()
+
+
+def test_hashing_embedder_scores_shared_words_higher():
+    embedder = HashingEmbedder()
+    query, related, unrelated = embedder.encode([
+        "authentication tokens",
+        "Refreshed the authentication token handling",
+        "Tuned the rendering pipeline",
+    ])
+    
+    assert query @ related > query @ unrelated
+
+
+def test_create_backend():
+    assert create_backend("hashing").name == "hashing-384"
+    assert create_backend("small").name == "paraphrase-MiniLM-L3-v2"
+    assert create_backend("sentence-transformers", "/models/local").name == "/models/local"
+    assert isinstance(create_backend("sentence-transformers"), SentenceTransformerBackend)
+    with pytest.raises(ValueError):
+        create_backend("word2vec")
+    with pytest.raises(ValueError):
+        create_backend("hashing", "all-MiniLM-L6-v2")
+
+
+def test_backends_must_implement_load():
+    class NameOnly(EmbeddingBackend):
+        name = "name-only"
+
+    with pytest.raises(TypeError):
+        EmbeddingBackend()  # type: ignore[abstract]
+    with pytest.raises(TypeError):
+        NameOnly()  # type: ignore[abstract]
+    assert HashingEmbedder().load().encode(["text"]).shape == (1, 384)
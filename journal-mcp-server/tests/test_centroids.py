@@ -0,0 +1,36 @@
+"""Tests for section subtree centroids."""
+
+import numpy as np
+
+from journal_server.centroids import SectionTree
+
+
+def test_centroids_aggregate_subtrees():
+    """Test that a section's centroid covers its whole subtree."""
+    tree = SectionTree()
+    x, y = np.array([1.0, 0.0]), np.array([0.0, 1.0])
+    tree.add_row("alpha", 0)
+    tree.add_vectors("alpha", x, x)
+    tree.add_row("alpha/api", 1)
+    tree.add_vectors("alpha/api", y, y)
+
+    assert tree.centroid_score("alpha", x, x) == 0.5
+    assert tree.centroid_score("alpha/api", x, x) == 0.0
+    assert list(tree.subtree_rows("alpha")) == [0, 1]
+    assert list(tree.subtree_rows("alpha/api")) == [1]
+    assert list(tree.subtree_rows("missing")) == []
+
+
+def test_beam_search_skips_unpromising_subtrees():
+    """Test that the beam only descends into the best-matching sections."""
+    tree = SectionTree()
+    x, y = np.array([1.0, 0.0]), np.array([0.0, 1.0])
+    for row, (path, vector) in enumerate([
+        ("alpha/api", x), ("alpha/ui", y), ("beta/db", y), ("beta/ops", y),
+    ]):
+        tree.add_row(path, row)
+        tree.add_vectors(path, vector, vector)
+
+    assert list(tree.beam_rows(x, x, beam_width=1)) == [0]
+    assert list(tree.beam_rows(x, x, beam_width=4)) == [0, 1, 2, 3]
+    assert list(tree.beam_rows(y, y, beam_width=1, root="alpha")) == [1]
@@ -0,0 +1,117 @@
+"""Tests for the columnar entry store."""
+
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from journal_server.columnar import EntryColumns, to_epoch_micros
+from journal_server.types import EntryList, Journal, JournalEntry, JournalSection
+
+
+def test_entries_round_trip_through_columns():
+    """Test that materialized entries match the originals."""
+    stamp = datetime(2025, 3, 1, 12, 30, 15, 123456)
+    entries = EntryList(
+        JournalEntry(
+            work_context="debugging",
+            content=f"entry {i}",
+            timestamp=stamp + timedelta(minutes=i),
+        )
+        for i in range(100)
+    )
+
+    assert len(entries) == 100
+    entry = entries[42]
+    assert entry.content == "entry 42"
+    assert entry.work_context == "debugging"
+    assert entry.timestamp == stamp + timedelta(minutes=42)
+    assert [e.content for e in entries[-2:]] == ["entry 98", "entry 99"]
+
+    del entries[:10]
+    assert entries[0].content == "entry 10"
+    assert entries.tail(85) == [entries[85], entries[86], entries[87], entries[88], entries[89]]
+
+
+def test_entries_behave_as_a_list():
+    """Test that entry columns support the list API."""
+    stamp = datetime(2025, 1, 1)
+    entries = EntryList(
+        JournalEntry(
+            work_context="w",
+            content=f"entry {i}",
+            timestamp=stamp + timedelta(hours=i),
+        )
+        for i in range(5)
+    )
+
+    assert isinstance(entries[1:3], EntryList)
+    assert entries.count_before(to_epoch_micros(stamp + timedelta(hours=2))) == 2
+    assert entries.count_before(to_epoch_micros(stamp + timedelta(days=1))) == 5
+
+    entries.insert(0, JournalEntry(work_context="w", content="first", timestamp=stamp))
+    entries[1] = JournalEntry(work_context="w", content="second", timestamp=stamp)
+    entries.reverse()
+    assert [e.content for e in entries] == [
+        "entry 4", "entry 3", "entry 2", "entry 1", "second", "first",
+    ]
+
+
+def test_index_rows_store_positions_only():
+    """Test that index columns keep section and position, not texts."""
+    columns = EntryColumns()
+    for i in range(100):
+        columns.append("project/api", i, i * 1_000_000)
+
+    assert len(columns) == 100
+    assert columns.section_path(42) == "project/api"
+    assert columns.entry_index(42) == 42
+    assert columns.timestamps[42] == 42_000_000
+    # Repeated paths are stored once
+    assert len(columns.paths) == 1
+
+
+def test_sections_validate_and_serialize_entries():
+    """Test that sections hold entry columns and dump plain entries."""
+    entry = JournalEntry(work_context="w", content="c", timestamp=datetime(2025, 1, 1))
+    journal = Journal(sections={"a": JournalSection(path="a", entries=[entry])})
+
+    assert isinstance(journal.sections["a"].entries, EntryList)
+    assert journal.model_dump()["sections"]["a"]["entries"] == [entry.model_dump()]
+    reloaded = Journal.model_validate_json(journal.model_dump_json())
+    assert reloaded.sections["a"].entries == [entry]
+
+
+def test_columns_use_a_fraction_of_the_model_memory():
+    """Test that column storage is far smaller than a list of models."""
+    stamp = datetime(2025, 1, 1)
+
+    tracemalloc.start()
+    models = [
+        JournalEntry(
+            work_context="debugging",
+            content=f"entry {i} about the storage layer",
+            timestamp=stamp + timedelta(seconds=i),
+        )
+        for i in range(10000)
+    ]
+    model_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    columns = EntryList()
+    for i in range(10000):
+        columns.append_row(
+            "debugging",
+            f"entry {i} about the storage layer",
+            to_epoch_micros(stamp + timedelta(seconds=i)),
+        )
+    column_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(models) == len(columns)
+    assert column_bytes * 4 < model_bytes
+
+
+def test_aware_timestamps_convert_to_utc():
+    """Test that timezone-aware timestamps are stored as UTC."""
+    aware = datetime(2025, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    assert to_epoch_micros(aware) == to_epoch_micros(datetime(2025, 1, 1, 10))
@@ -0,0 +1,122 @@
+"""Tests for the shared embedding daemon."""
+
+import json
+import socket
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from journal_server.backends import HashingEmbedder
+from journal_server.embed_daemon import (
+    DaemonBackend,
+    DaemonClient,
+    DaemonError,
+    EmbeddingDaemon,
+    _recv_frame,
+    _send_frame,
+)
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = EmbeddingDaemon(HashingEmbedder(), tmp_path / "embed.sock", window_seconds=0.05)
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    thread.join(timeout=5)
+
+
+def test_daemon_batches_requests_from_several_clients(daemon):
+    """Test that concurrent clients share one encode call and the cache."""
+    clients = [DaemonClient(daemon.socket_path, "hashing-384") for _ in range(3)]
+    for client in clients:
+        client.connect()
+    results = {}
+
+    def request(i):
+        results[i] = clients[i].encode([f"entry {i}", "shared text"])
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    local = HashingEmbedder().encode(["entry 1", "shared text"])
+    assert np.allclose(results[1], local)
+    assert daemon.batches == 1
+    assert daemon.encoded == 4
+
+    clients[0].encode(["shared text"])
+    assert daemon.encoded == 4
+
+
+def test_daemon_rejects_other_models(daemon):
+    client = DaemonClient(daemon.socket_path, "all-MiniLM-L6-v2")
+    with pytest.raises(DaemonError):
+        client.connect()
+
+
+def test_daemon_answers_non_object_requests(daemon):
+    """Test that valid JSON that is not an object gets an error reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(str(daemon.socket_path))
+        _send_frame(sock, b'["not", "an", "object"]')
+        assert "error" in json.loads(_recv_frame(sock))
+        # The connection still serves well-formed requests
+        _send_frame(sock, json.dumps({"model": "hashing-384", "texts": ["a"]}).encode("utf-8"))
+        assert json.loads(_recv_frame(sock))["count"] == 1
+
+
+def test_backend_falls_back_without_daemon(tmp_path, daemon):
+    """Test in-process embedding when no daemon serves the model."""
+    absent = DaemonBackend(HashingEmbedder(), tmp_path / "missing.sock").load()
+    assert absent.client is None
+    assert absent.encode(["text"]).shape == (1, 384)
+
+    attached = DaemonBackend(HashingEmbedder(), daemon.socket_path).load()
+    assert attached.client is not None
+    daemon.shutdown()
+    # The daemon went away: later calls are served in-process
+    vectors = attached.encode(["text"])
+    assert np.allclose(vectors, HashingEmbedder().encode(["text"]))
+    assert attached.client is None
+
+
+def test_daemon_refuses_shared_socket_directory(tmp_path):
+    """Test that the socket is only created in a directory private to the user."""
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(DaemonError):
+        EmbeddingDaemon(HashingEmbedder(), shared / "embed.sock").bind()
+
+    daemon = EmbeddingDaemon(HashingEmbedder(), tmp_path / "private" / "embed.sock")
+    daemon.bind()
+    assert (daemon.socket_path.parent.stat().st_mode & 0o777) == 0o700
+    daemon._server.server_close()
+
+
+def test_client_refuses_daemon_of_another_user(daemon, monkeypatch):
+    """Test that nothing is sent to a socket run by someone else."""
+    monkeypatch.setattr("os.getuid", lambda: 12345)
+    client = DaemonClient(daemon.socket_path, "hashing-384")
+    with pytest.raises(DaemonError):
+        client.connect()
+    assert daemon.requests == 0
+
+
+def test_in_memory_cache_keeps_recent_texts():
+    daemon = EmbeddingDaemon(HashingEmbedder(), Path("unused.sock"), cache_entries=2)
+    vector = np.ones(4, dtype=np.float32)
+    daemon.cache.put("a", vector)
+    daemon.cache.put("b", vector)
+    assert daemon.cache.get("a") is not None
+    daemon.cache.put("c", vector)
+    assert daemon.cache.get("b") is None
+    assert daemon.cache.get("a") is not None and len(daemon.cache) == 2
@@ -0,0 +1,135 @@
+"""Tests for background embedding of written entries."""
+
+import time
+
+import numpy as np
+
+from journal_server.ann import IvfIndex
+from journal_server.backends import HashingEmbedder
+from journal_server.embed_worker import EmbedWorker
+from journal_server.search import JournalSearcher
+from journal_server.types import Journal, JournalEntry, JournalSection
+
+
+class _CountingModel:
+    """Stand-in encoder recording each batch it is given."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(list(texts))
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def _wait_until_idle(worker: EmbedWorker) -> None:
+    deadline = time.monotonic() + 5
+    while worker.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_written_entries_are_embedded_in_one_batch():
+    """Test that entries arriving together share a model batch."""
+    searcher = JournalSearcher()
+    model = _CountingModel()
+    searcher._model = model
+    worker = EmbedWorker(searcher, window_seconds=0.05)
+    for i in range(3):
+        worker.submit(JournalEntry(work_context="design", content=f"entry {i}"))
+    assert worker.pending == 3
+    worker.start()
+    _wait_until_idle(worker)
+    worker.stop()
+
+    assert worker.pending == 0
+    assert worker.lag_seconds == 0.0
+    assert len(model.batches) == 1
+    assert sorted(model.batches[0]) == ["design", "entry 0", "entry 1", "entry 2"]
+    assert searcher.cache.get("entry 1") is not None
+
+
+def test_search_encodes_only_queries_after_worker():
+    """Test that the search path reuses vectors from the worker."""
+    searcher = JournalSearcher()
+    model = _CountingModel()
+    searcher._model = model
+    entry = JournalEntry(work_context="design", content="sketch")
+    journal = Journal()
+    journal.sections["notes"] = JournalSection(path="notes", entries=[entry])
+
+    worker = EmbedWorker(searcher, window_seconds=0)
+    worker.start()
+    worker.submit(entry)
+    _wait_until_idle(worker)
+    worker.stop()
+
+    searcher.search(journal, "query context", "query content")
+    assert model.batches[-1] == ["query context", "query content"]
+
+
+def test_cache_is_saved_on_a_timer_and_at_stop(tmp_path):
+    """Test that batches do not each rewrite the cache file."""
+    cache_file = tmp_path / "cache.npz"
+    searcher = JournalSearcher(cache_file=cache_file)
+    searcher._model = _CountingModel()
+    worker = EmbedWorker(searcher, window_seconds=0, save_seconds=60)
+    worker.start()
+    for i in range(3):
+        worker.submit(JournalEntry(work_context="design", content=f"entry {i}"))
+        _wait_until_idle(worker)
+    assert worker.batches == 3
+    assert worker.embedded == 3
+    assert not cache_file.exists()
+
+    # Already cached: batched but not counted as embedded
+    worker.submit(JournalEntry(work_context="design", content="entry 1"))
+    _wait_until_idle(worker)
+    assert (worker.batches, worker.embedded) == (4, 3)
+
+    worker.stop()
+    assert cache_file.exists()
+    assert JournalSearcher(cache_file=cache_file).cache.get("entry 2") is not None
+
+
+def test_written_entries_join_the_ivf_lists():
+    """Test that the worker assigns written entries without a search."""
+    ivf = IvfIndex("hashing-384", n_lists=4, min_entries=20)
+    searcher = JournalSearcher(backend=HashingEmbedder(), ann_index=ivf)
+    section = JournalSection(path="notes", entries=[
+        JournalEntry(work_context="design", content=f"entry {i}") for i in range(30)
+    ])
+    journal = Journal(sections={"notes": section})
+    searcher.search(journal, "design", "entry 3", salience_threshold=0.0)
+    assert ivf.trained
+
+    worker = EmbedWorker(searcher, window_seconds=0, entries=lambda: journal)
+    worker.start()
+    entry = JournalEntry(work_context="design", content="entry 30")
+    section.entries.append(entry)
+    worker.submit(entry)
+    _wait_until_idle(worker)
+    worker.stop()
+
+    # Probing every list returns exactly the assigned rows
+    assert len(searcher.index) == 31
+    vector = HashingEmbedder().encode(["design", "entry 30"])
+    assert 30 in ivf.candidates(vector[0], vector[1], n_probe=4)
+
+
+def test_entries_are_not_read_without_a_trained_index():
+    """Test that exact search leaves the storage unread after writes."""
+    searcher = JournalSearcher(backend=HashingEmbedder())
+    calls = []
+
+    def entries() -> Journal:
+        calls.append(1)
+        return Journal()
+
+    worker = EmbedWorker(searcher, window_seconds=0, entries=entries)
+    worker.start()
+    worker.submit(JournalEntry(work_context="design", content="entry"))
+    _wait_until_idle(worker)
+    worker.stop()
+
+    assert worker.batches == 1
+    assert calls == []
@@ -0,0 +1,53 @@
+"""Tests for the persistent embedding cache."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from journal_server.embeddings import EmbeddingCache, cache_file_for
+
+
+def test_cache_file_is_sidecar_of_data_file():
+    """Test that the cache lives next to the journal data file."""
+    data_file = Path("/tmp/journals/team.json")
+    assert cache_file_for(data_file) == Path("/tmp/journals/team.embeddings.npz")
+
+
+def test_cache_persistence():
+    """Test that embeddings survive a reload with the same model."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_file = Path(tmpdir) / "test.embeddings.npz"
+        cache = EmbeddingCache("model-a", cache_file)
+        cache.put("project setup", np.array([1.0, 0.0, 0.5]))
+        cache.save()
+
+        reloaded = EmbeddingCache("model-a", cache_file)
+        assert len(reloaded) == 1
+        vector = reloaded.get("project setup")
+        assert vector is not None
+        np.testing.assert_allclose(vector, [1.0, 0.0, 0.5])
+        assert reloaded.get("something else") is None
+
+
+def test_cache_invalidated_by_model_change():
+    """Test that embeddings from a different model are not reused."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_file = Path(tmpdir) / "test.embeddings.npz"
+        cache = EmbeddingCache("model-a", cache_file)
+        cache.put("project setup", np.array([1.0, 0.0]))
+        cache.save()
+
+        other = EmbeddingCache("model-b", cache_file)
+        assert len(other) == 0
+        assert other.get("project setup") is None
+
+
+def test_corrupt_cache_is_ignored():
+    """Test that an unreadable cache file leaves the cache empty."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache_file = Path(tmpdir) / "test.embeddings.npz"
+        cache_file.write_bytes(b"not an npz file")
+
+        cache = EmbeddingCache("model-a", cache_file)
+        assert len(cache) == 0
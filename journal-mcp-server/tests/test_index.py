@@ -0,0 +1,191 @@
+"""Tests for the vectorized entry index."""
+
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from journal_server.index import EntryIndex, temporal_scores, to_epoch
+from journal_server.types import Journal, JournalEntry, JournalSection
+
+
+def _embedder(dimension: int = 8):
+    """Deterministic text -> vector function for exercising the index."""
+    vectors = {}
+
+    def embed(text: str) -> np.ndarray:
+        if text not in vectors:
+            seed = sum(ord(c) * (i + 1) for i, c in enumerate(text))
+            vectors[text] = np.random.default_rng(seed).normal(size=dimension)
+        return vectors[text]
+
+    return embed
+
+
+def _batch(embed):
+    return lambda texts: [embed(text) for text in texts]
+
+
+def _journal(now: datetime) -> Journal:
+    journal = Journal()
+    alpha = JournalSection(path="alpha")
+    nested = JournalSection(path="alpha/api")
+    beta = JournalSection(path="beta")
+    for i in range(20):
+        target = [alpha, nested, beta][i % 3]
+        target.entries.append(JournalEntry(
+            work_context=f"context {i % 4}",
+            content=f"entry number {i}",
+            timestamp=now - timedelta(days=i * 7),
+        ))
+    alpha.subsections["api"] = nested
+    journal.sections["alpha"] = alpha
+    journal.sections["beta"] = beta
+    return journal
+
+
+def _reference_scores(journal, embed, work_query, content_query, now):
+    """Per-entry scoring as the original searcher computed it."""
+
+    def cosine(a, b):
+        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    scores = {}
+    sections = [(p, s) for p, s in journal.sections.items()]
+    while sections:
+        path, section = sections.pop()
+        for i, entry in enumerate(section.entries):
+            age = now - entry.timestamp
+            temporal = max(0.1, math.exp(-age.days * math.log(2) / 30))
+            combined = (
+                cosine(embed(work_query), embed(entry.work_context))
+                + cosine(embed(content_query), embed(entry.content))
+            ) / 2 * temporal
+            scores[(path, i)] = combined
+        for name, subsection in section.subsections.items():
+            sections.append((f"{path}/{name}", subsection))
+    return scores
+
+
+def test_temporal_scores_match_whole_day_decay():
+    """Test that vectorized decay floors age to whole days and at 0.1."""
+    now = datetime(2025, 1, 31, 12, 0)
+    stamps = [now - timedelta(days=30, hours=5), now - timedelta(days=400), now]
+    scores = temporal_scores(np.array([to_epoch(t) for t in stamps]), to_epoch(now))
+    np.testing.assert_allclose(scores, [0.5, 0.1, 1.0])
+
+
+def test_index_ranking_matches_per_entry_scoring():
+    """Test that matrix scoring ranks entries like per-entry scoring."""
+    now = datetime(2025, 1, 1)
+    journal = _journal(now)
+    embed = _embedder()
+
+    index = EntryIndex()
+    index.sync(journal, _batch(embed))
+    assert len(index) == 20
+
+    hits = index.search(
+        embed("context 1"), embed("entry number 4"), -1.0, 5, to_epoch(now)
+    )
+    expected = _reference_scores(journal, embed, "context 1", "entry number 4", now)
+    best = sorted(expected.values(), reverse=True)[:5]
+
+    assert [round(h.combined_score, 5) for h in hits] == [round(s, 5) for s in best]
+    for hit in hits:
+        assert math.isclose(
+            hit.combined_score, expected[(hit.section_path, hit.entry_index)],
+            rel_tol=1e-5, abs_tol=1e-6,
+        )
+
+
+def test_index_threshold_and_incremental_sync():
+    """Test threshold filtering and appending entries written after a sync."""
+    now = datetime(2025, 1, 1)
+    journal = _journal(now)
+    embed = _embedder()
+
+    index = EntryIndex()
+    index.sync(journal, _batch(embed))
+
+    journal.sections["beta"].entries.append(JournalEntry(
+        work_context="context 9", content="fresh entry", timestamp=now
+    ))
+    index.sync(journal, _batch(embed))
+    assert len(index) == 21
+
+    hits = index.search(embed("context 9"), embed("fresh entry"), 0.99, 10, to_epoch(now))
+    assert len(hits) == 1
+    assert hits[0].section_path == "beta"
+    assert hits[0].entry.content == "fresh entry"
+
+
+def test_pruned_search_matches_exhaustive_scan(monkeypatch):
+    """Test that temporal pruning and early stopping change no results."""
+    monkeypatch.setattr("journal_server.index.SCAN_BLOCK_ROWS", 4)
+    now = datetime(2025, 1, 1)
+    journal = _journal(now)
+    embed = _embedder()
+    index = EntryIndex()
+    index.sync(journal, _batch(embed))
+
+    expected = _reference_scores(journal, embed, "context 2", "entry number 3", now)
+    for threshold in (-1.0, 0.0, 0.05, 0.2):
+        for max_results in (1, 3, 10):
+            hits = index.search(
+                embed("context 2"), embed("entry number 3"),
+                threshold, max_results, to_epoch(now),
+            )
+            best = sorted(
+                (s for s in expected.values() if s >= threshold), reverse=True
+            )[:max_results]
+            assert [round(h.combined_score, 5) for h in hits] == [
+                round(s, 5) for s in best
+            ]
+
+
+def test_entries_below_temporal_bound_are_not_embedded():
+    """Test that rows too old for the threshold stay unembedded."""
+    now = datetime(2025, 1, 1)
+    journal = _journal(now)
+    index = EntryIndex()
+    index.add(index.pending(journal))
+
+    # Entries are a week apart; after 30 days temporal salience is below 0.5
+    needed = index.unembedded(0.5, to_epoch(now))
+    ages = sorted((now - index.entry(row).timestamp).days for row in needed)
+    assert ages == [0, 7, 14, 21, 28]
+    assert index.search(np.ones(8), np.ones(8), 0.5, 10, to_epoch(now)) == []
+
+
+def test_batch_search_matches_single_queries(monkeypatch):
+    """Test that one batched pass returns what each query gets alone."""
+    monkeypatch.setattr("journal_server.index.SCAN_BLOCK_ROWS", 4)
+    now = datetime(2025, 1, 1)
+    journal = _journal(now)
+    embed = _embedder()
+    index = EntryIndex()
+    index.sync(journal, _batch(embed))
+
+    queries = [
+        ("context 2", "entry number 3", 0.0, 3),
+        ("context 0", "entry number 9", 0.2, 10),
+        ("context 1", "entry number 1", -1.0, 1),
+        ("context 3", "entry number 0", 0.5, 0),
+    ]
+    batched = index.search_batch(
+        np.stack([embed(work) for work, _, _, _ in queries]),
+        np.stack([embed(content) for _, content, _, _ in queries]),
+        [threshold for _, _, threshold, _ in queries],
+        [limit for _, _, _, limit in queries],
+        to_epoch(now),
+    )
+    for (work, content, threshold, limit), hits in zip(queries, batched):
+        single = index.search(embed(work), embed(content), threshold, limit, to_epoch(now))
+        assert [(h.section_path, h.entry_index) for h in hits] == [
+            (h.section_path, h.entry_index) for h in single
+        ]
+        assert [h.combined_score for h in hits] == pytest.approx(
+            [h.combined_score for h in single]
+        )
@@ -1,5 +1,6 @@
 """Integration tests for the journal server."""
 
+import asyncio
 import tempfile
 from pathlib import Path
 
@@ -97,3 +98,204 @@ async def test_journal_search():
         search_content = search_result[0].text
         assert "Found" in search_content
         assert "authentication" in search_content
+
+
+@pytest.mark.asyncio
+async def test_journal_search_with_hashing_backend():
+    """Test the full search pipeline offline with the hashing embedder."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(Path(tmpdir) / "test.json", embedding_backend="hashing")
+        await server._handle_write({
+            "path": "project-alpha",
+            "entry": "Implemented user authentication with JWT tokens.",
+            "work_context": "authentication development"
+        })
+        await server._handle_write({
+            "path": "project-beta",
+            "entry": "Tuned the rendering pipeline for large tables.",
+            "work_context": "frontend performance"
+        })
+        
+        result = await server._handle_search({
+            "work_context": "authentication development",
+            "content": "user authentication",
+            "salience_threshold": 0.3,
+        })
+        text = result[0].text
+        assert "Found 1 matching entries" in text
+        assert "JWT tokens" in text
+        assert server.searcher.model_name == "hashing-384"
+        
+        stats = await server._handle_stats({})
+        assert "Embedding model:** hashing-384 (loaded)" in stats[0].text
+
+
+@pytest.mark.asyncio
+async def test_journal_search_batch():
+    """Test that batch search returns results per query."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(Path(tmpdir) / "test.json", embedding_backend="hashing")
+        await server._handle_write({
+            "path": "project-alpha",
+            "entry": "Implemented user authentication with JWT tokens.",
+            "work_context": "authentication development"
+        })
+        await server._handle_write({
+            "path": "project-beta",
+            "entry": "Tuned the rendering pipeline for large tables.",
+            "work_context": "frontend performance"
+        })
+        
+        result = await server._handle_search_batch({"queries": [
+            {"work_context": "authentication development", "content": "JWT tokens", "salience_threshold": 0.3},
+            {"work_context": "frontend performance", "content": "rendering pipeline", "salience_threshold": 0.3},
+            {"work_context": "gardening", "content": "tomatoes", "salience_threshold": 0.9},
+        ]})
+        text = result[0].text
+        queries = text.split("# Query ")[1:]
+        assert len(queries) == 3
+        assert "JWT tokens" in queries[0] and "rendering" not in queries[0]
+        assert "rendering pipeline for large tables" in queries[1]
+        assert "No matching entries found" in queries[2]
+
+
+@pytest.mark.asyncio
+async def test_non_search_tools_do_not_load_model():
+    """Test that reads and writes are served before the model is loaded."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        server = JournalServer(data_file)
+        assert not server.searcher.model_loaded
+        assert "server_init" in server.startup_timings
+        
+        await server._handle_write({
+            "path": "project-alpha",
+            "entry": "Sketched the storage layout.",
+            "work_context": "design"
+        })
+        await server._handle_read({"path": "project-alpha", "include_entries": True})
+        await server._handle_toc({})
+        await server._handle_list_entries({"path": "project-alpha"})
+        
+        assert not server.searcher.model_loaded
+
+
+@pytest.mark.asyncio
+async def test_lexical_search_without_model():
+    """Test that lexical search finds exact identifiers with no model loaded."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(Path(tmpdir) / "test.json")
+        await server._handle_write({
+            "path": "project-alpha",
+            "entry": "Traced the crash in _apply_write to JIRA-1234.",
+            "work_context": "debugging"
+        })
+        await server._handle_write({
+            "path": "project-beta",
+            "entry": "Reviewed the onboarding flow.",
+            "work_context": "design review"
+        })
+        
+        result = await server._handle_search({
+            "work_context": "debugging",
+            "content": "JIRA-1234",
+            "mode": "lexical"
+        })
+        text = result[0].text
+        assert "Found 1 matching entries" in text
+        assert "_apply_write" in text
+        assert "Lexical=" in text
+        assert not server.searcher.model_loaded
+        
+        stats = await server._handle_stats({})
+        assert "Journal generation:** 2" in stats[0].text
+        assert "Indexed entries:** 2" in stats[0].text
+
+
+@pytest.mark.asyncio
+async def test_index_refresh_after_write_logs_failures(caplog):
+    """Test that a failed background index refresh is logged, not lost."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(Path(tmpdir) / "test.json")
+        write = {"path": "notes", "entry": "JIRA-1234", "work_context": "debugging"}
+        await server._handle_write(write)
+        await server._handle_search({
+            "work_context": "debugging", "content": "JIRA-1234", "mode": "lexical"
+        })
+        
+        def fail(journal):
+            raise RuntimeError("index broke")
+        
+        server.searcher.refresh = fail
+        await server._handle_write(write)
+        assert server._background
+        await asyncio.wait(server._background)
+        assert not server._background
+        assert "Refreshing the search index failed" in caplog.text
+        assert "index broke" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_workflow():
+    """Test journal tools on the SQLite storage backend."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        server = JournalServer(data_file, storage="sqlite")
+        
+        for i in range(3):
+            await server._handle_write({
+                "path": "project-alpha",
+                "entry": f"Step {i} of the migration.",
+                "work_context": "database migration"
+            })
+        
+        read_result = await server._handle_read({
+            "path": "project-alpha",
+            "include_entries": True,
+            "max_entries": 2
+        })
+        assert "## Recent Entries (2 of 3)" in read_result[0].text
+        assert "### Entry 3" in read_result[0].text
+        
+        list_result = await server._handle_list_entries({
+            "path": "project-alpha",
+            "limit": 1,
+            "offset": 2
+        })
+        assert "## Entry 1" in list_result[0].text
+        assert "Step 0 of the migration." in list_result[0].text
+
+
+@pytest.mark.asyncio
+async def test_toc_subtree_and_depth():
+    """Test journal_toc rooted at a nested section with a depth limit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        server = JournalServer(data_file)
+        
+        for path in ["alpha/api/auth/tokens", "alpha/api", "beta"]:
+            await server._handle_write({
+                "path": path,
+                "entry": f"Notes for {path}",
+                "work_context": "planning"
+            })
+        
+        toc = (await server._handle_toc({"path": "alpha/api", "max_depth": 2}))[0].text
+        assert "- **api** (1 entries, 2 with subsections, latest " in toc
+        assert "  - **auth** (0 entries, 1 with subsections, latest " in toc
+        assert "tokens" not in toc
+        assert "beta" not in toc
+        
+        await server._handle_write({
+            "path": "alpha/db",
+            "entry": "Schema notes",
+            "work_context": "planning"
+        })
+        toc = (await server._handle_toc({"max_depth": 2}))[0].text
+        assert toc.index("**alpha**") < toc.index("**api**") < toc.index("**db**") < toc.index("**beta**")
+        toc = (await server._handle_toc({"max_depth": 2, "sort": "recent"}))[0].text
+        assert toc.index("**alpha**") < toc.index("**db**") < toc.index("**api**")
+        assert toc.index("**api**") < toc.index("**beta**")
+        
+        missing = (await server._handle_toc({"path": "gamma"}))[0].text
+        assert "Journal section 'gamma' not found" in missing
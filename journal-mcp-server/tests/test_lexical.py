@@ -0,0 +1,35 @@
+"""Tests for the BM25 index and rank fusion."""
+
+from journal_server.lexical import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_keeps_identifiers_and_parts():
+    """Test that identifiers are indexed whole and split."""
+    terms = tokenize("Fixed _apply_write for JIRA-1234")
+    assert "_apply_write" in terms
+    assert "apply" in terms
+    assert "jira-1234" in terms
+    assert "1234" in terms
+
+
+def test_bm25_prefers_rare_terms_and_shorter_documents():
+    """Test BM25 ranking and row restriction."""
+    index = LexicalIndex()
+    index.add(0, "storage refactor")
+    index.add(1, "storage refactor for the sqlite backend and more storage work")
+    index.add(2, "sqlite")
+
+    rows, scores = index.scores("sqlite")
+    assert list(rows) == [1, 2]
+    assert scores[1] > scores[0]
+
+    rows, _ = index.scores("sqlite", rows=[1])
+    assert list(rows) == [1]
+    assert len(index.scores("missing")[0]) == 0
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Test that items ranked by both lists come first."""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]])
+    assert max(fused, key=fused.get) == "b"
+    assert fused["c"] == 1 / 63
@@ -0,0 +1,130 @@
+"""Tests for size-budgeted responses and continuation cursors."""
+
+import re
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from journal_server.pagination import decode_cursor, encode_cursor, truncate_text
+from journal_server.server import JournalServer
+
+
+def _cursor(text):
+    match = re.search(r"`cursor` set to `([^`]+)`", text)
+    return match.group(1) if match else None
+
+
+def test_truncate_text_prefers_natural_breaks():
+    """Test cutting at a paragraph, then a sentence, then a word."""
+    text = "First paragraph here.\n\nSecond one is much longer than the first."
+    assert truncate_text(text, 1000) == text
+    assert truncate_text(text, 40).startswith("First paragraph here. …")
+    assert "more bytes not shown" in truncate_text(text, 40)
+
+    text = "One sentence. Another sentence that goes on and on"
+    assert truncate_text(text, 45).startswith("One sentence. Another sentence that goes on …")
+    assert truncate_text("é" * 100, 51).startswith("é" * 25 + " …")
+
+
+def test_cursor_round_trip_and_validation():
+    """Test that cursors decode only for the tool that issued them."""
+    cursor = encode_cursor({"tool": "journal_read", "path": "a/b", "next": 3})
+    assert decode_cursor(cursor, "journal_read")["next"] == 3
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "journal_search")
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor!", "journal_read")
+
+
+@pytest.mark.asyncio
+async def test_list_entries_pages_by_budget_and_survives_writes():
+    """Test that cursors walk every entry once even as new ones arrive."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(Path(tmpdir) / "test.json", embed_on_write=False)
+        for i in range(1, 7):
+            await server._handle_write({
+                "path": "notes",
+                "entry": f"Entry body {i}. " + "word " * 60,
+                "work_context": "paging",
+            })
+
+        text = (await server._handle_list_entries(
+            {"path": "notes", "limit": 5, "max_tokens": 200}
+        ))[0].text
+        seen = re.findall(r"## Entry (\d+)", text)
+        assert 0 < len(seen) < 5
+        assert f"({len(seen)} of 6)" in text
+
+        # A write between pages does not shift the next page
+        await server._handle_write({"path": "notes", "entry": "late", "work_context": "paging"})
+        cursor = _cursor(text)
+        while cursor is not None:
+            text = (await server._handle_list_entries(
+                {"path": "notes", "cursor": cursor, "max_tokens": 200}
+            ))[0].text
+            seen += re.findall(r"## Entry (\d+)", text)
+            cursor = _cursor(text)
+        assert seen == ["6", "5", "4", "3", "2"]
+
+
+@pytest.mark.asyncio
+async def test_long_entries_are_shortened():
+    """Test that one huge entry is cut rather than returned whole."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(Path(tmpdir) / "test.json", embed_on_write=False)
+        await server._handle_write({
+            "path": "notes", "entry": "Huge. " + "x" * 100_000, "work_context": "paging"
+        })
+        text = (await server._handle_read(
+            {"path": "notes", "include_entries": True, "max_tokens": 500}
+        ))[0].text
+        assert len(text) < 2000
+        assert "more bytes not shown" in text
+        assert _cursor(text) is None
+
+
+@pytest.mark.asyncio
+async def test_search_pages_from_stored_results():
+    """Test search cursors, including after the stored results expired."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(
+            Path(tmpdir) / "test.json", embedding_backend="hashing", embed_on_write=False
+        )
+        for i in range(4):
+            await server._handle_write({
+                "path": f"auth-{i}",
+                "entry": f"JWT token rotation notes, part {i}. " + "detail " * 40,
+                "work_context": "authentication",
+            })
+
+        args = {
+            "work_context": "authentication", "content": "JWT token rotation",
+            "salience_threshold": 0.1, "max_tokens": 150,
+        }
+        text = (await server._handle_search(args))[0].text
+        assert "Found 4 matching entries (showing 1-1)" in text
+        cursor = _cursor(text)
+
+        text = (await server._handle_search({**args, "cursor": cursor}))[0].text
+        assert "(showing 2-2)" in text and "## Result 2" in text
+
+        server.result_pages = type(server.result_pages)()
+        text = (await server._handle_search({**args, "cursor": _cursor(text)}))[0].text
+        assert "(showing 3-3)" in text
+
+
+@pytest.mark.asyncio
+async def test_paths_with_braces():
+    """Test that section paths are never treated as format templates."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server = JournalServer(Path(tmpdir) / "test.json", embed_on_write=False)
+        await server._handle_write({
+            "path": "notes/{draft}", "entry": "Braces", "work_context": "paging"
+        })
+        text = (await server._handle_list_entries({"path": "notes/{draft}"}))[0].text
+        assert "# Entries from notes/{draft} (1 of 1)" in text
+        text = (await server._handle_read(
+            {"path": "notes/{draft}", "include_entries": True}
+        ))[0].text
+        assert "## Recent Entries (1 of 1)" in text
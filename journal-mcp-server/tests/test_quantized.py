@@ -0,0 +1,83 @@
+"""Tests for quantized embeddings and the memory-mapped store."""
+
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from journal_server.index import EntryIndex, to_epoch
+from journal_server.quantized import MmapEmbeddingStore, dequantize, quantize
+from journal_server.types import Journal, JournalEntry, JournalSection
+
+
+def test_quantization_round_trip_error_is_small():
+    """Test float16 and int8 reconstruction of unit vectors."""
+    vectors = np.random.default_rng(0).normal(size=(50, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for precision, tolerance in (("float16", 1e-3), ("int8", 1e-2)):
+        data, scales = quantize(vectors, precision)
+        restored = dequantize(data, scales)
+        assert np.abs(restored - vectors).max() < tolerance
+
+
+def test_store_appends_and_maps_records():
+    """Test that saved embeddings are readable after reopening."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store_file = Path(tmpdir) / "test.vectors"
+        store = MmapEmbeddingStore("model-a", store_file, "int8")
+        store.put("first", np.array([0.6, 0.8], dtype=np.float32))
+        store.save()
+        store.put("second", np.array([1.0, 0.0], dtype=np.float32))
+        store.save()
+
+        reopened = MmapEmbeddingStore("model-a", store_file, "int8")
+        assert len(reopened) == 2
+        np.testing.assert_allclose(reopened.get("first"), [0.6, 0.8], atol=1e-2)
+        np.testing.assert_allclose(reopened.get("second"), [1.0, 0.0], atol=1e-2)
+        assert reopened.get("missing") is None
+        assert len(MmapEmbeddingStore("model-b", store_file, "int8")) == 0
+        assert len(MmapEmbeddingStore("model-a", store_file, "float16")) == 0
+
+
+def test_save_extends_lookup_table():
+    """Test that an append adds its keys to the lookup table instead of rebuilding it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store_file = Path(tmpdir) / "journal.vectors"
+        store = MmapEmbeddingStore("model-a", store_file, "float16")
+        store.put("first", np.array([0.6, 0.8], dtype=np.float32))
+        store.save()
+        assert store.get("first") is not None
+        rows = store._rows
+
+        store.put("second", np.array([1.0, 0.0], dtype=np.float32))
+        store.save()
+        assert store._rows is rows and len(rows) == 2
+        np.testing.assert_allclose(store.get("second"), [1.0, 0.0], atol=1e-3)
+
+
+def test_quantized_index_ranks_like_float32():
+    """Test that scoring on quantized matrices keeps the ranking."""
+    now = datetime(2025, 1, 1)
+    rng = np.random.default_rng(1)
+    journal = Journal()
+    section = JournalSection(path="notes")
+    for i in range(30):
+        section.entries.append(
+            JournalEntry(work_context=f"w{i}", content=f"c{i}", timestamp=now)
+        )
+    journal.sections["notes"] = section
+    vectors = {f"{kind}{i}": rng.normal(size=32) for kind in "wc" for i in range(30)}
+
+    def embed_many(texts):
+        return [vectors[text] for text in texts]
+
+    rankings = []
+    for precision in ("float32", "float16", "int8"):
+        index = EntryIndex(precision)
+        index.sync(journal, embed_many)
+        hits = index.search(vectors["w3"], vectors["c3"], -1.0, 5, to_epoch(now))
+        rankings.append([hit.entry_index for hit in hits])
+    assert rankings[0][0] == 3
+    assert rankings[1] == rankings[0]
+    assert rankings[2][0] == 3
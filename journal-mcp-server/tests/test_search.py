@@ -0,0 +1,123 @@
+"""Tests for the journal searcher."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from journal_server.search import JournalSearcher, SearchCancelled
+from journal_server.types import Journal, JournalEntry, JournalSection, SearchQuery
+
+
+def test_cancelled_search_stops_before_encoding():
+    """Test that a cancelled search raises without touching the model."""
+    journal = Journal()
+    section = JournalSection(path="notes")
+    section.entries.append(JournalEntry(work_context="design", content="Sketch"))
+    journal.sections["notes"] = section
+
+    searcher = JournalSearcher()
+    cancel = threading.Event()
+    cancel.set()
+
+    with pytest.raises(SearchCancelled):
+        searcher.search(journal, "design", "sketch", cancel=cancel)
+    assert not searcher.model_loaded
+
+
+class _FakeModel:
+    """Stand-in encoder mapping texts that mention "api" to one axis."""
+
+    def encode(self, texts, **kwargs):
+        return np.array([
+            [1.0, 0.0] if "api" in text else [0.0, 1.0] for text in texts
+        ], dtype=np.float32)
+
+
+def test_search_scoped_to_subtree():
+    """Test that the path argument restricts results to one subtree."""
+    journal = Journal()
+    for path in ("alpha", "beta"):
+        section = JournalSection(path=path)
+        section.entries.append(JournalEntry(work_context="api work", content="api design"))
+        journal.sections[path] = section
+
+    searcher = JournalSearcher()
+    searcher._model = _FakeModel()
+    results = searcher.search(journal, "api", "api", max_results=5)
+    assert {r.section_path for r in results} == {"alpha", "beta"}
+
+    results = searcher.search(journal, "api", "api", path="beta")
+    assert [r.section_path for r in results] == ["beta"]
+
+    results = searcher.search(journal, "api", "api", path="beta", beam_width=1)
+    assert [r.section_path for r in results] == ["beta"]
+
+
+def test_hybrid_search_surfaces_exact_identifier():
+    """Test that hybrid mode ranks a lexical match the embeddings miss."""
+    journal = Journal()
+    section = JournalSection(path="notes")
+    section.entries.append(JournalEntry(work_context="api work", content="api design"))
+    section.entries.append(JournalEntry(work_context="triage", content="fixed JIRA-77"))
+    journal.sections["notes"] = section
+
+    searcher = JournalSearcher()
+    searcher._model = _FakeModel()
+    semantic = searcher.search(journal, "api", "api JIRA-77", salience_threshold=0.9)
+    assert [r.entry_index for r in semantic] == [0]
+
+    hybrid = searcher.search(
+        journal, "api", "api JIRA-77", salience_threshold=0.9, mode="hybrid"
+    )
+    assert {r.entry_index for r in hybrid} == {0, 1}
+    assert hybrid[1].lexical_score > 0
+
+    with pytest.raises(ValueError):
+        searcher.search(journal, "api", "JIRA-77", mode="lexical", include_archive=True)
+
+
+def test_query_and_result_caches():
+    """Test query embedding reuse and generation-keyed result caching."""
+    journal = Journal()
+    section = JournalSection(path="notes")
+    section.entries.append(JournalEntry(work_context="api work", content="api design"))
+    journal.sections["notes"] = section
+
+    searcher = JournalSearcher()
+    searcher._model = _FakeModel()
+    first = searcher.search(journal, "api", "api design", generation=1)
+    again = searcher.search(journal, "api", "api design", generation=1)
+    assert again == first
+    assert searcher.counters["result_cache_hits"] == 1
+
+    # Same work context, new content: only the content is encoded
+    searcher.search(journal, "api", "api review", generation=1)
+    assert searcher.counters["query_cache_hits"] == 1
+
+    # A write bumps the generation, so the results are recomputed
+    section.entries.append(JournalEntry(work_context="api work", content="api design"))
+    updated = searcher.search(journal, "api", "api design", generation=2)
+    assert len(updated) == 2
+    assert searcher.counters["result_cache_misses"] == 3
+
+
+def test_search_batch_shares_result_cache():
+    """Test that batched queries match single searches and reuse their cache."""
+    journal = Journal()
+    section = JournalSection(path="notes")
+    section.entries.append(JournalEntry(work_context="api work", content="api design"))
+    section.entries.append(JournalEntry(work_context="triage", content="fixed a crash"))
+    journal.sections["notes"] = section
+
+    searcher = JournalSearcher()
+    searcher._model = _FakeModel()
+    single = searcher.search(journal, "api", "api design", generation=1)
+    batched = searcher.search_batch(journal, [
+        SearchQuery(work_context="api", content="api design"),
+        SearchQuery(work_context="triage", content="crash", max_results=1),
+    ], generation=1)
+
+    assert batched[0] == single
+    assert [r.entry_index for r in batched[1]] == [1]
+    assert searcher.counters["result_cache_hits"] == 1
@@ -0,0 +1,140 @@
+"""Tests for the section-sharded storage backend."""
+
+import json
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from journal_server.backends import HashingEmbedder
+from journal_server.search import JournalSearcher
+from journal_server.sharded_storage import ShardedStorage
+from journal_server.types import JournalEntry
+
+
+def _entry(i: int) -> JournalEntry:
+    return JournalEntry(work_context="testing", content=f"entry {i}")
+
+
+def test_writes_touch_only_their_shard():
+    """Test that a write rewrites one shard and the manifest."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = ShardedStorage(Path(tmpdir) / "test.json")
+        storage.append_entry("alpha", _entry(1), overview="Alpha overview")
+        storage.append_entry("beta/api", _entry(2))
+        beta_file = storage.shard_dir / "shards" / "beta.json"
+        beta_mtime = beta_file.stat().st_mtime_ns
+
+        storage.append_entry("alpha", _entry(3))
+        assert beta_file.stat().st_mtime_ns == beta_mtime
+
+        manifest = json.loads(storage.manifest_file.read_text())
+        assert manifest["sections"]["alpha"]["entry_count"] == 2
+        assert manifest["sections"]["beta"]["entry_count"] == 0
+        assert manifest["sections"]["beta/api"]["entry_count"] == 1
+
+
+def test_toc_from_manifest_and_lazy_shards():
+    """Test that stats need no shard and reads load only one."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = ShardedStorage(data_file)
+        storage.append_entry("alpha", _entry(1))
+        storage.append_entry("beta/api", _entry(2))
+
+        reopened = ShardedStorage(data_file)
+        stats = reopened.section_stats()
+        assert [(s.path, s.entry_count) for s in stats] == [
+            ("alpha", 1), ("beta", 0), ("beta/api", 1)
+        ]
+        assert isinstance(stats[0].last_modified, datetime)
+        assert isinstance(stats[2].last_modified, datetime)
+        assert reopened.resident_shards == []
+
+        nested = reopened.get_section("beta/api")
+        assert nested is not None
+        assert [e.content for e in nested.entries] == ["entry 2"]
+        assert reopened.resident_shards == ["beta"]
+
+
+def test_least_recently_used_shard_is_evicted():
+    """Test that shards beyond the memory budget are dropped."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = ShardedStorage(data_file)
+        for name in ("alpha", "beta", "gamma"):
+            storage.append_entry(name, _entry(1))
+
+        reopened = ShardedStorage(data_file, memory_budget_bytes=1)
+        for name in ("alpha", "beta", "gamma"):
+            assert reopened.get_section(name) is not None
+        assert reopened.resident_shards == ["gamma"]
+
+        # An evicted shard reloads from disk and stays consistent
+        reopened.append_entry("alpha", _entry(2))
+        section = ShardedStorage(data_file).get_section("alpha")
+        assert section is not None
+        assert [e.content for e in section.entries] == ["entry 1", "entry 2"]
+
+
+def test_search_keeps_to_the_memory_budget():
+    """Test that searches and writes never pin every shard."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = ShardedStorage(data_file)
+        for name in ("alpha", "beta", "gamma"):
+            storage.append_entry(
+                name, JournalEntry(work_context="testing", content=f"ticket {name}")
+            )
+
+        reopened = ShardedStorage(data_file, memory_budget_bytes=1)
+        searcher = JournalSearcher(backend=HashingEmbedder(), journal_lock=reopened.lock)
+        results = searcher.search(reopened.entry_source(), "testing", "ticket beta", mode="lexical")
+        assert results[0].section_path == "beta"
+        assert len(reopened.resident_shards) == 1
+
+        results = searcher.search(
+            reopened.entry_source(), "testing", "ticket", salience_threshold=0, max_results=5
+        )
+        assert len(results) == 3
+        assert len(reopened.resident_shards) == 1
+
+        # Indexing a write reads only the written shard back
+        reopened.append_entry(
+            "alpha", JournalEntry(work_context="testing", content="ticket delta")
+        )
+        searcher.refresh(reopened.entry_source())
+        assert len(searcher.index) == 4
+        results = searcher.search(reopened.entry_source(), "testing", "ticket delta", mode="lexical")
+        assert results[0].entry.content == "ticket delta"
+        assert len(reopened.resident_shards) == 1
+
+
+def test_existing_json_journal_is_split():
+    """Test migrating a single-file journal into shards."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        fixture = Path(__file__).parent / "fixtures" / "test_journal.json"
+        data_file.write_text(fixture.read_text())
+
+        storage = ShardedStorage(data_file)
+        sections = json.loads(fixture.read_text())["sections"]
+        assert set(storage.load().sections) == set(sections)
+        summary = storage.summarize_section("project-alpha")
+        assert summary is not None
+        assert summary.entry_count == 2
+        assert summary.subsections == ["api-design"]
+
+
+def test_section_named_manifest_keeps_its_own_shard():
+    """Test that a top-level section called "manifest" cannot clobber the manifest."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = ShardedStorage(data_file)
+        storage.append_entry("manifest", _entry(1))
+        storage.append_entry("alpha", _entry(2))
+
+        reopened = ShardedStorage(data_file)
+        section = reopened.get_section("manifest")
+        assert section is not None
+        assert [e.content for e in section.entries] == ["entry 1"]
+        assert [e.content for e in reopened.get_section("alpha").entries] == ["entry 2"]
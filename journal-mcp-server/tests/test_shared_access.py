@@ -0,0 +1,158 @@
+"""Tests for several processes sharing one journal."""
+
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from journal_server.embeddings import EmbeddingCache
+from journal_server.quantized import MmapEmbeddingStore
+from journal_server.sharded_storage import ShardedStorage
+from journal_server.sqlite_storage import SqliteStorage
+from journal_server.storage import EntryWrite, JsonStorage
+from journal_server.types import JournalEntry
+from journal_server.wal_storage import WalStorage
+
+BACKENDS = {
+    "json": JsonStorage,
+    "wal": WalStorage,
+    "sharded": ShardedStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+def _write(storage, path, content):
+    storage.append_entries([
+        EntryWrite(path, JournalEntry(work_context="shared", content=content))
+    ])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_writers_do_not_lose_each_others_entries(tmp_path, backend):
+    """Test that two storages on one file merge rather than overwrite."""
+    first = BACKENDS[backend](tmp_path / "journal.json")
+    second = BACKENDS[backend](tmp_path / "journal.json")
+    journal = first.load()
+    second.load()
+
+    _write(first, "alpha", "from first")
+    _write(second, "alpha", "from second")
+    _write(second, "beta", "new section")
+    generation = first.generation
+
+    assert first.refresh()
+    if backend != "sharded":
+        # Sharded storage re-reads shards rather than pinning one journal
+        assert first.load() is journal
+    assert first.generation > generation
+    assert [e.content for e in first.get_section("alpha").entries] == [
+        "from first", "from second"
+    ]
+    assert first.get_section("beta") is not None
+    assert not first.refresh()
+
+    _write(first, "alpha", "third")
+    reopened = BACKENDS[backend](tmp_path / "journal.json")
+    assert len(reopened.get_section("alpha").entries) == 3
+    for storage in (first, second, reopened):
+        storage.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sharded"])
+def test_refresh_swaps_sections_for_readers(tmp_path, backend):
+    """Test that a reader iterating the old sections never sees them emptied."""
+    first = BACKENDS[backend](tmp_path / "journal.json")
+    second = BACKENDS[backend](tmp_path / "journal.json")
+    _write(first, "alpha", "one")
+    journal = first.load()
+    second.load()
+    _write(second, "beta", "two")
+
+    with first.lock:
+        sections = journal.sections
+        assert first.refresh()
+        assert list(sections) == ["alpha"]
+    if backend != "sharded":
+        assert first.load() is journal
+    assert sorted(first.load().sections) == ["alpha", "beta"]
+    for storage in (first, second):
+        storage.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_refresh_picks_up_appends_and_removals(tmp_path, backend):
+    """Test that stats follow entries another storage appended or moved out."""
+    first = BACKENDS[backend](tmp_path / "journal.json")
+    second = BACKENDS[backend](tmp_path / "journal.json")
+    first.append_entries([
+        EntryWrite("alpha", JournalEntry(
+            work_context="shared", content=f"entry {i}", timestamp=datetime(2025, 1, i + 1)
+        ))
+        for i in range(3)
+    ])
+    first.load()
+    second.load()
+
+    _write(second, "alpha", "entry 3")
+    assert first.refresh()
+    [stats] = first.section_stats("alpha")
+    assert stats.entry_count == 4
+    assert stats.total_bytes == 4 * len("sharedentry 0")
+
+    moved = []
+    second.move_entries_before(datetime(2025, 1, 3), lambda path, entries: moved.extend(entries))
+    assert len(moved) == 2
+    assert first.refresh()
+    assert [e.content for e in first.get_section("alpha").entries] == ["entry 2", "entry 3"]
+    [stats] = first.section_stats("alpha")
+    assert stats.entry_count == 2
+    assert stats.total_bytes == 2 * len("sharedentry 0")
+    for storage in (first, second):
+        storage.close()
+
+
+def _append_many(data_file: Path, backend: str, worker: int, count: int) -> None:
+    storage = BACKENDS[backend](data_file)
+    for i in range(count):
+        _write(storage, "shared", f"worker {worker} entry {i}")
+    storage.close()
+
+
+@pytest.mark.parametrize("backend", ["json", "wal"])
+def test_concurrent_processes(tmp_path, backend):
+    """Test that writers in separate processes keep every entry."""
+    data_file = tmp_path / "journal.json"
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_append_many, args=(data_file, backend, worker, 10))
+        for worker in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    entries = BACKENDS[backend](data_file).get_section("shared").entries
+    assert len(entries) == 30
+    assert len({e.content for e in entries}) == 30
+
+
+@pytest.mark.parametrize("cache_type", [EmbeddingCache, MmapEmbeddingStore])
+def test_embedding_caches_merge_between_processes(tmp_path, cache_type):
+    """Test that embedding caches sharing a file keep both sides' vectors."""
+    cache_file = tmp_path / "cache.bin"
+    first = cache_type("model", cache_file)
+    second = cache_type("model", cache_file)
+    first.put("alpha", np.ones(4, dtype=np.float32))
+    first.save()
+    second.put("beta", np.full(4, 2, dtype=np.float32))
+    second.save()
+
+    assert first.get("beta") is None
+    assert first.refresh()
+    assert np.allclose(first.get("beta"), 2)
+    reopened = cache_type("model", cache_file)
+    assert reopened.get("alpha") is not None and reopened.get("beta") is not None
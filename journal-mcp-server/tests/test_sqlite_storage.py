@@ -0,0 +1,103 @@
+"""Tests for the SQLite storage backend."""
+
+import json
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from journal_server.sqlite_storage import (
+    SqliteEmbeddingCache,
+    SqliteStorage,
+    embeddings_file_for,
+)
+from journal_server.types import JournalEntry
+
+
+def _entry(i: int) -> JournalEntry:
+    return JournalEntry(
+        work_context="testing",
+        content=f"entry {i}",
+        timestamp=datetime(2025, 1, 1) + timedelta(hours=i),
+    )
+
+
+def test_append_and_indexed_reads():
+    """Test writes, section summaries and paginated entry listing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = SqliteStorage(data_file)
+        for i in range(5):
+            storage.append_entry("project-alpha", _entry(i))
+        storage.append_entry("project-alpha/api", _entry(10), overview="API notes")
+        storage.close()
+
+        reopened = SqliteStorage(data_file)
+        summary = reopened.summarize_section("project-alpha")
+        assert summary is not None
+        assert summary.entry_count == 5
+        assert summary.subsections == ["api"]
+
+        page = reopened.list_entries("project-alpha", limit=2, offset=1)
+        assert [e.content for e in page] == ["entry 3", "entry 2"]
+        assert page[0].timestamp == datetime(2025, 1, 1, 3)
+
+        nested = reopened.get_section("project-alpha/api")
+        assert nested is not None
+        assert nested.overview == "API notes"
+        assert reopened.summarize_section("missing") is None
+        assert reopened.section_paths("project-alpha") == [
+            "project-alpha", "project-alpha/api"
+        ]
+
+
+def test_load_assembles_tree_and_tracks_appends():
+    """Test that the assembled journal matches the stored tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = SqliteStorage(Path(tmpdir) / "test.json")
+        storage.append_entry("project-alpha/api/auth", _entry(1))
+
+        journal = storage.load()
+        auth = journal.sections["project-alpha"].subsections["api"].subsections["auth"]
+        assert auth.path == "project-alpha/api/auth"
+        assert [e.content for e in auth.entries] == ["entry 1"]
+
+        storage.append_entry("project-alpha/api/auth", _entry(2))
+        assert len(auth.entries) == 2
+
+
+def test_existing_json_journal_is_imported():
+    """Test migrating a JSON data file into a new database."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        fixture = Path(__file__).parent / "fixtures" / "test_journal.json"
+        data_file.write_text(fixture.read_text())
+
+        storage = SqliteStorage(data_file)
+        summary = storage.summarize_section("project-alpha")
+        assert summary is not None
+        assert summary.entry_count == 2
+        assert summary.subsections == ["api-design"]
+        sections = json.loads(fixture.read_text())["sections"]
+        assert set(storage.load().sections) == set(sections)
+
+
+def test_embeddings_stored_as_blobs():
+    """Test that the embedding cache persists in its own database."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = SqliteStorage(data_file)
+        storage.load()
+        cache = SqliteEmbeddingCache("model-a", embeddings_file_for(data_file))
+        cache.put("project setup", np.array([0.5, 1.0], dtype=np.float32))
+        cache.save()
+
+        # Saving embeddings doesn't look like a change to the journal
+        assert not storage.refresh()
+
+        reloaded = SqliteEmbeddingCache("model-a", embeddings_file_for(data_file))
+        vector = reloaded.get("project setup")
+        assert vector is not None
+        np.testing.assert_allclose(vector, [0.5, 1.0])
+        assert len(SqliteEmbeddingCache("model-b", embeddings_file_for(data_file))) == 0
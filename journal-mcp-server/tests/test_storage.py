@@ -93,3 +93,65 @@ def test_section_retrieval():
         # Test non-existent section
         missing_section = storage.get_section("non-existent")
         assert missing_section is None
+
+
+def test_append_entry_creates_section_and_persists():
+    """Test appending an entry to a new nested section."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = JsonStorage(data_file)
+        
+        storage.append_entry(
+            "project-alpha/api-design",
+            JournalEntry(work_context="design", content="Chose REST"),
+            overview="API decisions",
+        )
+        
+        reloaded = JsonStorage(data_file)
+        section = reloaded.get_section("project-alpha/api-design")
+        assert section is not None
+        assert section.overview == "API decisions"
+        assert section.entries[0].content == "Chose REST"
+
+
+def test_section_paths_prefix_queries():
+    """Test tree-ordered path listing and subtree queries."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = JsonStorage(data_file)
+        
+        for path in [
+            "project-beta",
+            "project-alpha/api-design",
+            "project-alpha-2",
+            "project-alpha",
+            "project-alpha/api-design/auth",
+            "project-alpha/testing",
+        ]:
+            storage.create_section(path)
+        
+        assert storage.section_paths() == [
+            "project-alpha",
+            "project-alpha/api-design",
+            "project-alpha/api-design/auth",
+            "project-alpha/testing",
+            "project-alpha-2",
+            "project-beta",
+        ]
+        assert storage.section_paths("project-alpha/") == [
+            "project-alpha",
+            "project-alpha/api-design",
+            "project-alpha/api-design/auth",
+            "project-alpha/testing",
+        ]
+        assert storage.section_paths("project-alpha/api-design/auth") == [
+            "project-alpha/api-design/auth"
+        ]
+        assert storage.section_paths("missing") == []
+        
+        # The index is rebuilt from disk on reload
+        reloaded = JsonStorage(data_file)
+        assert reloaded.section_paths() == storage.section_paths()
+        auth = reloaded.get_section("project-alpha/api-design/auth")
+        assert auth is not None
+        assert auth.path == "project-alpha/api-design/auth"
@@ -0,0 +1,98 @@
+"""Tests for the write-ahead log storage backend."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from journal_server.types import JournalEntry
+from journal_server.wal_storage import WalStorage
+
+
+def _entry(i: int) -> JournalEntry:
+    return JournalEntry(work_context="testing", content=f"entry {i}")
+
+
+def test_writes_append_to_log_and_replay():
+    """Test that writes go to the log and are replayed on load."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = WalStorage(data_file)
+        storage.append_entry("project-alpha", _entry(1), overview="First overview")
+        storage.append_entry("project-alpha/api", _entry(2))
+        storage.close()
+
+        assert not data_file.exists()
+        lines = storage.log_file.read_text().splitlines()
+        assert [json.loads(line)["seq"] for line in lines] == [1, 2]
+
+        reloaded = WalStorage(data_file)
+        section = reloaded.get_section("project-alpha")
+        assert section is not None
+        assert section.overview == "First overview"
+        assert [e.content for e in section.entries] == ["entry 1"]
+        nested = reloaded.get_section("project-alpha/api")
+        assert nested is not None
+        assert nested.entries[0].content == "entry 2"
+
+
+def test_compaction_folds_log_into_snapshot():
+    """Test that compaction writes a snapshot and trims the log."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = WalStorage(data_file, compact_bytes=1)
+        storage.append_entry("notes", _entry(1))
+        storage.close()
+
+        snapshot = json.loads(data_file.read_text())
+        assert snapshot["wal_seq"] == 1
+        assert snapshot["sections"]["notes"]["entries"][0]["content"] == "entry 1"
+        assert storage.log_file.read_bytes() == b""
+
+        reloaded = WalStorage(data_file)
+        reloaded.append_entry("notes", _entry(2))
+        section = reloaded.get_section("notes")
+        assert section is not None
+        assert [e.content for e in section.entries] == ["entry 1", "entry 2"]
+
+
+def test_replay_skips_records_already_in_snapshot():
+    """Test recovery from a crash between snapshot and log trim."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = WalStorage(data_file)
+        storage.append_entry("notes", _entry(1))
+        storage.append_entry("notes", _entry(2))
+        log_before = storage.log_file.read_bytes()
+        storage.compact()
+        storage.close()
+
+        # Simulate the log trim never happening
+        storage.log_file.write_bytes(log_before)
+
+        section = WalStorage(data_file).get_section("notes")
+        assert section is not None
+        assert [e.content for e in section.entries] == ["entry 1", "entry 2"]
+
+
+def test_torn_record_is_discarded():
+    """Test that a partially written final record is ignored."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data_file = Path(tmpdir) / "test.json"
+        storage = WalStorage(data_file)
+        storage.append_entry("notes", _entry(1))
+        storage.close()
+
+        with open(storage.log_file, "a", encoding="utf-8") as f:
+            f.write('{"seq": 2, "op": "entry", "pa')
+
+        reloaded = WalStorage(data_file)
+        section = reloaded.get_section("notes")
+        assert section is not None
+        assert len(section.entries) == 1
+
+        # New records continue after the last intact one
+        reloaded.append_entry("notes", _entry(2))
+        reloaded.close()
+        section = WalStorage(data_file).get_section("notes")
+        assert section is not None
+        assert [e.content for e in section.entries] == ["entry 1", "entry 2"]
@@ -0,0 +1,99 @@
+"""Tests for the group-commit write pipeline."""
+
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from journal_server.storage import EntryWrite
+from journal_server.types import JournalEntry
+from journal_server.wal_storage import WalStorage
+from journal_server.write_pipeline import GroupCommitWriter
+
+
+def _write(i: int) -> EntryWrite:
+    return EntryWrite(
+        "notes", JournalEntry(work_context="testing", content=f"entry {i}")
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_a_commit():
+    """Test that writes arriving together are committed once."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        storage = WalStorage(Path(tmpdir) / "test.json")
+        writer = GroupCommitWriter(storage, window_seconds=0.01)
+
+        await asyncio.gather(*(writer.write(_write(i)) for i in range(50)))
+
+        assert writer.writes == 50
+        assert writer.commits == 1
+        storage.close()
+
+        section = WalStorage(Path(tmpdir) / "test.json").get_section("notes")
+        assert section is not None
+        assert [e.content for e in section.entries] == [f"entry {i}" for i in range(50)]
+
+
+@pytest.mark.asyncio
+async def test_commit_failure_is_reported_to_every_writer():
+    """Test that a failed commit fails all writes in the batch."""
+
+    class FailingStorage:
+        def append_entries(self, writes):
+            raise OSError("disk full")
+
+    writer = GroupCommitWriter(FailingStorage(), window_seconds=0)  # type: ignore[arg-type]
+    results = await asyncio.gather(
+        writer.write(_write(1)), writer.write(_write(2)), return_exceptions=True
+    )
+    assert all(isinstance(r, OSError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_commits_run_off_the_event_loop():
+    """Test that storage I/O does not run on the event loop thread."""
+    loop_thread = threading.get_ident()
+
+    class RecordingStorage:
+        threads = []
+
+        def append_entries(self, writes):
+            self.threads.append(threading.get_ident())
+
+    storage = RecordingStorage()
+    writer = GroupCommitWriter(storage, window_seconds=0)  # type: ignore[arg-type]
+    await asyncio.gather(writer.write(_write(1)), writer.write(_write(2)))
+    assert writer.writes == 2
+    assert storage.threads and loop_thread not in storage.threads
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flusher_releases_pending_writers():
+    """Test that writers queued behind a cancelled flush do not hang."""
+
+    class RecordingStorage:
+        writes = []
+
+        def append_entries(self, writes):
+            self.writes.extend(writes)
+
+    storage = RecordingStorage()
+    writer = GroupCommitWriter(storage, window_seconds=10)  # type: ignore[arg-type]
+    writes = [asyncio.create_task(writer.write(_write(i))) for i in range(3)]
+    # Let the flusher start waiting out its commit window
+    await asyncio.sleep(0.01)
+    assert writer._flusher is not None
+    writer._flusher.cancel()
+
+    done, _ = await asyncio.wait(writes, timeout=1)
+    assert len(done) == 3
+    assert all(write.cancelled() for write in writes)
+    assert storage.writes == []
+
+    # The writer keeps working afterwards
+    writer.window_seconds = 0
+    await writer.write(_write(3))
+    assert len(storage.writes) == 1